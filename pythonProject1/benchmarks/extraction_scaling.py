@@ -0,0 +1,144 @@
+"""
+Scaling benchmark of extract_data_from_pdf() on synthetic gazette PDFs.
+
+For every layout and table size, generates a gazette PDF (see benchmarks/gazette_pdf.py)
+and measures, in a fresh worker process, the PDF-to-Markdown conversion, the Greek
+text cleaning and the table parsing separately, together with the peak resident
+memory of the process. Every size is generated twice: with the table header repeated
+on every page and with the header only on the first page, whose continuation pages
+start with a data row. The number of parsed rows is printed next to the number of
+generated rows, and the run fails if they differ.
+
+The PDFs are converted without the pymupdf-layout model by default: it joins narrow
+adjacent columns of the generated tables (e.g. 'A/A' and 'Αριθμός Μητρώου'), which the
+parser then rejects. --layout-model converts with it, if it is installed.
+
+Run from pythonProject1/:
+
+    python -m benchmarks.extraction_scaling --rows 100 1000 10000
+    python -m benchmarks.extraction_scaling --layouts data/diathesi.pdf --rows 100000 --work-dir /tmp/gazettes
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf
+import pymupdf4llm
+
+from benchmarks.gazette_pdf import make_gazette_pdf
+from test_new_parser import COLUMN_HEADERS, _clean_greek_text, convert_pdf_to_markdown, parse_markdown
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident memory of this process in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def measure(work_dir, layout, workers, layout_model):
+    """
+    Extracts one generated PDF step by step and returns the timings. Runs in a worker process.
+    """
+    if not layout_model and hasattr(pymupdf4llm, "use_layout"):
+        pymupdf4llm.use_layout(False)
+    # The parser chooses the column layout by the relative path 'data/<name>.pdf'
+    os.chdir(work_dir)
+    baseline = peak_rss_mb()
+
+    started = time.perf_counter()
+    md_text = convert_pdf_to_markdown(layout, max_workers=workers)
+    converted = time.perf_counter()
+    md_text = _clean_greek_text(md_text)
+    cleaned = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        _, rows = parse_markdown(md_text, layout)
+    parsed = time.perf_counter()
+
+    return {
+        "markdown_chars": len(md_text),
+        "parsed_rows": len(rows),
+        "convert_time": round(converted - started, 3),
+        "clean_time": round(cleaned - converted, 3),
+        "parse_time": round(parsed - cleaned, 3),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--layouts", nargs="+", choices=list(COLUMN_HEADERS), default=["data/diorismos_monimwn.pdf"])
+    parser.add_argument("--rows", nargs="+", type=int, default=[100, 1000, 10000],
+                        help="Table sizes (default: %(default)s; up to 100000 works but takes long)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Conversion processes (default: %(default)s, so the peak memory is one process)")
+    parser.add_argument("--work-dir", help="Keep the generated PDFs here and reuse them on the next run")
+    parser.add_argument("--layout-model", action="store_true",
+                        help="Convert with the pymupdf-layout model, if it is installed")
+    parser.add_argument("--headers", choices=['every-page', 'first-page', 'both'], default='both',
+                        help="Pages of the table with a header row (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    headers = {'every-page': [True], 'first-page': [False], 'both': [True, False]}[args.headers]
+    print(f"{'Layout':<36}{'Header':>8}{'Rows':>8}{'Pages':>7}{'MB':>7}{'Generate':>10}{'Convert':>9}{'Clean':>8}"
+          f"{'Parse':>8}{'Parsed':>8}{'Peak RSS':>10}")
+    results = []
+    mismatches = []
+    with contextlib.ExitStack() as stack:
+        root = args.work_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        for layout, rows, repeat_header in itertools.product(args.layouts, args.rows, headers):
+            header = "every" if repeat_header else "first"
+            work_dir = os.path.abspath(os.path.join(root, f"rows_{rows}_{header}"))
+            path = os.path.join(work_dir, layout)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            started = time.perf_counter()
+            if not os.path.exists(path):
+                make_gazette_pdf(path, layout, rows, args.seed, repeat_header)
+            generate_time = time.perf_counter() - started
+
+            # A new process per PDF, so the peak memory belongs to this PDF only
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(measure, work_dir, layout, args.workers,
+                                         args.layout_model).result()
+
+            with pymupdf.open(path) as doc:
+                pages = doc.page_count
+            result = dict({"layout": layout, "header": header, "rows": rows, "pages": pages,
+                           "file_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+                           "generate_time": round(generate_time, 3)}, **result)
+            results.append(result)
+            print(f"{layout[-36:]:<36}{header:>8}{rows:>8}{pages:>7}{result['file_mb']:>7.1f}"
+                  f"{generate_time:>10.2f}{result['convert_time']:>9.2f}{result['clean_time']:>8.3f}"
+                  f"{result['parse_time']:>8.3f}"
+                  f"{result['parsed_rows']:>8}{result['peak_rss_mb']:>8.0f}MB")
+            if result["parsed_rows"] != rows:
+                mismatches.append(f"{layout} ({rows} rows, header on {header} page): "
+                                  f"parsed {result['parsed_rows']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.json}")
+
+    if mismatches:
+        print("Error: The parsed rows differ from the generated rows:")
+        for mismatch in mismatches:
+            print(f"  {mismatch}")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
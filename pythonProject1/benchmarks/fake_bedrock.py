@@ -0,0 +1,408 @@
+"""
+A local stand-in for the bedrock-runtime client, for benchmarks without network or quota.
+
+FakeBedrockRuntime answers invoke_model() and invoke_model_with_response_stream() with
+responses in the native shape of each llms/ model family (Claude Messages API, Llama
+generation, DeepSeek-R1 choices with a <think> section), including token counts, the
+invocation metrics and Claude's prompt cache usage. The answer fills every <Format>
+field of the prompt from the row values, the fields read from a table column with that
+column's cell, with one <result id="N"> block per row of a batched prompt, cut off at
+the request's max_tokens like a real model. Latency follows a log-normal distribution
+per model family. Throttling, other errors, slow responses (stragglers) and wrong
+answers are injected at configurable rates.
+
+Use it through fake_bedrock():
+
+    with fake_bedrock(FakeBedrockRuntime(time_scale=0.05)) as client:
+        main.run_model('llama', first_paragraph, rows)
+"""
+import contextlib
+import json
+import math
+import random
+import re
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+import credentials
+import llms.adapters
+from llms.batching import CHARS_PER_TOKEN
+from llms.invocation import INVOCATION_METRICS
+from llms.prefill import COLUMN_RULES
+from llms.prompts import format_fields
+from llms.triples import COLUMN_PATTERNS, INTEGER_COLUMNS, TemplateSchema
+
+# Median seconds until the response is complete and the log-normal sigma, per model family.
+LATENCY_PROFILES = {
+    'claude': {'median': 4.0, 'sigma': 0.35},
+    'llama': {'median': 1.5, 'sigma': 0.3},
+    'deepseek': {'median': 12.0, 'sigma': 0.5}
+}
+
+# Share of the rows whose answer has a value outside the allowed values, per model family.
+MISTAKE_RATES = {
+    'claude': 0.02,
+    'llama': 0.15,
+    'deepseek': 0.08
+}
+
+# Share of the latency spent before the first streamed chunk.
+FIRST_CHUNK_SHARE = 0.3
+
+# Characters per streamed text chunk.
+STREAM_CHUNK_CHARS = 12
+
+_DOCUMENT_CONTENT = re.compile(r'<document_content>\n(.*?)\n</document_content>', re.DOTALL)
+_ROW = re.compile(r'<row id="(\d+)">(.*?)</row>', re.DOTALL)
+
+
+def _compact(text):
+    return ''.join(text.split())
+
+
+def model_family(request):
+    """
+    Returns 'claude', 'llama' or 'deepseek' for a decoded request body.
+    """
+    if 'anthropic_version' in request:
+        return 'claude'
+    if 'max_gen_len' in request:
+        return 'llama'
+    return 'deepseek'
+
+
+def prompt_text(request):
+    """
+    Returns the prompt text of a decoded request body and its cacheable prefix (Claude only).
+    """
+    if 'messages' not in request:
+        return request['prompt'], None
+
+    blocks = request['messages'][0]['content']
+    prefix = blocks[0]['text'] if len(blocks) > 1 and 'cache_control' in blocks[0] else None
+    return ''.join(block['text'] for block in blocks), prefix
+
+
+def count_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def cut_off(output, request):
+    """
+    Returns the output cut to the request's output token budget and whether it was cut.
+    """
+    budget = request.get('max_tokens') or request.get('max_gen_len')
+    if budget is None or count_tokens(output) <= budget:
+        return output, False
+    return output[:budget * CHARS_PER_TOKEN], True
+
+
+def column_fields(fields, header):
+    """
+    Returns the table column of each field read from a column (llms/prefill.py
+    COLUMN_RULES), for the layout with the most of its columns in the header.
+    """
+    columns = header.split(' | ')
+    rules = max(COLUMN_RULES.values(), key=lambda rules: sum(column in columns for column in rules.values()))
+    rules = {_compact(key): column for key, column in rules.items() if column in columns}
+    return {field: columns.index(rules[_compact(field)]) for field in fields if _compact(field) in rules}
+
+
+def answer(prompt, mistake=None):
+    """
+    Returns a plausible extraction for a prompt: every <Format> field of the template
+    filled with a valid value, with one <result id="N"> block per row of a batch.
+
+    Fields read from a table column get the row's cell of that column, the other fields
+    with allowed values the first one, dates, numbers and employee numbers a value of
+    the right shape, and the rest the row values in turn. If mistake() returns True for
+    a row, its first field with allowed values gets a value outside the list, as a
+    model that misread the row would.
+    """
+    fields = format_fields(prompt) or ['Person has_last_name']
+    specs = TemplateSchema('request', prompt).fields
+    match = _DOCUMENT_CONTENT.search(prompt)
+    content = match.group(1) if match else ''
+
+    def field_value(spec, values, index, column, wrong):
+        if spec is not None and spec.allowed and wrong:
+            return 'Άλλο'
+        if column is not None and column < len(values) and values[column]:
+            return values[column]
+        present = [value for value in values if value] or ['-']
+        if spec is None:
+            return present[index % len(present)]
+        if spec.allowed:
+            return next(iter(spec.allowed.values()))
+        if spec.column.endswith('_date'):
+            return '01/09/2024'
+        if spec.column in INTEGER_COLUMNS:
+            return '18'
+        if spec.column in COLUMN_PATTERNS:
+            return '123456'
+        return present[index % len(present)]
+
+    def fill(header, values_line):
+        values = values_line.split(' | ')
+        columns = column_fields(fields, header)
+        wrong_field = None
+        if mistake is not None and mistake():
+            wrong_field = next((index for index, spec in enumerate(specs) if spec.allowed), None)
+        lines = []
+        for index, field in enumerate(fields):
+            spec = specs[index] if index < len(specs) else None
+            value = field_value(spec, values, index, columns.get(field), index == wrong_field)
+            lines.append(f"{field.replace('<N>', '1').replace('<M>', '1').replace('<Z>', '1')} {value}")
+        return '\n'.join(lines)
+
+    # A batch: a header line before the first row and again wherever the columns change
+    results = []
+    header = ''
+    for line in content.split('\n'):
+        row = _ROW.fullmatch(line)
+        if row is None:
+            header = line
+        else:
+            results.append(f'<result id="{row.group(1)}">\n{fill(header, row.group(2))}\n</result>')
+    if results:
+        return '\n'.join(results)
+
+    # A single row: the header line, then the values line
+    lines = content.split('\n')
+    return fill(lines[-2] if len(lines) > 1 else '', lines[-1])
+
+
+class _Stream:
+    """
+    The EventStream of a streamed response; closing it stops the remaining chunks.
+    """
+
+    def __init__(self, events, first_delay, chunk_delay, sleep):
+        self._events = events
+        self._first_delay = first_delay
+        self._chunk_delay = chunk_delay
+        self._sleep = sleep
+        self.closed = False
+
+    def __iter__(self):
+        for index, event in enumerate(self._events):
+            if self.closed:
+                return
+            self._sleep(self._first_delay if index == 0 else self._chunk_delay)
+            yield {'chunk': {'bytes': json.dumps(event, ensure_ascii=False).encode('utf-8')}}
+
+    def close(self):
+        self.closed = True
+
+
+class _Body:
+    def __init__(self, data):
+        self._data = data
+
+    def read(self):
+        return self._data
+
+
+class FakeBedrockRuntime:
+    """
+    Fake bedrock-runtime client with model-shaped responses, simulated latency and
+    injected throttling and errors. Safe to share between threads like a boto3 client.
+
+    Args:
+        time_scale (float): Multiplies every latency of LATENCY_PROFILES (e.g. 0.01 for fast runs).
+        latency_profiles (dict): Overrides of LATENCY_PROFILES per model family.
+        throttle_rate (float): Share of calls rejected with a ThrottlingException.
+        error_rate (float): Share of calls failing with one of error_codes.
+        error_codes (tuple): Error codes of the injected errors. The default is retried by
+            llms/rate_limiter.py; a code such as 'ValidationException' ends the run.
+        slow_rate (float): Share of calls whose latency is multiplied by slow_factor.
+        slow_factor (float): How much slower the injected slow calls are.
+        mistake_rates (dict): Overrides of MISTAKE_RATES per model family.
+        seed (int): Seed of the random latencies and failures.
+        sleep (callable): Called with the seconds to wait, time.sleep by default.
+    """
+
+    def __init__(self, time_scale=1.0, latency_profiles=None, throttle_rate=0.0, error_rate=0.0,
+                 error_codes=('ServiceUnavailableException',), slow_rate=0.0, slow_factor=10.0,
+                 mistake_rates=None, seed=0, sleep=time.sleep):
+        self.time_scale = time_scale
+        self.latency_profiles = dict(LATENCY_PROFILES, **(latency_profiles or {}))
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.mistake_rates = dict(MISTAKE_RATES, **(mistake_rates or {}))
+        self.sleep = sleep
+        self.calls = 0
+        self.throttled = 0
+        self.errors = 0
+        self.slowed = 0
+        self.mistakes = 0
+        self._random = random.Random(seed)
+        self._cached_prefixes = set()
+        self._lock = threading.Lock()
+
+    def _draw(self, family, operation):
+        """
+        Returns the latency of the next call, or raises the injected throttling or error.
+        """
+        profile = self.latency_profiles[family]
+        with self._lock:
+            self.calls += 1
+            draw = self._random.random()
+            if draw < self.throttle_rate:
+                self.throttled += 1
+                code = 'ThrottlingException'
+            elif draw < self.throttle_rate + self.error_rate:
+                self.errors += 1
+                code = self._random.choice(self.error_codes)
+            else:
+                code = None
+            latency = profile['median'] * math.exp(profile['sigma'] * self._random.gauss(0, 1)) * self.time_scale
+            if code is None and self._random.random() < self.slow_rate:
+                self.slowed += 1
+                latency *= self.slow_factor
+
+        if code is not None:
+            # Rejected calls come back quickly
+            self.sleep(latency * 0.05)
+            raise ClientError({'Error': {'Code': code, 'Message': f'Injected {code}'}}, operation)
+        return latency
+
+    def _answer(self, prompt, family):
+        """
+        Returns the answer to a prompt, with MISTAKE_RATES of the family's rows answered wrongly.
+        """
+        rate = self.mistake_rates.get(family, 0.0)
+
+        def mistake():
+            with self._lock:
+                wrong = self._random.random() < rate
+                self.mistakes += wrong
+            return wrong
+
+        output = answer(prompt, mistake)
+        if family == 'deepseek':
+            output = '<think>Reading the row.</think>\n\n' + output
+        return output
+
+    def _usage(self, prompt, prefix, output):
+        """
+        Returns the input, cache read and cache write tokens of a prompt and the output tokens.
+        """
+        cache_read = cache_write = 0
+        input_tokens = count_tokens(prompt)
+        if prefix is not None:
+            with self._lock:
+                seen = prefix in self._cached_prefixes
+                self._cached_prefixes.add(prefix)
+            if seen:
+                cache_read = count_tokens(prefix)
+            else:
+                cache_write = count_tokens(prefix)
+            input_tokens -= cache_read + cache_write
+        return input_tokens, cache_read, cache_write, count_tokens(output)
+
+    def invoke_model(self, modelId, body, **kwargs):
+        request = json.loads(body)
+        family = model_family(request)
+        prompt, prefix = prompt_text(request)
+        latency = self._draw(family, 'InvokeModel')
+        self.sleep(latency)
+
+        output = self._answer(prompt, family)
+        output, truncated = cut_off(output, request)
+        input_tokens, cache_read, cache_write, output_tokens = self._usage(prompt, prefix, output)
+        if family == 'claude':
+            response = {
+                'id': f'msg_bdrk_{self.calls}', 'type': 'message', 'role': 'assistant', 'model': modelId,
+                'content': [{'type': 'text', 'text': output}],
+                'stop_reason': 'max_tokens' if truncated else 'end_turn', 'stop_sequence': None,
+                'usage': {'input_tokens': input_tokens, 'output_tokens': output_tokens,
+                          'cache_read_input_tokens': cache_read, 'cache_creation_input_tokens': cache_write}
+            }
+        elif family == 'llama':
+            response = {'generation': output, 'prompt_token_count': input_tokens,
+                        'generation_token_count': output_tokens, 'stop_reason': 'length' if truncated else 'stop'}
+        else:
+            response = {'choices': [{'text': output, 'stop_reason': 'length' if truncated else 'stop'}]}
+
+        headers = {
+            'x-amzn-bedrock-input-token-count': str(input_tokens),
+            'x-amzn-bedrock-output-token-count': str(output_tokens),
+            'x-amzn-bedrock-invocation-latency': str(int(latency * 1000))
+        }
+        return {
+            'ResponseMetadata': {'HTTPStatusCode': 200, 'HTTPHeaders': headers, 'RetryAttempts': 0},
+            'contentType': 'application/json',
+            'body': _Body(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        }
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        request = json.loads(body)
+        family = model_family(request)
+        prompt, prefix = prompt_text(request)
+        latency = self._draw(family, 'InvokeModelWithResponseStream')
+
+        output = self._answer(prompt, family)
+        output, truncated = cut_off(output, request)
+        stop_reason = ('max_tokens' if family == 'claude' else 'length') if truncated else None
+        input_tokens, cache_read, cache_write, output_tokens = self._usage(prompt, prefix, output)
+        metrics = {INVOCATION_METRICS: {'inputTokenCount': input_tokens, 'outputTokenCount': output_tokens,
+                                        'invocationLatency': int(latency * 1000),
+                                        'firstByteLatency': int(latency * FIRST_CHUNK_SHARE * 1000)}}
+        pieces = [output[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(output), STREAM_CHUNK_CHARS)] or ['']
+
+        if family == 'claude':
+            events = [{'type': 'message_start',
+                       'message': {'role': 'assistant', 'model': modelId,
+                                   'usage': {'input_tokens': input_tokens, 'output_tokens': 1,
+                                             'cache_read_input_tokens': cache_read,
+                                             'cache_creation_input_tokens': cache_write}}},
+                      {'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}}]
+            events += [{'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': piece}}
+                       for piece in pieces]
+            events += [{'type': 'content_block_stop', 'index': 0},
+                       {'type': 'message_delta', 'delta': {'stop_reason': stop_reason or 'end_turn'},
+                        'usage': {'output_tokens': output_tokens}},
+                       dict({'type': 'message_stop'}, **metrics)]
+        elif family == 'llama':
+            events = [{'generation': piece, 'prompt_token_count': input_tokens if index == 0 else None,
+                       'generation_token_count': index + 1, 'stop_reason': None}
+                      for index, piece in enumerate(pieces)]
+            events.append(dict({'generation': '', 'prompt_token_count': None,
+                                'generation_token_count': output_tokens, 'stop_reason': stop_reason or 'stop'},
+                                **metrics))
+        else:
+            events = [{'choices': [{'text': piece, 'stop_reason': None}]} for piece in pieces]
+            events.append(dict({'choices': [{'text': '', 'stop_reason': stop_reason or 'stop'}]}, **metrics))
+
+        first_delay = latency * FIRST_CHUNK_SHARE
+        chunk_delay = latency * (1 - FIRST_CHUNK_SHARE) / max(len(events) - 1, 1)
+        return {
+            'ResponseMetadata': {'HTTPStatusCode': 200, 'RetryAttempts': 0},
+            'contentType': 'application/json',
+            'body': _Stream(events, first_delay, chunk_delay, self.sleep)
+        }
+
+
+@contextlib.contextmanager
+def fake_bedrock(client=None):
+    """
+    Makes get_bedrock_client() return client (a new FakeBedrockRuntime by default)
+    inside the with block.
+    """
+    client = client or FakeBedrockRuntime()
+    originals = (credentials.get_bedrock_client, llms.adapters.get_bedrock_client)
+
+    def get_fake_client(*args, **kwargs):
+        return client
+
+    credentials.get_bedrock_client = llms.adapters.get_bedrock_client = get_fake_client
+    try:
+        yield client
+    finally:
+        credentials.get_bedrock_client, llms.adapters.get_bedrock_client = originals
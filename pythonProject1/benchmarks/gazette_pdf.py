@@ -0,0 +1,215 @@
+"""
+Generator of synthetic gazette PDFs in the table layouts of test_new_parser.COLUMN_HEADERS.
+
+Each PDF starts with a Greek intro (decision title, legal basis, decision text) and
+continues with one ruled table that runs over as many landscape pages as needed,
+repeating the header row on every page (or, with --no-repeat-header, only on the first).
+Long values wrap inside their cell and some values contain explicit line breaks, so
+the Markdown has multi-line cells with <br>.
+
+The parser chooses the layout by file name, so the files are written as
+<out-dir>/<name>.pdf with the names of COLUMN_HEADERS. Run from pythonProject1/:
+
+    python -m benchmarks.gazette_pdf --rows 1000 --out-dir /tmp/gazettes/data
+"""
+import argparse
+import functools
+import os
+import random
+
+import pymupdf
+
+from benchmarks.prompt_tokens import sample_value
+from test_new_parser import COLUMN_HEADERS
+
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595
+MARGIN = 24
+FONT_SIZE = 6
+LINE_HEIGHT = 7.5
+CELL_PADDING = 4
+
+INTRO = [
+    "ΕΛΛΗΝΙΚΗ ΔΗΜΟΚΡΑΤΙΑ",
+    "ΥΠΟΥΡΓΕΙΟ ΠΑΙΔΕΙΑΣ, ΘΡΗΣΚΕΥΜΑΤΩΝ ΚΑΙ ΑΘΛΗΤΙΣΜΟΥ",
+    "ΑΠΟΦΑΣΗ",
+    "Θέμα: {title} εκπαιδευτικών για το διδακτικό έτος 2024-2025.",
+    "Έχοντας υπόψη: 1. Τις διατάξεις του ν. 4823/2021 (Α΄ 136) «Αναβάθμιση του σχολείου, ενδυνάμωση των "
+    "εκπαιδευτικών και άλλες διατάξεις». 2. Τις διατάξεις του π.δ. 18/2018 (Α΄ 31) «Οργανισμός Υπουργείου "
+    "Παιδείας, Έρευνας και Θρησκευμάτων». 3. Την ανάγκη κάλυψης λειτουργικών κενών των σχολικών μονάδων.",
+    "Αποφασίζουμε",
+    "Τον/την {title_lower} των παρακάτω εκπαιδευτικών, σύμφωνα με τον πίνακα που ακολουθεί:"
+]
+
+# Decision title of each layout for the intro text.
+TITLES = {
+    "data/diorismos_monimwn.pdf": "Διορισμός μονίμων",
+    "data/proslipsi_anaplhrwtwn.pdf": "Πρόσληψη προσωρινών αναπληρωτών",
+    "data/anaplhrwtes_eep_ebp.pdf": "Πρόσληψη αναπληρωτών ΕΕΠ και ΕΒΠ",
+    "data/monimos_eep_ebp.pdf": "Διορισμός μονίμων ΕΕΠ και ΕΒΠ",
+    "data/topothethisi_monimou.pdf": "Οριστική τοποθέτηση μονίμων",
+    "data/tpothetisi_anaplhrwtwn.pdf": "Τοποθέτηση αναπληρωτών",
+    "data/topothetisi_monimou_ksanthis.pdf": "Τοποθέτηση μονίμων Ξάνθης",
+    "data/diathesi.pdf": "Διάθεση"
+}
+
+_font = None
+
+
+def get_font():
+    global _font
+    if _font is None:
+        # The CJK fallback font of PyMuPDF also covers Greek
+        _font = pymupdf.Font("cjk")
+    return _font
+
+
+@functools.lru_cache(maxsize=65536)
+def wrap(text, width):
+    """
+    Splits text into lines no wider than width (explicit '\\n' breaks are kept).
+    """
+    font = get_font()
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if line and font.text_length(candidate, fontsize=FONT_SIZE) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return tuple(lines)
+
+
+def column_edges(columns):
+    """
+    Returns the x positions of the column borders.
+
+    Every column is at least as wide as its longest word, so no text crosses a
+    border; the remaining width is shared in proportion to the typical text length.
+    """
+    font = get_font()
+    rng = random.Random(0)
+    samples = [[column] + [sample_value(column, 1000, rng).replace("<br>", " ") for _ in range(20)]
+               for column in columns]
+
+    def text_width(text):
+        return font.text_length(text, fontsize=FONT_SIZE)
+
+    minimum = [max(text_width(word) for text in texts for word in text.split()) + 2 * CELL_PADDING + 1
+               for texts in samples]
+    typical = [max(text_width(text) for text in texts[1:]) + 1 for texts in samples]
+    spare = max(PAGE_WIDTH - 2 * MARGIN - sum(minimum), 0)
+    edges = [MARGIN]
+    for column_minimum, column_typical in zip(minimum, typical):
+        edges.append(edges[-1] + column_minimum + spare * column_typical / sum(typical))
+    return edges
+
+
+def row_values(columns, index, rng):
+    """
+    Returns the cell texts of one row; '<br>' in the sample values becomes a line break.
+    """
+    return [sample_value(column, index, rng).replace("<br>", "\n") for column in columns]
+
+
+def make_gazette_pdf(path, layout, rows, seed=0, repeat_header=True):
+    """
+    Writes a synthetic gazette PDF with rows table rows in the given layout.
+
+    Args:
+        path (str): The PDF file to write.
+        layout (str): A key of COLUMN_HEADERS, e.g. 'data/diathesi.pdf'.
+        rows (int): Number of table rows.
+        seed (int): Seed of the random cell values.
+        repeat_header (bool): Repeat the header row at the top of every page.
+
+    Returns:
+        int: The number of pages.
+    """
+    columns = COLUMN_HEADERS[layout]
+    edges = column_edges(columns)
+    font = get_font()
+    rng = random.Random(seed)
+
+    doc = pymupdf.open()
+    page = writer = shape = None
+    y = PAGE_HEIGHT
+
+    def finish_page():
+        if page is not None:
+            shape.finish(color=(0, 0, 0), width=0.4)
+            shape.commit()
+            writer.write_text(page)
+
+    def draw_row(cells):
+        nonlocal y
+        wrapped = [wrap(cell, edges[i + 1] - edges[i] - 2 * CELL_PADDING) for i, cell in enumerate(cells)]
+        height = max(len(lines) for lines in wrapped) * LINE_HEIGHT + 2 * CELL_PADDING
+        for i, lines in enumerate(wrapped):
+            shape.draw_rect(pymupdf.Rect(edges[i], y, edges[i + 1], y + height))
+            for number, line in enumerate(lines):
+                if line:
+                    writer.append((edges[i] + CELL_PADDING, y + CELL_PADDING + (number + 1) * LINE_HEIGHT - 1.5),
+                                  line, font=font, fontsize=FONT_SIZE)
+        y += height
+        return height
+
+    def new_page():
+        nonlocal page, writer, shape, y
+        finish_page()
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        writer = pymupdf.TextWriter(page.rect)
+        shape = page.new_shape()
+        y = MARGIN
+
+    new_page()
+    title = TITLES.get(layout, "Απόφαση")
+    for paragraph in INTRO:
+        text = paragraph.format(title=title, title_lower=title.lower())
+        for line in wrap(text, PAGE_WIDTH - 2 * MARGIN):
+            writer.append((MARGIN, y + LINE_HEIGHT), line, font=font, fontsize=FONT_SIZE + 2)
+            y += LINE_HEIGHT + 3
+        y += 4
+    y += 6
+    draw_row(columns)
+
+    for index in range(1, rows + 1):
+        cells = row_values(columns, index, rng)
+        height = max(len(wrap(cell, edges[i + 1] - edges[i] - 2 * CELL_PADDING)) for i, cell in enumerate(cells))
+        if y + height * LINE_HEIGHT + 2 * CELL_PADDING > PAGE_HEIGHT - MARGIN:
+            new_page()
+            if repeat_header:
+                draw_row(columns)
+        draw_row(cells)
+
+    finish_page()
+    pages = doc.page_count
+    doc.subset_fonts()
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--layouts", nargs="+", choices=list(COLUMN_HEADERS), default=list(COLUMN_HEADERS))
+    parser.add_argument("--rows", type=int, default=1000, help="Table rows per PDF (default: %(default)s)")
+    parser.add_argument("--out-dir", default="data", help="Directory of the PDFs (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-repeat-header", action="store_true",
+                        help="Draw the header row only on the first page of the table")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for layout in args.layouts:
+        path = os.path.join(args.out_dir, os.path.basename(layout))
+        pages = make_gazette_pdf(path, layout, args.rows, args.seed, not args.no_repeat_header)
+        print(f"{path}: {args.rows} rows, {pages} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Differential check and benchmark of the Greek text cleaner.
+
+Compares _clean_greek_text() and two single-pass cleaners with the original chain of
+str.replace() passes, on random strings built from the corrected characters and on
+large synthetic gazette text with a given share of mis-mapped words. All cleaners
+must give byte-for-byte the same output; their times are printed side by side.
+
+Run from pythonProject1/:
+
+    python -m benchmarks.greek_cleaner --size-mb 10 --error-rates 0.05 0.2 0.5
+"""
+import argparse
+import random
+import re
+import time
+
+from test_new_parser import CORRECTION_MAP, _clean_greek_text
+
+
+def reference_clean(text):
+    """
+    The original cleaner: one str.replace() pass per correction, then the final-sigma regexes.
+    """
+    for wrong, right in CORRECTION_MAP.items():
+        text = text.replace(wrong, right)
+
+    text = re.sub(r'ς(?!\b)', 'σ', text)
+
+    text = re.sub(r'σ\b', 'ς', text)
+
+    return text
+
+
+def _clean_word(word):
+    """
+    Cleans one maximal run of word characters (and '΢', which the corrections turn into
+    a letter). No correction can match across other characters, and after the
+    corrections only the last character of the run can end a word.
+    """
+    for wrong, right in CORRECTION_MAP.items():
+        if wrong in word:
+            word = word.replace(wrong, right)
+
+    if word[-1:] in ('σ', 'ς'):
+        return word[:-1].replace('ς', 'σ') + 'ς'
+    return word.replace('ς', 'σ')
+
+
+_TRIGGERED_WORD = re.compile(
+    r'(?<![\w΢])[\w΢]*?(?:' + '|'.join(re.escape(wrong) for wrong in CORRECTION_MAP) + r'|ς(?=\w)|σ(?!\w))[\w΢]*'
+)
+
+
+_single_pass_cache = {}
+
+
+def single_pass_clean(text):
+    """
+    One combined regex pass that only matches words containing a correction or a
+    misplaced sigma and cleans them in a callback (memoized per word).
+    """
+    def clean(match):
+        word = match.group()
+        cleaned = _single_pass_cache.get(word)
+        if cleaned is None:
+            cleaned = _single_pass_cache[word] = _clean_word(word)
+        return cleaned
+
+    return _TRIGGERED_WORD.sub(clean, text)
+
+
+class _WordCache(dict):
+    def __missing__(self, word):
+        cleaned = self[word] = _clean_word(word) if word else word
+        return cleaned
+
+
+_WORD_SPLIT = re.compile(r'([\w΢]+)')
+_token_cache = _WordCache()
+
+
+def token_clean(text):
+    """
+    Splits the text into words and separators in one pass and maps every token
+    through a dict, so each distinct word is cleaned only once.
+    """
+    return ''.join(map(_token_cache.__getitem__, _WORD_SPLIT.split(text)))
+
+
+CLEANERS = [
+    ("chained replace (current)", _clean_greek_text),
+    ("single regex + callback", single_pass_clean),
+    ("split + word cache", token_clean)
+]
+
+# Corrected characters plus word and non-word characters around them
+_ALPHABET = sorted(set(''.join(CORRECTION_MAP) + ''.join(CORRECTION_MAP.values()) + 'σςκλA1_ |\n-.<>'))
+
+_CORRECT_WORDS = [
+    'και', 'του', 'της', 'εκπαιδευτικών', 'διορισμός', 'σύμφωνα', 'με', 'την', 'παρ.', 'ν.', '4823/2021',
+    '|', 'ΠΕ70', '12.50', '<br>', 'Περιφερειακή', 'Διεύθυνση', 'Εκπαίδευσης', '---', 'κλάδος'
+]
+_MISMAPPED_WORDS = [
+    'ΠΑΠΑΔΟΠΟΤΛΟ΢', 'ΓΕΩΡΓΙΟ΢', 'ΚΩΝ΢ΣΑΝΣΙΝΟ΢', 'ΕΤΑΓΓΕΛΟ΢', 'ΣΣΟΙΧΕΙΑ', 'ΛΤΓΕΡΟΣ', 'ΣΠΤΡΙΔΩΝ', 'ΘΤΜΙΟΣ',
+    'αριιμός', 'μζσα', 'ζγγραφή', 'ζξετάσεις', 'βαιμός', 'Τπουργείο', 'Σσακίρης', 'ΕΥΗ', 'χφεται', 'ιήικά',
+    'διορισμοσ', 'ςε'
+]
+
+
+def random_case(rng, length):
+    return ''.join(rng.choice(_ALPHABET) for _ in range(length))
+
+
+def synthetic_text(rng, size, error_rate):
+    """
+    Returns about size characters of table-like text in which error_rate of the
+    words are mis-mapped.
+    """
+    words = []
+    total = 0
+    while total < size:
+        word = rng.choice(_MISMAPPED_WORDS if rng.random() < error_rate else _CORRECT_WORDS)
+        words.append(word + rng.choice(' ' * 8 + '\n|'))
+        total += len(word) + 1
+    return ''.join(words)
+
+
+def timed(function, text):
+    started = time.perf_counter()
+    result = function(text)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=10, help="Size of the synthetic text (default: %(default)s)")
+    parser.add_argument("--error-rates", nargs="+", type=float, default=[0.05, 0.2, 0.5],
+                        help="Shares of mis-mapped words in the synthetic text (default: %(default)s)")
+    parser.add_argument("--cases", type=int, default=20000, help="Random strings to compare (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    for case in range(args.cases):
+        text = random_case(rng, rng.randint(0, 40))
+        expected = reference_clean(text)
+        for name, cleaner in CLEANERS:
+            if cleaner(text) != expected:
+                raise SystemExit(f"{name}: mismatch on random case {case}: {text!r}")
+    print(f"{args.cases} random strings: all cleaners identical to the original")
+
+    print(f"\n{'Error rate':>10}  {'Cleaner':<28}{'Seconds':>9}{'vs original':>13}")
+    for error_rate in args.error_rates:
+        text = synthetic_text(rng, int(args.size_mb * 1024 * 1024), error_rate)
+        expected, reference_time = timed(reference_clean, text)
+        print(f"{error_rate:>10.2f}  {'original':<28}{reference_time:>9.3f}{1:>13.2f}")
+
+        for name, cleaner in CLEANERS:
+            cleaned, cleaner_time = timed(cleaner, text)
+            if cleaned != expected:
+                raise SystemExit(f"{name}: mismatch on the synthetic text (error rate {error_rate})")
+            print(f"{'':>10}  {name:<28}{cleaner_time:>9.3f}{reference_time / cleaner_time:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Offline benchmark of the model stage against the fake Bedrock runtime.
+
+Runs every selected model over synthetic table rows through main.run_model() (row
+engine, batching, streaming, rate limiter, response parsing and the JSONL sink) with
+a FakeBedrockRuntime in place of bedrock-runtime, for each combination of concurrency,
+batch size, streaming, rule-based prefill and request hedging. Prints rows/s, the
+p50/p95/p99 call latency, retries, hedged calls, tokens per row and the peak memory
+allocated by Python during the run, and can write the results as JSON. With --cascade the
+rows also go through main.run_cascade(), and the rows, latency and cost of every tier are
+printed.
+No network or AWS credentials are needed.
+
+Run from pythonProject1/:
+
+    python -m benchmarks.model_stage --models llama claude4 --concurrency 1 4 16 --rows 200
+    python -m benchmarks.model_stage --stream both --batch-sizes 1 10 --throttle-rate 0.05 --json bench.json
+    python -m benchmarks.model_stage --models llama --concurrency 4 --prefill both
+    python -m benchmarks.model_stage --models claude4 --concurrency 8 --slow-rate 0.05 --hedge both
+    python -m benchmarks.model_stage --models claude4 --concurrency 8 --prefill on --cascade llama claude4
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fake_bedrock import FakeBedrockRuntime, fake_bedrock
+from benchmarks.prompt_tokens import synthetic_rows
+from llms.accounting import UsageLedger
+from llms.generation_profiles import GenerationProfiles, set_generation_profiles
+from llms.hedging import HedgePolicy, HedgeTarget, hedge_targets, set_hedge_policy
+from llms.rate_limiter import BASE_DELAY, RateLimiter, set_rate_limiter
+from llms.registry import available_models, get_adapter
+from main import run_cascade, run_model
+from test_new_parser import project_rows
+
+LAYOUT = "data/diorismos_monimwn.pdf"
+FIRST_PARAGRAPH = ("ΕΦΗΜΕΡΙΣ ΤΗΣ ΚΥΒΕΡΝΗΣΕΩΣ ΤΗΣ ΕΛΛΗΝΙΚΗΣ ΔΗΜΟΚΡΑΤΙΑΣ 12 Σεπτεμβρίου 2024\n"
+                   "ΥΠΟΥΡΓΕΙΟ ΠΑΙΔΕΙΑΣ, ΘΡΗΣΚΕΥΜΑΤΩΝ ΚΑΙ ΑΘΛΗΤΙΣΜΟΥ\n"
+                   "ΑΠΟΦΑΣΗ Διορισμός μονίμων εκπαιδευτικών Πρωτοβάθμιας Εκπαίδευσης")
+
+
+def run_scenario(model, rows, concurrency, batch_size, stream, client, output_dir, prefill=False,
+                 learn_budgets=True, hedge=False):
+    """
+    Runs one model over the rows and returns the measurements of the run.
+    """
+    # A new policy per run, so the hedge delay is learned from this run's latencies. Models
+    # without a sibling hedge to the same model in another region, which the fake answers too.
+    model_id = get_adapter(model).model_id
+    policy = HedgePolicy(model, hedge_targets(model) or [HedgeTarget(model, model_id, 'us-west-2')])
+    set_hedge_policy(model, policy)
+    # Limiters without quotas, so only the concurrency and the injected throttling shape the run.
+    # The hedged copies are scheduled by the limiter of their target model.
+    for name in {model} | {target.model for target in policy.targets}:
+        set_rate_limiter(name, RateLimiter(initial_concurrency=concurrency, max_concurrency=concurrency,
+                                           base_delay=BASE_DELAY * client.time_scale))
+    ledger = UsageLedger(model, model_id)
+    calls_before, throttled_before, errors_before = client.calls, client.throttled, client.errors
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    # The row engine prints a progress line per row
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        run_model(model, FIRST_PARAGRAPH, rows, output_dir=output_dir, ledger=ledger, document=LAYOUT,
+                  prefill=prefill, learn_budgets=learn_budgets, hedge=hedge, max_workers=concurrency,
+                  batch_size=batch_size, cache_mode='bypass', stream=stream)
+    wall_time = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    usage = ledger.summary()
+    return {
+        "model": model,
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "stream": stream,
+        "prefill": prefill,
+        "hedge": hedge,
+        "rows": usage["rows"],
+        "wall_time": round(wall_time, 3),
+        "rows_per_second": round(usage["rows"] / wall_time, 3) if wall_time > 0 else None,
+        "latency": usage["latency"],
+        "calls": client.calls - calls_before,
+        "throttled": client.throttled - throttled_before,
+        "errors": client.errors - errors_before,
+        "retries": usage["retries"],
+        "hedged_calls": usage["hedged_calls"],
+        "hedge_wins": usage["hedge_wins"],
+        "hedging": policy.summary() if hedge else None,
+        "tokens_per_row": usage["tokens_per_row"],
+        "peak_memory_mb": round(peak / 1024 / 1024, 2)
+    }
+
+
+def run_cascade_scenario(models, rows, concurrency, batch_size, stream, client, output_dir, prefill=False,
+                          learn_budgets=True):
+    """
+    Runs the rows through a model cascade and returns its entry of the run report.
+    """
+    for model in models:
+        set_rate_limiter(model, RateLimiter(initial_concurrency=concurrency, max_concurrency=concurrency,
+                                            base_delay=BASE_DELAY * client.time_scale))
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        entry = run_cascade(models, FIRST_PARAGRAPH, rows, output_dir=output_dir, document=LAYOUT, prefill=prefill,
+                            learn_budgets=learn_budgets, max_workers=concurrency, batch_size=batch_size,
+                            cache_mode='bypass', stream=stream)
+    return dict(entry, concurrency=concurrency, batch_size=batch_size, stream=stream, prefill=prefill)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", nargs="+", choices=available_models(), default=available_models())
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1])
+    parser.add_argument("--stream", choices=['off', 'on', 'both'], default='off')
+    parser.add_argument("--prefill", choices=['off', 'on', 'both'], default='off',
+                        help="Fill the fields of llms/prefill.py without the model")
+    parser.add_argument("--fixed-max-tokens", action="store_true",
+                        help="Request each model's maximum output tokens instead of the learned budget")
+    parser.add_argument("--hedge", choices=['off', 'on', 'both'], default='off',
+                        help="Send calls slower than the p95 also to an alternate target (see llms/hedging.py)")
+    parser.add_argument("--cascade", nargs="+", metavar="MODEL", choices=available_models(),
+                        help="Also run the rows through this model cascade, cheapest model first")
+    parser.add_argument("--rows", type=int, default=100, help="Rows per run (default: %(default)s)")
+    parser.add_argument("--time-scale", type=float, default=0.02,
+                        help="Multiplies the simulated model latencies (default: %(default)s)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of throttled calls")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of calls failing with a retried ServiceUnavailableException")
+    parser.add_argument("--slow-rate", type=float, default=0.0,
+                        help="Share of calls that are --slow-factor times slower than usual")
+    parser.add_argument("--slow-factor", type=float, default=10.0, help="(default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    rows = project_rows(synthetic_rows(LAYOUT, args.rows, random.Random(args.seed)), LAYOUT)
+    client = FakeBedrockRuntime(time_scale=args.time_scale, throttle_rate=args.throttle_rate,
+                                error_rate=args.error_rate, slow_rate=args.slow_rate, slow_factor=args.slow_factor,
+                                seed=args.seed)
+    streams = {'off': [False], 'on': [True], 'both': [False, True]}[args.stream]
+    prefills = {'off': [False], 'on': [True], 'both': [False, True]}[args.prefill]
+    hedges = {'off': [False], 'on': [True], 'both': [False, True]}[args.hedge]
+
+    print(f"{'Model':<11}{'Stream':>7}{'Prefill':>8}{'Hedge':>6}{'Batch':>6}{'Conc.':>6}{'Rows/s':>9}{'p50 (s)':>9}"
+          f"{'p95 (s)':>9}{'p99 (s)':>9}{'Calls':>7}{'Retries':>8}{'Hedged':>7}{'Won':>5}{'In/row':>8}{'Out/row':>8}"
+          f"{'Peak MB':>9}")
+    results = []
+    cascades = []
+    with fake_bedrock(client), tempfile.TemporaryDirectory() as output_dir:
+        # The budgets are learned from the fake's answers, so they stay out of cache/
+        set_generation_profiles(GenerationProfiles(os.path.join(output_dir, "generation_profiles.json")))
+        for model in args.models:
+            for stream, prefill, hedge in itertools.product(streams, prefills, hedges):
+                for batch_size in args.batch_sizes:
+                    for concurrency in args.concurrency:
+                        result = run_scenario(model, rows, concurrency, batch_size, stream, client, output_dir,
+                                              prefill, not args.fixed_max_tokens, hedge)
+                        results.append(result)
+                        latency = result["latency"]
+                        per_row = result["tokens_per_row"]
+                        print(f"{model:<11}{'on' if stream else 'off':>7}{'on' if prefill else 'off':>8}"
+                              f"{'on' if hedge else 'off':>6}{batch_size:>6}{concurrency:>6}"
+                              f"{result['rows_per_second'] or 0:>9.1f}{latency['p50'] or 0:>9.3f}"
+                              f"{latency['p95'] or 0:>9.3f}{latency['p99'] or 0:>9.3f}{result['calls']:>7}"
+                              f"{result['retries']:>8}{result['hedged_calls']:>7}{result['hedge_wins']:>5}"
+                              f"{per_row['input'] or 0:>8.0f}{per_row['output'] or 0:>8.0f}"
+                              f"{result['peak_memory_mb']:>9.2f}")
+
+        cascade_runs = itertools.product(streams, prefills, args.batch_sizes, args.concurrency) if args.cascade else []
+        for stream, prefill, batch_size, concurrency in cascade_runs:
+            cascade = run_cascade_scenario(args.cascade, rows, concurrency, batch_size, stream, client, output_dir,
+                                           prefill, not args.fixed_max_tokens)
+            cascades.append(cascade)
+            print(f"\nCascade {' > '.join(args.cascade)}, stream {'on' if stream else 'off'}, "
+                  f"prefill {'on' if prefill else 'off'}, batch {batch_size}, concurrency {concurrency}: "
+                  f"{cascade['rows_per_second'] or 0:.1f} rows/s, row p50/p95/p99 "
+                  + '/'.join(f"{value or 0:.3f}" for value in cascade['row_latency'].values())
+                  + f" s, ${cascade['estimated_cost_usd']:.4f}")
+            print(f"{'Tier':<6}{'Model':<11}{'Rows':>7}{'Accepted':>10}{'Escalated':>11}{'Unresolved':>12}"
+                  f"{'p50 (s)':>9}{'p95 (s)':>9}{'Cost ($)':>10}")
+            for model, tier in cascade["tiers"].items():
+                print(f"{tier['tier']:<6}{model:<11}{tier['rows']:>7}{tier['accepted']:>10}{tier['escalated']:>11}"
+                      f"{tier['unresolved']:>12}{tier['latency']['p50'] or 0:>9.3f}{tier['latency']['p95'] or 0:>9.3f}"
+                      f"{tier['estimated_cost_usd'] or 0:>10.4f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results, "cascades": cascades}, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark of the serial and the parallel page-range PDF-to-Markdown conversion.
+
+Generates table PDFs of increasing page count, converts each one serially and with
+1..N worker processes, checks that every parallel result is identical to the serial
+Markdown and prints the speedups.
+
+Run from pythonProject1/:
+
+    python -m benchmarks.pdf_conversion --pages 16 64 256 --workers 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pymupdf
+import pymupdf4llm
+
+from test_new_parser import convert_pdf_to_markdown
+
+COLUMN_EDGES = [36, 70, 210, 320, 430, 500, 560]
+ROW_HEIGHT = 18
+
+
+def make_table_pdf(path, pages):
+    """
+    Writes a PDF with one ruled table running over all pages.
+    """
+    font = pymupdf.Font("cjk")
+    doc = pymupdf.open()
+    row = 0
+    for page_number in range(pages):
+        page = doc.new_page()
+        page.insert_font(fontname="F0", fontbuffer=font.buffer)
+        y = 60
+        if page_number == 0:
+            page.insert_text((36, 45), "ΑΠΟΦΑΣΗ Διορισμός μονίμων εκπαιδευτικών", fontname="F0", fontsize=10)
+        while y + ROW_HEIGHT < 800:
+            row += 1
+            values = [str(row), f"ΠΑΠΑΔΟΠΟΥΛΟΣ {row}", "ΓΕΩΡΓΙΟΣ", "ΝΙΚΟΛΑΟΣ", "ΠΕ70", f"{row * 1.5:.2f}"]
+            for column, value in enumerate(values):
+                rect = pymupdf.Rect(COLUMN_EDGES[column], y, COLUMN_EDGES[column + 1], y + ROW_HEIGHT)
+                page.draw_rect(rect, color=(0, 0, 0), width=0.5)
+                page.insert_text((rect.x0 + 2, rect.y0 + 13), value, fontname="F0", fontsize=8)
+            y += ROW_HEIGHT
+    doc.save(path)
+    doc.close()
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", nargs="+", type=int, default=[16, 64, 128])
+    parser.add_argument("--workers", nargs="+", type=int, default=[2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'Pages':>6}{'Workers':>9}{'Seconds':>10}{'Speedup':>9}  Identical")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in args.pages:
+            path = os.path.join(directory, f"table_{pages}.pdf")
+            make_table_pdf(path, pages)
+
+            serial, serial_time = timed(pymupdf4llm.to_markdown, path)
+            print(f"{pages:>6}{'serial':>9}{serial_time:>10.2f}{1:>9.2f}")
+
+            for workers in sorted(set(args.workers)):
+                parallel, parallel_time = timed(convert_pdf_to_markdown, path, workers)
+                print(f"{pages:>6}{workers:>9}{parallel_time:>10.2f}{serial_time / parallel_time:>9.2f}  "
+                      f"{parallel == serial}")
+                if parallel != serial:
+                    raise SystemExit(f"Parallel Markdown differs from the serial Markdown ({pages} pages, "
+                                     f"{workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
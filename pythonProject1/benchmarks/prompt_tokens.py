@@ -0,0 +1,121 @@
+"""
+Prompt tokens of the table rows before and after column projection and compact serialization.
+
+For every layout of COLUMN_HEADERS (synthetic rows) or for the given PDFs (real rows),
+prints the estimated tokens of the row part of the prompt and of the whole prompt,
+as a dict repr of every column (the previous format) and as projected, compact rows,
+for single-row and batched requests. Tokens are estimated with batching.estimate_tokens(),
+the same estimate used for batch budgets and rate limiting.
+
+Run from pythonProject1/:
+
+    python -m benchmarks.prompt_tokens --batch-sizes 1 10
+    python -m benchmarks.prompt_tokens --pdf data/diathesi.pdf
+"""
+import argparse
+import random
+import unicodedata
+
+from llms.batching import BATCH_INSTRUCTIONS, estimate_tokens, format_batch, iter_batches
+from llms.prompts import compile_prompt
+from test_new_parser import COLUMN_HEADERS, extract_data_from_pdf, project_rows
+
+_SURNAMES = ["ΠΑΠΑΔΟΠΟΥΛΟΣ", "ΓΕΩΡΓΙΟΥ", "ΚΩΝΣΤΑΝΤΙΝΙΔΟΥ", "ΝΙΚΟΛΑΟΥ", "ΒΑΣΙΛΕΙΑΔΗΣ"]
+_NAMES = ["ΓΕΩΡΓΙΟΣ", "ΜΑΡΙΑ", "ΚΩΝΣΤΑΝΤΙΝΟΣ", "ΕΛΕΝΗ", "ΔΗΜΗΤΡΙΟΣ"]
+_SCHOOLS = ["1ο ΓΥΜΝΑΣΙΟ ΞΑΝΘΗΣ", "ΕΠΑΛ ΝΙΚΗΤΗΣ", "2ο ΓΕΝΙΚΟ ΛΥΚΕΙΟ<br>ΚΟΜΟΤΗΝΗΣ", "ΕΕΕΕΚ ΞΑΝΘΗΣ"]
+
+
+def sample_value(column, index, rng):
+    """
+    Returns a plausible cell value for a column of COLUMN_HEADERS.
+    """
+    # Upper case without accents, e.g. 'Σειρά' -> 'ΣΕΙΡΑ'
+    name = ''.join(c for c in unicodedata.normalize('NFD', column.upper()) if not unicodedata.combining(c))
+    if name in ("Α/Α", "A/A", "A/A ΡΟΗΣ") or "ΣΕΙΡΑ" in name:
+        return str(index)
+    if "ΜΟΡΙ" in name:
+        return f"{rng.uniform(10, 90):.2f}"
+    if "ΒΕΒ" in name or "ΜΗΤΡΩΟΥ" in name:
+        return str(rng.randint(100000, 999999))
+    if "ΕΠΩΝΥΜΟ" in name:
+        return rng.choice(_SURNAMES)
+    if "ΟΝΟΜΑ" in name or "ΠΑΤΡ" in name:
+        return rng.choice(_NAMES)
+    if "ΚΛΑΔ" in name or "ΕΙΔΙΚΟΤΗΤΑ" in name:
+        return "ΠΕ70 - ΔΑΣΚΑΛΟΙ"
+    if "ΣΧΟΛΕΙΟ" in name or "ΘΕΣΗ" in name:
+        return rng.choice(_SCHOOLS)
+    if "ΩΡΕΣ" in name:
+        return str(rng.randint(2, 12))
+    return rng.choice(["Α΄ ΑΝΑΤ. ΑΤΤΙΚΗΣ (Δ.Ε.)", "ΑΝΑΤ. ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ", "ΝΑΙ", ""])
+
+
+def synthetic_rows(pdf_path, count, rng):
+    return [{column: sample_value(column, index, rng) for column in COLUMN_HEADERS[pdf_path]}
+            for index in range(1, count + 1)]
+
+
+# The batch instructions without the line about the compact row format
+_PREVIOUS_BATCH_INSTRUCTIONS = "\n".join(line for line in BATCH_INSTRUCTIONS.split("\n") if '" | "' not in line)
+
+
+def previous_row_content(content):
+    """
+    The row slot as it was filled before: a dict repr per row, every row wrapped on its own lines.
+    """
+    if isinstance(content, list):
+        return "\n".join(f'<row id="{row_id}">\n{row}\n</row>' for row_id, row in content)
+    return str(content)
+
+
+def prompt_tokens(prompt, data, batch_size, previous):
+    """
+    Returns the estimated (row tokens, whole prompt tokens) of all requests for data.
+    """
+    row_tokens = 0
+    total_tokens = 0
+    for batch in iter_batches(data, batch_size):
+        if batch_size == 1:
+            content, instructions = batch[0][1], ""
+        else:
+            content, instructions = batch, BATCH_INSTRUCTIONS
+        if previous:
+            instructions = instructions and _PREVIOUS_BATCH_INSTRUCTIONS
+            slot = "\n<document_content>\n" + previous_row_content(content) + "\n</document_content>" + instructions
+        else:
+            slot = prompt.render_row(format_batch(content) if batch_size > 1 else content, instructions)
+        row_tokens += estimate_tokens(slot)
+        total_tokens += estimate_tokens(prompt.prefix + "\n" + slot)
+    return row_tokens, total_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdf", nargs="+", help="Measure the rows of these PDFs instead of synthetic rows")
+    parser.add_argument("--rows", type=int, default=200, help="Synthetic rows per layout (default: %(default)s)")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 10])
+    parser.add_argument("--prompt", default="hiring", help="Prompt template (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'Layout':<36}{'Batch':>6}{'Rows before':>13}{'Rows after':>12}{'Saved':>8}"
+          f"{'Prompt before':>15}{'Prompt after':>14}{'Saved':>8}")
+    for pdf_path in args.pdf or COLUMN_HEADERS:
+        if args.pdf:
+            first_paragraph, data = extract_data_from_pdf(pdf_path)
+        else:
+            first_paragraph, data = "ΑΠΟΦΑΣΗ", synthetic_rows(pdf_path, args.rows, rng)
+        prompt = compile_prompt(args.prompt, first_paragraph)
+        projected = project_rows(data, pdf_path)
+
+        for batch_size in args.batch_sizes:
+            rows_before, prompt_before = prompt_tokens(prompt, data, batch_size, previous=True)
+            rows_after, prompt_after = prompt_tokens(prompt, projected, batch_size, previous=False)
+            print(f"{pdf_path[-36:]:<36}{batch_size:>6}{rows_before:>13}{rows_after:>12}"
+                  f"{1 - rows_after / rows_before:>8.0%}{prompt_before:>15}{prompt_after:>14}"
+                  f"{1 - prompt_after / prompt_before:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import threading
+
 AWS_CREDENTIALS ={
     'aws_access_key_id':'',
     'aws_secret_access_key':'',
@@ -5,16 +7,75 @@ AWS_CREDENTIALS ={
     'region_name':'us-east-1'
 }
 
-def get_bedrock_client():
+# botocore settings for the bedrock-runtime client. The pool is sized for the
+# concurrent row engine in llms/engine.py. Throttling is handled by llms/rate_limiter.py,
+# so botocore only retries once and the limiter sees throttled requests quickly.
+CLIENT_CONFIG = {
+    'max_pool_connections': 50,
+    'connect_timeout': 10,
+    'read_timeout': 300,
+    'retry_mode': 'standard',
+    'max_attempts': 2
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_bedrock_client(region_name=None, **config_overrides):
     """
-    Returns a configured boto3 bedrock-runtime client using the stored credentials.
+    Returns a shared, configured boto3 bedrock-runtime client using the stored credentials.
+
+    Clients are cached per process and keyed by region, credentials and client
+    configuration, so every model module reuses the same warm connection pool.
+    boto3 clients are thread-safe and can be shared by the concurrent row engine.
+
+    Args:
+        region_name (str): Optional region, defaults to the one in AWS_CREDENTIALS.
+        **config_overrides: Overrides for CLIENT_CONFIG (max_pool_connections,
+            connect_timeout, read_timeout, retry_mode, max_attempts).
 
     Returns:
         boto3.client: Configured bedrock-runtime client
     """
+    credentials = get_credentials()
+    if region_name:
+        credentials['region_name'] = region_name
+
+    config = dict(CLIENT_CONFIG, **config_overrides)
+
+    key = (tuple(sorted(credentials.items())), tuple(sorted(config.items())))
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _create_bedrock_client(credentials, config)
+            _clients[key] = client
+
+    return client
+
+
+def _create_bedrock_client(credentials, config):
     import boto3
+    from botocore.config import Config
+
+    botocore_config = Config(
+        max_pool_connections=config['max_pool_connections'],
+        connect_timeout=config['connect_timeout'],
+        read_timeout=config['read_timeout'],
+        retries={'mode': config['retry_mode'], 'max_attempts': config['max_attempts']}
+    )
+
+    return boto3.client('bedrock-runtime', config=botocore_config, **credentials)
+
+
+def clear_bedrock_clients():
+    """
+    Drops all cached clients, e.g. after the credentials have been rotated.
+    """
+    with _clients_lock:
+        _clients.clear()
 
-    return boto3.client('bedrock-runtime', **AWS_CREDENTIALS)
 
 def get_credentials():
     """
@@ -23,4 +84,4 @@ def get_credentials():
     Returns:
         dict: AWS credentials
     """
-    return AWS_CREDENTIALS.copy()
\ No newline at end of file
+    return AWS_CREDENTIALS.copy()
@@ -0,0 +1,241 @@
+import json
+import os
+import threading
+import time
+
+# On-demand Bedrock prices in USD per million tokens, keyed by the model names of llms/registry.py.
+# Check them against the current Bedrock price list of the region; models without an entry get no cost.
+MODEL_PRICES = {
+    'claude3.7': {'input': 3.00, 'output': 15.00, 'cache_read': 0.30, 'cache_write': 3.75},
+    'claude3.5': {'input': 3.00, 'output': 15.00, 'cache_read': 0.30, 'cache_write': 3.75},
+    'claude4': {'input': 3.00, 'output': 15.00, 'cache_read': 0.30, 'cache_write': 3.75},
+    'llama': {'input': 0.72, 'output': 0.72},
+    'deepseek': {'input': 1.35, 'output': 5.40}
+}
+
+# Usage keys of the model responses summed per price of MODEL_PRICES.
+USAGE_KEYS = {
+    'input': 'input_tokens',
+    'output': 'output_tokens',
+    'cache_read': 'cache_read_input_tokens',
+    'cache_write': 'cache_creation_input_tokens'
+}
+
+# Latency percentiles in the report.
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, percent):
+    """
+    Returns the percentile of sorted values with linear interpolation, or None if there are none.
+    """
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class UsageLedger:
+    """
+    Collects the tokens, latency and retries of every model call of a run.
+
+    Use record() as the on_call callback of ModelAdapter.run() and record_row() in its
+    on_row callback. Calls answered from the response cache are counted but cost
+    nothing and are left out of the latency percentiles and the tokens per row.
+    Streams closed early carry estimated usage (see ModelAdapter.call_usage()) and are
+    counted in calls_with_estimated_usage. The tokens of calls won by a hedge target of
+    another model are also kept in hedge_tokens and billed at that model's prices.
+    Ledgers of several documents can be merged into one per model.
+    """
+
+    def __init__(self, model, model_id=None):
+        self.model = model
+        self.model_id = model_id
+        self.calls = 0
+        self.cached_calls = 0
+        self.calls_without_usage = 0
+        self.calls_with_estimated_usage = 0
+        self.retries = 0
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+        self.rows = 0
+        self.billed_rows = 0
+        self.tokens = {price: 0 for price in USAGE_KEYS}
+        self.hedge_tokens = {}
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def record(self, result):
+        """
+        Adds the CallResult of one model call.
+        """
+        with self._lock:
+            self.calls += 1
+            self.retries += result.retries
+            self.hedged_calls += result.hedged
+            self.hedge_wins += result.hedge_won
+            if result.cached:
+                self.cached_calls += 1
+                return
+            if result.latency is not None:
+                self.latencies.append(result.latency)
+            if not result.usage:
+                self.calls_without_usage += 1
+                return
+            if result.usage.get('estimated'):
+                self.calls_with_estimated_usage += 1
+            counts = [self.tokens]
+            if result.hedge_model is not None and result.hedge_model != self.model:
+                counts.append(self.hedge_tokens.setdefault(result.hedge_model, {price: 0 for price in USAGE_KEYS}))
+            for price, key in USAGE_KEYS.items():
+                for tokens in counts:
+                    tokens[price] += result.usage.get(key) or 0
+
+    def record_row(self, row_index, result):
+        """
+        Counts one finished row; rows answered from the response cache are not billed.
+        """
+        with self._lock:
+            self.rows += 1
+            if not result.cached:
+                self.billed_rows += 1
+
+    def merge(self, other):
+        """
+        Adds the calls and rows of another ledger of the same model.
+        """
+        with self._lock:
+            self.calls += other.calls
+            self.cached_calls += other.cached_calls
+            self.calls_without_usage += other.calls_without_usage
+            self.calls_with_estimated_usage += other.calls_with_estimated_usage
+            self.retries += other.retries
+            self.hedged_calls += other.hedged_calls
+            self.hedge_wins += other.hedge_wins
+            self.rows += other.rows
+            self.billed_rows += other.billed_rows
+            for price in self.tokens:
+                self.tokens[price] += other.tokens[price]
+            for model, tokens in other.hedge_tokens.items():
+                counts = self.hedge_tokens.setdefault(model, {price: 0 for price in USAGE_KEYS})
+                for price in counts:
+                    counts[price] += tokens[price]
+            self.latencies.extend(other.latencies)
+
+    def cost(self):
+        """
+        Returns the estimated cost in USD of the calls sent to Bedrock, or None if the
+        model, or a hedge target that won calls, has no entry in MODEL_PRICES.
+        """
+        prices = MODEL_PRICES.get(self.model)
+        if prices is None:
+            return None
+        tokens = dict(self.tokens)
+        cost = 0.0
+        for model, hedge_tokens in self.hedge_tokens.items():
+            hedge_prices = MODEL_PRICES.get(model)
+            if hedge_prices is None:
+                return None
+            for price, count in hedge_tokens.items():
+                tokens[price] -= count
+                cost += count * hedge_prices.get(price, 0)
+        return (cost + sum(tokens[price] * prices.get(price, 0) for price in tokens)) / 1000000
+
+    def summary(self):
+        """
+        Returns the report entry of the ledger as a dict.
+        """
+        latencies = sorted(self.latencies)
+        cost = self.cost()
+        return {
+            "model_id": self.model_id,
+            "rows": self.rows,
+            "billed_rows": self.billed_rows,
+            "calls": self.calls,
+            "cached_calls": self.cached_calls,
+            "calls_without_usage": self.calls_without_usage,
+            "calls_with_estimated_usage": self.calls_with_estimated_usage,
+            "retries": self.retries,
+            "hedged_calls": self.hedged_calls,
+            "hedge_wins": self.hedge_wins,
+            "tokens": dict(self.tokens),
+            "hedge_tokens": {model: dict(tokens) for model, tokens in self.hedge_tokens.items()},
+            "tokens_per_row": {price: round(tokens / self.billed_rows, 1) if self.billed_rows else None
+                               for price, tokens in self.tokens.items()},
+            "latency": dict(
+                {f"p{percent}": round(percentile(latencies, percent), 3) if latencies else None
+                 for percent in PERCENTILES},
+                mean=round(sum(latencies) / len(latencies), 3) if latencies else None,
+                max=round(latencies[-1], 3) if latencies else None
+            ),
+            "estimated_cost_usd": round(cost, 6) if cost is not None else None,
+            "estimated_cost_per_row_usd": round(cost / self.rows, 8) if cost is not None and self.rows else None
+        }
+
+
+def build_cost_report(ledgers, hedging=None):
+    """
+    Builds the cost report of a run.
+
+    Args:
+        ledgers (dict): {model: {document: UsageLedger}}.
+        hedging (dict): Optional HedgePolicy summaries per model (see llms/hedging.py). The
+            extra cost of the hedged calls that lost is added to the model's cost.
+
+    Returns:
+        dict: Per model the totals over all documents plus one entry per document.
+    """
+    models = {}
+    for model, documents in ledgers.items():
+        total = UsageLedger(model)
+        for ledger in documents.values():
+            total.model_id = total.model_id or ledger.model_id
+            total.merge(ledger)
+        models[model] = dict(total.summary(),
+                             documents={document: ledger.summary() for document, ledger in documents.items()})
+        if hedging and model in hedging:
+            models[model]["hedging"] = hedging[model]
+            extra_cost = hedging[model]["extra_cost_usd"]
+            if extra_cost and models[model]["estimated_cost_usd"] is not None:
+                models[model]["estimated_cost_usd"] = round(models[model]["estimated_cost_usd"] + extra_cost, 6)
+
+    costs = [entry["estimated_cost_usd"] for entry in models.values() if entry["estimated_cost_usd"] is not None]
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "prices_usd_per_million_tokens": {model: MODEL_PRICES[model] for model in models if model in MODEL_PRICES},
+        "estimated_cost_usd": round(sum(costs), 6),
+        "models": models
+    }
+
+
+def write_cost_report(path, ledgers, hedging=None):
+    """
+    Writes the cost report of a run as JSON, prints a summary per model and returns the report.
+    """
+    report = build_cost_report(ledgers, hedging)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'Model':<12}{'Calls':>7}{'Retries':>9}{'p50 (s)':>9}{'p95 (s)':>9}{'p99 (s)':>9}"
+          f"{'In/row':>9}{'Out/row':>9}{'Cost ($)':>11}")
+    for model, entry in report["models"].items():
+        latency = entry["latency"]
+        per_row = entry["tokens_per_row"]
+        print(f"{model:<12}{entry['calls']:>7}{entry['retries']:>9}"
+              + ''.join(f"{latency[f'p{percent}'] or 0:>9.2f}" for percent in PERCENTILES)
+              + f"{per_row['input'] or 0:>9.0f}{per_row['output'] or 0:>9.0f}"
+              + f"{entry['estimated_cost_usd'] or 0:>11.4f}")
+        if "hedging" in entry:
+            hedging_entry = entry["hedging"]
+            print(f"{'':<12}{hedging_entry['hedged_calls']} calls hedged after {hedging_entry['hedge_delay']} s, "
+                  f"{hedging_entry['hedge_wins']} won by the hedge, "
+                  f"extra cost ${hedging_entry['extra_cost_usd'] or 0:.4f}")
+    print(f"Estimated cost: ${report['estimated_cost_usd']:.4f}, report written to {path}")
+
+    return report
@@ -0,0 +1,526 @@
+import json
+import threading
+import time
+
+from botocore.exceptions import ClientError
+from credentials import get_bedrock_client
+from llms.batching import estimate_tokens, run_batched
+from llms.generation_profiles import MAX_TRUNCATION_RETRIES, TRUNCATION_GROWTH, get_generation_profiles
+from llms.hedging import get_hedge_policy
+from llms.invocation import (INVOCATION_METRICS, call_model, check_cache_mode, get_cached_response,
+                              invoke_model_stream, store_response)
+from llms.prefill import merge_response
+from llms.prompt_caching import PromptCacheStats, prompt_content
+from llms.prompts import compile_prompt
+from llms.rate_limiter import get_rate_limiter
+from llms.response_cache import BUDGET_KEYS
+from llms.results import CallResult
+from llms.streaming import STOPPED_EARLY, ThinkFilter, read_stream
+
+
+class ModelAdapter:
+    """
+    Base class of the model adapters in llms/.
+
+    An adapter only describes how the request body of its model is built and how
+    the text is read from the response. The row loop, batching, response caching
+    and error handling are shared in run().
+    """
+
+    # Registry name, e.g. 'claude3.7'
+    name = None
+    # Label printed when the model is done
+    display_name = None
+    # File name (without extension) of the output in outputs/
+    output_name = None
+    # Bedrock model or inference profile ID
+    model_id = None
+    # Key of the prompt template in llms/prompts.py
+    prompt_name = 'hiring'
+    # Whether a leading <think> … </think> section is dropped from streamed output
+    drops_think_section = False
+    # Output tokens reserved per request in the tokens-per-minute bucket until the real count is known
+    expected_output_tokens = 600
+    # Largest output token budget of a request
+    max_tokens = 4096
+    # Sampling temperature, until the generation profile says otherwise
+    temperature = 0.5
+    # Stop reasons of a response that was cut off at the output token budget
+    truncation_reasons = ('max_tokens', 'length')
+
+    def default_generation(self):
+        """
+        Returns the generation settings of a request without a generation profile.
+        """
+        return {"max_tokens": self.max_tokens, "temperature": self.temperature, "stop_sequences": []}
+
+    def build_request(self, prompt, content, instructions="", generation=None):
+        """
+        Returns the native request body (a dict) for one piece of document content.
+
+        Args:
+            prompt (CompiledPrompt): The prompt compiled for the current document.
+            content: The row (or batch of rows) to put in the row slot.
+            instructions (str): Extra instructions appended after the row slot.
+            generation (dict): max_tokens, temperature and stop_sequences of the request
+                (see llms/generation_profiles.py), or None for default_generation().
+        """
+        raise NotImplementedError
+
+    def stop_reason(self, model_response):
+        """
+        Returns why the model stopped generating, or None if the response does not say.
+        """
+        return model_response.get('stop_reason')
+
+    def truncated(self, model_response):
+        """
+        Returns True if the response was cut off at the output token budget.
+        """
+        return self.stop_reason(model_response) in self.truncation_reasons
+
+    def parse_response(self, model_response):
+        """
+        Returns the response text from the decoded model response.
+        """
+        raise NotImplementedError
+
+    def stream_text(self, chunk):
+        """
+        Returns the text delta carried by one chunk of a streamed response.
+        """
+        raise NotImplementedError
+
+    def streamed_response(self, text, chunks):
+        """
+        Returns a decoded response in the shape of invoke_model's for streamed output.
+
+        This lets parse_response() and the response cache handle streamed and
+        non-streamed calls the same way.
+        """
+        raise NotImplementedError
+
+    def start_run(self):
+        """
+        Called before the first request of a run.
+        """
+
+    def finish_run(self):
+        """
+        Called after the last request of a run.
+        """
+
+    def record_usage(self, usage):
+        """
+        Called with the usage of every call answered by Bedrock, once the usage is known.
+        Responses from the response cache, hedged calls that lost and streams closed
+        early are not passed.
+        """
+
+    def usage(self, model_response):
+        """
+        Returns the token counts of a decoded response as a dict with
+        'input_tokens' and 'output_tokens', or None if they are unknown.
+        """
+        metrics = model_response.get(INVOCATION_METRICS)
+        if not metrics:
+            return None
+        return {
+            'input_tokens': metrics.get('inputTokenCount'),
+            'output_tokens': metrics.get('outputTokenCount')
+        }
+
+    def known_usage(self, model_response):
+        """
+        Returns usage(), or None for a stream that was closed early: its counts are partial.
+        """
+        if model_response.get(STOPPED_EARLY):
+            return None
+        return self.usage(model_response)
+
+    def call_usage(self, model_response, request):
+        """
+        Returns the usage billed for a call. For a stream that was closed early, the
+        counts it did receive (Claude's input and cache tokens) are completed with
+        estimates from the request and the streamed text, and marked 'estimated'.
+        """
+        if not model_response.get(STOPPED_EARLY):
+            return self.usage(model_response)
+
+        usage = dict(self.usage(model_response) or {})
+        if not usage.get('input_tokens') and not usage.get('cache_read_input_tokens'):
+            usage['input_tokens'] = estimate_tokens(json.dumps(json.loads(request), ensure_ascii=False))
+        usage['output_tokens'] = estimate_tokens(self.parse_response(model_response))
+        usage['estimated'] = True
+        return usage
+
+    def total_tokens(self, model_response):
+        """
+        Returns the input plus output tokens of a decoded response, or None if unknown.
+        """
+        usage = self.known_usage(model_response)
+        if not usage:
+            return None
+        return (usage.get('input_tokens') or 0) + (usage.get('output_tokens') or 0)
+
+    def invoke(self, client, prompt, content, instructions="", cache_mode='use', stream=False, watch=None,
+               limiter=None, profile=None, hedge=None):
+        """
+        Calls the model for one piece of document content.
+
+        With stream=True the response-stream API is used and the text is passed to
+        watch as it arrives (see streaming.read_stream), so finished rows can be
+        handed on and the stream closed early. Either way the response is stored in
+        the response cache like a regular invoke_model response. Calls that are not
+        answered from the cache are scheduled through limiter (see llms/rate_limiter.py),
+        which retries throttled requests.
+
+        With a generation profile (see llms/generation_profiles.py) the output token
+        budget is learned from earlier calls, and a response cut off at the budget is
+        sent again with a larger budget, up to max_tokens.
+
+        With a hedge policy (see llms/hedging.py) a call that is slower than usual is
+        also sent to an alternate model or region, and the first response is used. The
+        response is cached under the primary's model ID and request, while the CallResult
+        names the model ID that answered.
+
+        Returns:
+            CallResult: The response text with the usage, latency and retries of the call.
+        """
+        rows = max(content.count('<row id="'), 1) if isinstance(content, str) else 1
+        generation = profile.settings(profile.max_tokens(rows)) if profile else self.default_generation()
+        started = time.perf_counter()
+        attempts = 0
+        usage = None
+        hedge_target = None
+        hedged = False
+
+        try:
+            for truncations in range(MAX_TRUNCATION_RETRIES + 1):
+                request = json.dumps(self.build_request(prompt, content, instructions, generation))
+                model_response = get_cached_response(self.model_id, request) if cache_mode == 'use' else None
+                # A cut-off response (cached before truncated ones were kept out) is sent again
+                cached = model_response is not None and not self.truncated(model_response)
+                if cached:
+                    break
+
+                def send_to(target_client, model_id, body, target_watch):
+                    if stream:
+                        return self.read_streamed_response(target_client, body, target_watch, model_id)
+                    # Invoke the model with the request
+                    return call_model(target_client, model_id, body)
+
+                def send():
+                    nonlocal attempts, hedge_target, hedged
+                    attempts += 1
+                    if hedge is None:
+                        return send_to(client, self.model_id, request, watch)
+
+                    # watch is only called by the primary call, and no more once the hedge has won
+                    watch_lock = threading.Lock()
+
+                    def primary(cancelled):
+                        def primary_watch(text):
+                            with watch_lock:
+                                return cancelled.is_set() or (watch is not None and watch(text))
+                        return send_to(client, self.model_id, request, primary_watch)
+
+                    def duplicate(target, cancelled):
+                        target_client = get_bedrock_client(target.region_name) if target.region_name else client
+                        target_request = limit_budget(request, target.max_tokens)
+
+                        def send_duplicate():
+                            return send_to(target_client, target.model_id, target_request,
+                                           lambda text: cancelled.is_set())
+
+                        # The copy counts against the quotas of the target model, not the primary's
+                        if limiter is None:
+                            return send_duplicate()
+                        return get_rate_limiter(target.model).call(
+                            send_duplicate, estimate_tokens(target_request) + reserved_tokens, self.total_tokens)
+
+                    model_response, hedge_target, call_hedged = hedge.call(
+                        primary, duplicate, lambda response: self.call_usage(response, request))
+                    hedged = hedged or call_hedged
+                    with watch_lock:
+                        return model_response
+
+                # Bedrock counts the output token budget against the tokens-per-minute quota
+                reserved_tokens = generation["max_tokens"] if profile else self.expected_output_tokens
+                if limiter is None:
+                    model_response = send()
+                else:
+                    model_response = limiter.call(send, estimate_tokens(request) + reserved_tokens, self.total_tokens)
+                usage = _add_usage(usage, self.call_usage(model_response, request))
+
+                known_usage = self.known_usage(model_response)
+                if known_usage:
+                    self.record_usage(known_usage)
+
+                truncated = self.truncated(model_response)
+                if profile is not None:
+                    profile.observe((known_usage or {}).get('output_tokens'), rows, truncated)
+                if truncated and generation["max_tokens"] < self.max_tokens and truncations < MAX_TRUNCATION_RETRIES:
+                    generation = dict(generation, max_tokens=min(generation["max_tokens"] * TRUNCATION_GROWTH,
+                                                                 self.max_tokens))
+                    print(f"Warning: The response of '{self.model_id}' was cut off, "
+                          f"sending it again with max_tokens {generation['max_tokens']}")
+                    continue
+
+                # The cache key leaves out the budget, so a cut-off response would be returned
+                # to every later run, whatever its budget. A response of the hedge answers the
+                # primary's request, so it is stored where the next run looks that request up.
+                if cache_mode != 'bypass' and not truncated:
+                    store_response(self.model_id, request, model_response)
+                break
+
+            response_text = self.parse_response(model_response)
+
+        except (ClientError, Exception) as e:
+            print(f"ERROR: Can't invoke '{self.model_id}'. Reason: {e}")
+            exit(1)
+
+        return CallResult(response_text, usage=self.known_usage(model_response) if cached else usage,
+                          latency=time.perf_counter() - started, cached=cached,
+                          model_id=hedge_target.model_id if hedge_target else self.model_id,
+                          retries=max(attempts - 1, 0), hedged=hedged, hedge_won=hedge_target is not None,
+                          hedge_model=hedge_target.model if hedge_target else None)
+
+    def read_streamed_response(self, client, request, watch=None, model_id=None):
+        """
+        Reads a response stream and returns it in the shape of an invoke_model response.
+        """
+        chunks = invoke_model_stream(client, model_id or self.model_id, request)
+        text_filter = ThinkFilter() if self.drops_think_section else None
+        text, seen_chunks, stopped_early = read_stream(chunks, self.stream_text, text_filter, watch)
+
+        model_response = self.streamed_response(text, seen_chunks)
+        if stopped_early:
+            model_response[STOPPED_EARLY] = True
+        for chunk in seen_chunks:
+            if INVOCATION_METRICS in chunk:
+                model_response[INVOCATION_METRICS] = chunk[INVOCATION_METRICS]
+        return model_response
+
+    def run(self, first_paragraph, data, max_workers=None, batch_size=1, max_batch_tokens=None, cache_mode='use',
+            stream=False, stop_early=True, on_row=None, rate_limit=True, progress_label=None, keep_results=True,
+            on_call=None, prefill=None, learn_budgets=True, hedge=False):
+        """
+        Runs the model over every row of data.
+
+        Args:
+            first_paragraph (str): The introductory text of the document.
+            data (iterable): The table rows, as a list or a row iterator (see
+                test_new_parser.stream_data_from_pdf()).
+            max_workers (int): Maximum number of concurrent requests.
+            batch_size (int): Maximum number of rows per request.
+            max_batch_tokens (int): Optional token budget for the rows of one request.
+            cache_mode (str): 'use', 'refresh' or 'bypass' for the response cache.
+            stream (bool): Use the response-stream API instead of invoke_model.
+            stop_early (bool): When streaming a single row, close the stream as soon as
+                every <Format> field has been returned.
+            on_row (callable): Optional function called as on_row(index, call_result)
+                as soon as the result of a row is final (see llms/result_sink.py).
+            rate_limit (bool): Schedule the calls through the model's shared RateLimiter.
+            progress_label (str): Optional prefix of the progress lines.
+            keep_results (bool): Collect and return the texts. Pass False when on_row
+                already stores the results.
+            on_call (callable): Optional function called with the CallResult of every model
+                call, including batched and re-sent calls (see llms/accounting.py).
+            prefill (Prefill): Fields filled by rules (see llms/prefill.py). They are left
+                out of the prompt and their lines are put in front of each row's response.
+                Rows that a column rule has no value for are sent after the others, with
+                the column fields in the prompt.
+            learn_budgets (bool): Size max_tokens from the model's generation profile instead
+                of always requesting max_tokens (see llms/generation_profiles.py).
+            hedge (bool): Send calls that are slower than usual also to the alternate targets
+                of the model's HedgePolicy (see llms/hedging.py), if it has any.
+
+        Returns:
+            list: The response text for each row, in input order, or None if keep_results is False.
+        """
+        # Create an Amazon Bedrock Runtime client.
+        client = get_bedrock_client()
+
+        # The prompt is compiled once per run, only the row slot is filled in per request
+        prompt = compile_prompt(self.prompt_name, first_paragraph, exclude=prefill.fields if prefill else ())
+
+        check_cache_mode(cache_mode)
+        limiter = get_rate_limiter(self.name) if rate_limit else None
+        profiles = get_generation_profiles() if learn_budgets else None
+        profile = profiles.get(self, prompt) if profiles else None
+        hedge_policy = get_hedge_policy(self.name) if hedge else None
+
+        def run_rows(rows, prompt, profile, row_callback):
+            def invoke_content(content, instructions="", watch=None):
+                if stream and watch is None and stop_early:
+                    watch = prompt.fields_filled
+                result = self.invoke(client, prompt, content, instructions, cache_mode=cache_mode, stream=stream,
+                                     watch=watch, limiter=limiter, profile=profile, hedge=hedge_policy)
+                if on_call is not None:
+                    on_call(result)
+                return result
+
+            return run_batched(rows, invoke_content, batch_size=batch_size, max_batch_tokens=max_batch_tokens,
+                               max_workers=max_workers, on_row=row_callback, label=progress_label,
+                               keep_results=keep_results)
+
+        self.start_run()
+        if prefill is None:
+            results = run_rows(data, prompt, profile, on_row)
+            texts = [result.text for result in results] if keep_results else None
+        else:
+            # The prefilled lines wait here until the row's response arrives. Rows that a column
+            # rule has no value for are run afterwards, with the column fields left to the model.
+            prefilled = {}
+            merged = {}
+            fallback_rows = []
+            rows = data
+
+            def model_rows(indexes):
+                for index, row in enumerate(rows):
+                    if prefill.complete(row):
+                        prefilled[index] = prefill.lines(row)
+                        indexes.append(index)
+                        yield prefill.model_row(row)
+                    else:
+                        fallback_rows.append((index, row))
+
+            def on_model_row(indexes):
+                def callback(position, result):
+                    index = indexes[position]
+                    text = merge_response(prefilled.pop(index), result.text)
+                    if keep_results:
+                        merged[index] = text
+                    if on_row is not None:
+                        on_row(index, result.for_row(text, result.batch_rows))
+                return callback
+
+            indexes = []
+            data = model_rows(indexes)
+            if isinstance(rows, list):
+                data = list(data)
+            run_rows(data, prompt, profile, on_model_row(indexes))
+
+            if fallback_rows:
+                print(f"{self.display_name}: {len(fallback_rows)} rows miss a value of the column rules, "
+                      f"running them with those fields in the prompt")
+                fallback_prompt = compile_prompt(self.prompt_name, first_paragraph, exclude=list(prefill.constants))
+                for index, _ in fallback_rows:
+                    prefilled[index] = prefill.constant_lines()
+                run_rows([row for _, row in fallback_rows], fallback_prompt,
+                         profiles.get(self, fallback_prompt) if profiles else None,
+                         on_model_row([index for index, _ in fallback_rows]))
+            texts = [merged[index] for index in range(len(merged))] if keep_results else None
+        self.finish_run()
+        if profile is not None:
+            profiles.save()
+            print(f"{self.display_name} output budget: {profile.summary()}")
+        if hedge_policy is not None:
+            summary = hedge_policy.summary()
+            print(f"{self.display_name} hedging: {summary['hedged_calls']} of {summary['calls']} calls hedged, "
+                  f"{summary['hedge_wins']} won by the hedge")
+
+        return texts
+
+
+class ClaudeAdapter(ModelAdapter):
+    """
+    Adapter for the Anthropic Claude models (Messages API on Bedrock).
+    """
+
+    max_tokens = 131072
+    temperature = 0.7
+    # Whether the prompt prefix is marked for Bedrock prompt caching
+    prompt_caching = True
+
+    def __init__(self, prompt_caching=None):
+        if prompt_caching is not None:
+            self.prompt_caching = prompt_caching
+        self.prompt_cache_stats = PromptCacheStats()
+
+    def build_request(self, prompt, content, instructions="", generation=None):
+        generation = generation or self.default_generation()
+        # The intro text and the field descriptions are the same for every row, so they form
+        # the prompt prefix that Bedrock can cache. Only the row data follows it.
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": generation["max_tokens"],
+            "top_k": 250,
+            "stop_sequences": generation["stop_sequences"],
+            "temperature": generation["temperature"],
+            "top_p": 0.999,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt_content(prompt.prefix, prompt.render_row(content, instructions),
+                                              self.prompt_caching)
+                }
+            ]
+        }
+
+    def parse_response(self, model_response):
+        return model_response['content'][0]['text']
+
+    def usage(self, model_response):
+        usage = dict(model_response.get('usage') or {})
+        if not usage:
+            return super().usage(model_response)
+        return usage
+
+    def stream_text(self, chunk):
+        if chunk.get('type') == 'content_block_delta':
+            return chunk['delta'].get('text', '')
+        return ''
+
+    def streamed_response(self, text, chunks):
+        usage = {}
+        model_response = {'content': [{'type': 'text', 'text': text}], 'usage': usage}
+        for chunk in chunks:
+            if chunk.get('type') == 'message_start':
+                usage.update(chunk['message'].get('usage') or {})
+            elif chunk.get('type') == 'message_delta':
+                usage.update(chunk.get('usage') or {})
+                if chunk.get('delta', {}).get('stop_reason'):
+                    model_response['stop_reason'] = chunk['delta']['stop_reason']
+
+        return model_response
+
+    def record_usage(self, usage):
+        self.prompt_cache_stats.record(usage)
+
+    def start_run(self):
+        self.prompt_cache_stats = PromptCacheStats()
+
+    def finish_run(self):
+        print(f"Prompt cache: {self.prompt_cache_stats.summary()}")
+
+
+def limit_budget(request, max_tokens):
+    """
+    Returns the JSON request body with its output token budget lowered to max_tokens,
+    e.g. for a hedge target that accepts a smaller budget than the primary model.
+    """
+    body = json.loads(request)
+    keys = [key for key in BUDGET_KEYS if max_tokens is not None and body.get(key, 0) > max_tokens]
+    if not keys:
+        return request
+    for key in keys:
+        body[key] = max_tokens
+    return json.dumps(body)
+
+
+def _add_usage(total, usage):
+    # Sums the token counts of the calls of one row (e.g. a truncated call and its retry)
+    if total is None or usage is None:
+        return usage if total is None else total
+    return {key: (total.get(key) or 0) + (value or 0)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+            for key, value in usage.items()}
+
+
+def join_responses(responses):
+    """
+    Joins the per-row responses into the text written to outputs/.
+    """
+    return ''.join(response_text + "\n\n\n" for response_text in responses)
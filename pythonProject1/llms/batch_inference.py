@@ -0,0 +1,176 @@
+import contextlib
+import json
+import os
+
+from llms.invocation import store_response
+from llms.prefill import merge_response
+from llms.prompts import compile_prompt
+from llms.result_sink import JsonlResultSink, write_text_output
+from llms.results import CallResult
+
+# Record IDs are 'ROW' followed by the zero-padded row index (11 characters, as in the
+# Bedrock batch inference examples), so they stay the same for the same row of a document.
+RECORD_ID_PREFIX = "ROW"
+RECORD_ID_DIGITS = 8
+
+# Appended to the input file name for the file with the prefilled lines of every record,
+# which are put in front of the model's answer when the output is ingested.
+PREFILL_SUFFIX = ".prefill"
+
+
+def make_record_id(row_index):
+    """
+    Returns the batch record ID of a row.
+    """
+    return f"{RECORD_ID_PREFIX}{row_index:0{RECORD_ID_DIGITS}d}"
+
+
+def parse_record_id(record_id):
+    """
+    Returns the row index encoded in a batch record ID.
+    """
+    if not record_id.startswith(RECORD_ID_PREFIX) or not record_id[len(RECORD_ID_PREFIX):].isdigit():
+        raise ValueError(f"Unexpected recordId '{record_id}'")
+    return int(record_id[len(RECORD_ID_PREFIX):])
+
+
+def write_batch_input(adapter, first_paragraph, data, path, row_offset=0, prefill=None):
+    """
+    Writes a Bedrock batch inference input file with one record per row instead of
+    invoking the model.
+
+    Each line is {"recordId": ..., "modelInput": ...}, where modelInput is the same
+    request body the adapter would send to invoke_model in a regular run, so the
+    responses are cached under the same keys. With prefill, the prefilled lines of
+    every record are written to <path>.prefill for ingest_batch_output().
+
+    Args:
+        adapter (ModelAdapter): The adapter of the model.
+        first_paragraph (str): The introductory text of the document.
+        data (list): The table rows.
+        path (str): The JSONL file to write.
+        row_offset (int): Index of data[0] in the full table, encoded in the record IDs.
+        prefill (Prefill): Fields filled by rules (see llms/prefill.py), or None.
+
+    Returns:
+        int: The number of records written.
+    """
+    prompt = compile_prompt(adapter.prompt_name, first_paragraph, exclude=prefill.fields if prefill else ())
+    if prefill is not None:
+        # As in ModelAdapter.run(), rows that a column rule has no value for keep the column fields
+        fallback_prompt = compile_prompt(adapter.prompt_name, first_paragraph, exclude=list(prefill.constants))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with contextlib.ExitStack() as stack:
+        f = stack.enter_context(open(path, "w", encoding="utf-8"))
+        if prefill is not None:
+            prefill_file = stack.enter_context(open(path + PREFILL_SUFFIX, "w", encoding="utf-8"))
+        for index, row in enumerate(data):
+            record_id = make_record_id(index + row_offset)
+            if prefill is None:
+                model_input = adapter.build_request(prompt, row)
+            elif prefill.complete(row):
+                model_input = adapter.build_request(prompt, prefill.model_row(row))
+                lines = prefill.lines(row)
+            else:
+                model_input = adapter.build_request(fallback_prompt, row)
+                lines = prefill.constant_lines()
+            f.write(json.dumps({"recordId": record_id, "modelInput": model_input}, ensure_ascii=False) + "\n")
+            if prefill is not None:
+                prefill_file.write(json.dumps({"recordId": record_id, "lines": lines}, ensure_ascii=False) + "\n")
+
+    return len(data)
+
+
+def read_prefill_lines(path):
+    """
+    Returns the prefilled lines written by write_batch_input(), keyed by row index.
+    """
+    lines = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                lines[parse_record_id(record["recordId"])] = record["lines"]
+    return lines
+
+
+def read_batch_output(adapter, path, cache_mode='use'):
+    """
+    Reads a Bedrock batch inference output file and yields the result of every row.
+
+    Records that failed in the job (an "error" instead of a "modelOutput") are
+    reported and skipped, so the missing rows can be run again. Unless cache_mode
+    is 'bypass', the responses are also stored in the response cache, so a later
+    interactive run of the same rows does not call the model again.
+
+    Args:
+        adapter (ModelAdapter): The adapter of the model that ran the job.
+        path (str): The output JSONL file (<input file>.out).
+        cache_mode (str): 'use', 'refresh' or 'bypass' for the response cache.
+
+    Yields:
+        tuple: (row_index, CallResult) in file order.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            record = json.loads(line)
+            row_index = parse_record_id(record["recordId"])
+            model_response = record.get("modelOutput")
+            if model_response is None:
+                error = record.get("error") or {}
+                print(f"Warning: Row {row_index} failed in the batch job: "
+                      f"{error.get('errorCode')} {error.get('errorMessage')}")
+                continue
+
+            # Cut-off responses stay out of the cache, as in ModelAdapter.invoke()
+            if cache_mode != 'bypass' and "modelInput" in record and not adapter.truncated(model_response):
+                store_response(adapter.model_id, json.dumps(record["modelInput"]), model_response)
+
+            usage = adapter.usage(model_response)
+            if usage:
+                adapter.record_usage(usage)
+            yield row_index, CallResult(adapter.parse_response(model_response), usage=usage, model_id=adapter.model_id)
+
+
+def ingest_batch_output(adapter, path, output_dir="outputs", cache_mode='use', prefill_path=None):
+    """
+    Turns a batch inference output file into the outputs/<model>.jsonl and
+    outputs/<model>.txt files of a regular run.
+
+    Args:
+        adapter (ModelAdapter): The adapter of the model that ran the job.
+        path (str): The output JSONL file of the job.
+        output_dir (str): Directory of the output files.
+        cache_mode (str): 'use', 'refresh' or 'bypass' for the response cache.
+        prefill_path (str): The prefilled lines of the input file (<input file>.prefill). By
+            default the file is looked for next to the output file.
+
+    Returns:
+        int: The number of rows ingested.
+    """
+    if prefill_path is None and path.endswith(".out"):
+        prefill_path = path[:-len(".out")] + PREFILL_SUFFIX
+    prefilled = read_prefill_lines(prefill_path) if prefill_path and os.path.exists(prefill_path) else {}
+
+    results_path = os.path.join(output_dir, f"{adapter.output_name}.jsonl")
+    text_path = os.path.join(output_dir, f"{adapter.output_name}.txt")
+
+    rows = 0
+    adapter.start_run()
+    with JsonlResultSink(results_path, adapter.name) as sink:
+        for row_index, result in read_batch_output(adapter, path, cache_mode):
+            if row_index in prefilled:
+                result = result.for_row(merge_response(prefilled[row_index], result.text), result.batch_rows)
+            sink.write(row_index, result)
+            rows += 1
+    adapter.finish_run()
+    write_text_output(results_path, text_path)
+
+    return rows
@@ -0,0 +1,196 @@
+import re
+import threading
+import time
+
+from llms.engine import run_rows
+from llms.prompts import format_header, format_values
+from llms.results import CallResult
+
+# Rough number of characters per token, used to size batches to a token budget.
+# Greek text tokenizes poorly, so this is deliberately conservative.
+CHARS_PER_TOKEN = 3
+
+# Appended to the prompt when several rows are sent in one request.
+BATCH_INSTRUCTIONS = """
+
+The <document_content> contains several rows of the table, each one wrapped in <row id="N"> … </row>.
+The line before the rows names the columns, and every row lists its values in the same order, separated by " | ".
+Apply the <Format> to every row separately and wrap the result of each row in <result id="N"> … </result>,
+using the same id as the row. Return exactly one <result> per <row>."""
+
+_RESULT_PATTERN = re.compile(r'<result\s+id="?(\d+)"?\s*>(.*?)</result>', re.DOTALL)
+
+
+def estimate_tokens(text):
+    """
+    Returns a rough token count for text based on CHARS_PER_TOKEN.
+    """
+    return len(str(text)) // CHARS_PER_TOKEN + 1
+
+
+def iter_batches(data, batch_size, max_batch_tokens=None):
+    """
+    Groups the rows into batches of at most batch_size rows.
+
+    Each row gets a stable id (its 1-based position in data) so that the model
+    output can be attributed back to it. If max_batch_tokens is given, a batch is
+    also closed once the estimated tokens of its rows would exceed the budget.
+    Rows are read from data only as the batches are consumed.
+
+    Args:
+        data (iterable): The table rows.
+        batch_size (int): Maximum number of rows per batch.
+        max_batch_tokens (int): Optional token budget for the rows of one batch.
+
+    Yields:
+        list: A batch, as a list of (row_id, row) tuples.
+    """
+    batch = []
+    batch_tokens = 0
+
+    for row_id, row in enumerate(data, 1):
+        row_tokens = estimate_tokens(format_values(row))
+        too_many_rows = len(batch) >= batch_size
+        too_many_tokens = max_batch_tokens is not None and batch_tokens + row_tokens > max_batch_tokens
+        if batch and (too_many_rows or too_many_tokens):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append((row_id, row))
+        batch_tokens += row_tokens
+
+    if batch:
+        yield batch
+
+
+def format_batch(batch):
+    """
+    Wraps every row of a batch in a <row id="N"> delimiter.
+
+    Rows are given in the compact form of prompts.format_row(): the header line is
+    written once, before the first row, and again only if the columns change.
+    """
+    lines = []
+    header = None
+    for row_id, row in batch:
+        if isinstance(row, dict) and format_header(row) != header:
+            header = format_header(row)
+            lines.append(header)
+        lines.append(f'<row id="{row_id}">{format_values(row)}</row>')
+    return "\n".join(lines)
+
+
+def split_batch_response(response_text, row_ids):
+    """
+    Splits the output of a batched request back into per-row results.
+
+    Only results whose id belongs to the batch and appears exactly once are
+    returned, so a row is never given an output that could belong to another.
+
+    Args:
+        response_text (str): The model output for the whole batch.
+        row_ids (list): The ids of the rows in the batch.
+
+    Returns:
+        dict: Maps each attributable row id to its result text.
+    """
+    found = {}
+    seen = set()
+    for row_id, text in _RESULT_PATTERN.findall(response_text):
+        row_id = int(row_id)
+        if row_id in seen:
+            found.pop(row_id, None)
+        elif row_id in row_ids and text.strip():
+            found[row_id] = text.strip()
+        seen.add(row_id)
+    return found
+
+
+def run_batched(data, invoke_content, batch_size=1, max_batch_tokens=None, max_workers=None, on_row=None,
+                label=None, keep_results=True):
+    """
+    Runs a model over the rows, packing several rows into each request.
+
+    invoke_content(content, instructions="", watch=None) must build the model prompt
+    around content, append instructions to it, call the model and return a CallResult.
+    A streaming invoke_content calls watch(text_so_far) as output arrives, which lets
+    the rows of a batch be handed to on_row as soon as their <result> block closes
+    and stops the stream once every row of the batch has its result.
+    Rows whose result cannot be found in the batched output are sent again on
+    their own. With batch_size 1 and no token budget every row is its own request.
+
+    Args:
+        data (iterable): The table rows to process (a list or a row iterator).
+        invoke_content (callable): Calls the model for one piece of document content.
+        batch_size (int): Maximum number of rows per request.
+        max_batch_tokens (int): Optional token budget for the rows of one request.
+        max_workers (int): Maximum number of concurrent requests.
+        on_row (callable): Optional function called as on_row(index, call_result) as
+            soon as the result of a row is final. Calls are serialized.
+        label (str): Optional prefix of the progress lines.
+        keep_results (bool): Collect and return the results (see engine.run_rows).
+
+    Returns:
+        list: The CallResult of each row, in input order, or None if keep_results is False.
+    """
+    if batch_size <= 1 and max_batch_tokens is None:
+        return run_rows(data, invoke_content, max_workers=max_workers, on_result=on_row, label=label,
+                        keep_results=keep_results)
+
+    on_row_lock = threading.Lock()
+
+    def deliver(row_id, result):
+        if on_row is not None:
+            with on_row_lock:
+                on_row(row_id - 1, result)
+
+    batches = iter_batches(data, max(batch_size, 1), max_batch_tokens)
+
+    def invoke_batch(batch):
+        row_ids = [row_id for row_id, _ in batch]
+
+        if len(batch) == 1:
+            result = invoke_content(batch[0][1])
+            deliver(row_ids[0], result)
+            return [result]
+
+        # Results handed out while streaming are final, even if the rest of the output is not
+        delivered = {}
+        closed_results = 0
+        started = time.perf_counter()
+
+        def watch(text):
+            nonlocal closed_results
+            if text.count('</result>') == closed_results:
+                return False
+            closed_results = text.count('</result>')
+            for row_id, row_text in split_batch_response(text, row_ids).items():
+                if row_id not in delivered:
+                    delivered[row_id] = CallResult(row_text, latency=time.perf_counter() - started,
+                                                   batch_rows=len(batch))
+                    deliver(row_id, delivered[row_id])
+            return len(delivered) == len(batch)
+
+        batch_result = invoke_content(format_batch(batch), BATCH_INSTRUCTIONS, watch=watch)
+        texts = split_batch_response(batch_result.text, row_ids)
+
+        results = []
+        for row_id, row in batch:
+            if row_id in delivered:
+                result = delivered[row_id]
+            elif row_id in texts:
+                result = batch_result.for_row(texts[row_id], len(batch))
+            else:
+                print(f"Warning: No result for row {row_id} in the batch output, sending it on its own")
+                result = invoke_content(row)
+            if row_id not in delivered:
+                deliver(row_id, result)
+            results.append(result)
+        return results
+
+    batch_results = run_rows(batches, invoke_batch, max_workers=max_workers, label=label,
+                             keep_results=keep_results)
+    if not keep_results:
+        return None
+
+    return [result for results in batch_results for result in results]
@@ -0,0 +1,47 @@
+from llms.prefill import Prefill
+from llms.triples import get_schema, normalize_value, parse_response
+
+# Columns every row of a template must have an answer for; a response without one of
+# them is passed on to the next model of the cascade.
+REQUIRED_COLUMNS = {
+    'hiring': ('last_name', 'first_name', 'branch', 'employment_type'),
+    'position_assignment': ('last_name', 'first_name', 'branch')
+}
+
+
+class RowValidator:
+    """
+    Checks the response of one row before it is accepted by a model cascade.
+
+    A response fails if one of the REQUIRED_COLUMNS of the template is missing, if a
+    value fails the check of its field (e.g. is not one of the allowed values, see
+    llms/triples.py), or if a field that the column rules of llms/prefill.py read from
+    the table has a different value than the row's cell.
+
+    Args:
+        template (str): The prompt template of the models, e.g. 'hiring'.
+        pdf_path (str): The PDF of the rows, which selects the column rules; None for none.
+        first_paragraph (str): The intro text of the document.
+    """
+
+    def __init__(self, template, pdf_path=None, first_paragraph=""):
+        self.schema = get_schema(template)
+        self.required = REQUIRED_COLUMNS.get(template, ())
+        self.prefill = Prefill(pdf_path, template, first_paragraph) if pdf_path else None
+
+    def problems(self, text, row=None):
+        """
+        Returns why a response fails, e.g. ['missing:branch', 'invalid:grade',
+        'mismatch:last_name'], or an empty list if it is accepted.
+        """
+        record = parse_response(text, self.schema)
+        problems = [f"missing:{column}" for column in self.required if column not in record.values]
+        problems += [f"invalid:{field}" for field in record.invalid]
+
+        if self.prefill is not None and row is not None:
+            expected = parse_response('\n'.join(self.prefill.column_lines(row)), self.schema)
+            for column, value in expected.values.items():
+                answer = record.values.get(column)
+                if answer is not None and normalize_value(str(answer)) != normalize_value(str(value)):
+                    problems.append(f"mismatch:{column}")
+        return problems
@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, FIRST_EXCEPTION
+
+# Default number of rows that are sent to Bedrock at the same time.
+MAX_CONCURRENCY = 8
+
+# Rows taken from the input per worker before waiting for a running row to complete.
+# Bounds the rows held in memory when the input is a generator.
+PREFETCH_PER_WORKER = 2
+
+
+def _raise_first_error(futures):
+    for future in futures:
+        # Re-raise the first failure (including exit() inside a row) in the caller's thread
+        if future.done() and not future.cancelled() and future.exception() is not None:
+            raise future.exception()
+
+
+def run_rows(data, invoke_row, max_workers=None, on_result=None, label=None, keep_results=True):
+    """
+    Calls invoke_row for every row of data concurrently and collects the results.
+
+    The calls are almost entirely network wait, so a thread pool is used to keep
+    up to max_workers requests in flight. Progress is printed as rows complete
+    and the results are returned in the same order as the input rows.
+
+    data may also be an iterator (e.g. rows streamed from a PDF); rows are taken
+    from it only as workers become free, so it is never read far ahead.
+
+    Args:
+        data (iterable): The table rows to process.
+        invoke_row (callable): Function that takes one row and returns its result.
+        max_workers (int): Maximum number of concurrent calls. Defaults to MAX_CONCURRENCY.
+        on_result (callable): Optional function called as on_result(index, result) as soon as
+            a row completes, in completion order. Calls are serialized.
+        label (str): Optional prefix of the progress lines, e.g. the model name.
+        keep_results (bool): Collect and return the results. Pass False when on_result
+            already stores them, so they are not all kept in memory.
+
+    Returns:
+        list: The result of invoke_row for each row, in input order, or None if
+        keep_results is False.
+    """
+    if max_workers is None:
+        max_workers = MAX_CONCURRENCY
+
+    total = len(data) if hasattr(data, '__len__') else None
+    results = []
+    done = 0
+    lock = threading.Lock()
+
+    def run_one(index, row):
+        nonlocal done
+        result = invoke_row(row)
+        with lock:
+            if keep_results:
+                results[index] = result
+            if on_result is not None:
+                on_result(index, result)
+            done += 1
+            print(f"{label} {done}/{total or '?'}" if label else f"{done}/{total or '?'}")
+
+    if max_workers <= 1:
+        for index, row in enumerate(data):
+            if keep_results:
+                results.append(None)
+            run_one(index, row)
+        return results if keep_results else None
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        pending = set()
+        for index, row in enumerate(data):
+            if len(pending) >= max_workers * PREFETCH_PER_WORKER:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _raise_first_error(finished)
+            if keep_results:
+                with lock:
+                    results.append(None)
+            pending.add(executor.submit(run_one, index, row))
+
+        finished, _ = wait(pending, return_when=FIRST_EXCEPTION)
+        _raise_first_error(finished)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return results if keep_results else None
@@ -0,0 +1,186 @@
+import collections
+import json
+import math
+import os
+import threading
+import time
+
+from llms.accounting import percentile
+
+# Default location of the profiles, next to the response cache.
+PROFILES_PATH = "cache/generation_profiles.json"
+
+# Output tokens per row that are remembered per profile (the most recent ones).
+SAMPLE_WINDOW = 500
+
+# Observed rows needed before the learned budget replaces COLD_START_TOKENS.
+MIN_SAMPLES = 20
+
+# The budget is this percentile of the output tokens per row, times the rows of the
+# request, times BUDGET_MARGIN plus BUDGET_MARGIN_TOKENS.
+BUDGET_PERCENTILE = 99
+BUDGET_MARGIN = 1.25
+BUDGET_MARGIN_TOKENS = 64
+
+# Output tokens per row of a profile without enough observations.
+COLD_START_TOKENS = 4096
+
+# Times a truncated response is sent again, each time with TRUNCATION_GROWTH times the budget.
+MAX_TRUNCATION_RETRIES = 2
+TRUNCATION_GROWTH = 4
+
+
+class GenerationProfile:
+    """
+    The generation settings of one model and prompt schema, learned from the output
+    lengths of earlier calls.
+
+    max_tokens is the BUDGET_PERCENTILE of the observed output tokens per row, scaled
+    to the rows of the request and padded by the margin, and never above the model's
+    limit. temperature and stop_sequences start as the adapter's defaults and can be
+    changed in the profiles file.
+
+    Attributes:
+        key (str): '<model>/<template>/<number of prompt fields>'.
+        limit (int): The largest budget, the adapter's max_tokens.
+        temperature (float): Sampling temperature of the requests.
+        stop_sequences (list): Stop sequences of the requests, where the model supports them.
+    """
+
+    def __init__(self, key, limit, temperature, stop_sequences=None, samples=()):
+        self.key = key
+        self.limit = limit
+        self.temperature = temperature
+        self.stop_sequences = list(stop_sequences or [])
+        self.samples = collections.deque(samples, maxlen=SAMPLE_WINDOW)
+        self.truncated = 0
+        self._lock = threading.Lock()
+
+    def tokens_per_row(self):
+        """
+        Returns the BUDGET_PERCENTILE of the output tokens per row, or None before MIN_SAMPLES rows.
+        """
+        with self._lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return None
+            return percentile(sorted(self.samples), BUDGET_PERCENTILE)
+
+    def max_tokens(self, rows=1):
+        """
+        Returns the output token budget of a request with the given number of rows.
+        """
+        per_row = self.tokens_per_row()
+        if per_row is None:
+            return min(self.limit, COLD_START_TOKENS * rows)
+        return min(self.limit, math.ceil(per_row * rows * BUDGET_MARGIN) + BUDGET_MARGIN_TOKENS)
+
+    def settings(self, max_tokens):
+        """
+        Returns the generation settings passed to ModelAdapter.build_request().
+        """
+        return {"max_tokens": max_tokens, "temperature": self.temperature, "stop_sequences": self.stop_sequences}
+
+    def observe(self, output_tokens, rows=1, truncated=False):
+        """
+        Records the output tokens of a finished, non-cached call.
+
+        Truncated calls are only counted: their length says nothing about the answer's.
+        """
+        with self._lock:
+            if truncated:
+                self.truncated += 1
+            elif output_tokens:
+                self.samples.append(output_tokens / max(rows, 1))
+
+    def summary(self):
+        per_row = self.tokens_per_row()
+        if per_row is None:
+            return f"{len(self.samples)} rows observed, budget {self.max_tokens()} tokens per row until {MIN_SAMPLES}"
+        return (f"p{BUDGET_PERCENTILE} {per_row:.0f} output tokens per row over {len(self.samples)} rows, "
+                f"budget {self.max_tokens()} tokens per row (limit {self.limit}), {self.truncated} truncated")
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "temperature": self.temperature,
+                "stop_sequences": self.stop_sequences,
+                "samples": [round(sample, 1) for sample in self.samples],
+                "updated": time.time()
+            }
+
+
+class GenerationProfiles:
+    """
+    The generation profiles of every model and schema, stored as JSON at path and
+    updated across runs. Safe to share between threads.
+    """
+
+    def __init__(self, path=PROFILES_PATH):
+        self.path = path
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get("profiles", {})
+        except (OSError, ValueError) as e:
+            print(f"Warning: Can't read the generation profiles in {self.path}: {e}")
+            return {}
+
+    def get(self, adapter, prompt):
+        """
+        Returns the profile of an adapter and a compiled prompt, loading it from the file
+        the first time.
+        """
+        key = f"{adapter.name}/{adapter.prompt_name}/{len(prompt.fields)}"
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                stored = self._read().get(key, {})
+                profile = GenerationProfile(key, adapter.max_tokens, stored.get("temperature", adapter.temperature),
+                                            stored.get("stop_sequences"), stored.get("samples", ()))
+                self._profiles[key] = profile
+            return profile
+
+    def save(self):
+        """
+        Writes the profiles to the file, keeping the profiles of other models in it.
+        """
+        with self._lock:
+            profiles = self._read()
+            profiles.update({key: profile.to_dict() for key, profile in self._profiles.items()})
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temporary_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                json.dump({"profiles": profiles}, f, ensure_ascii=False, indent=1)
+            os.replace(temporary_path, self.path)
+
+
+_default_profiles = None
+_default_profiles_lock = threading.Lock()
+
+
+def get_generation_profiles():
+    """
+    Returns the process-wide GenerationProfiles stored at PROFILES_PATH.
+    """
+    global _default_profiles
+    with _default_profiles_lock:
+        if _default_profiles is None:
+            _default_profiles = GenerationProfiles()
+        return _default_profiles
+
+
+def set_generation_profiles(profiles):
+    """
+    Replaces the process-wide GenerationProfiles, e.g. with one stored elsewhere.
+    """
+    global _default_profiles
+    with _default_profiles_lock:
+        _default_profiles = profiles
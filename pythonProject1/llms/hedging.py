@@ -0,0 +1,264 @@
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from llms.accounting import MODEL_PRICES, USAGE_KEYS, percentile
+
+# Where a hedged call of each model is sent, tried in turn. An entry names a sibling model
+# of llms/registry.py that understands the same request body ({'model': ...}), or an
+# inference profile, optionally in another region ({'model_id': ..., 'region_name': ...}).
+# Models without an entry are never hedged.
+HEDGE_TARGETS = {
+    'claude3.7': [{'model': 'claude4'}],
+    'claude3.5': [{'model': 'claude3.7'}],
+    'claude4': [{'model': 'claude3.7'}]
+}
+
+# A call is hedged once it has taken longer than this percentile of the model's calls.
+HEDGE_PERCENTILE = 95
+
+# Latencies of finished calls remembered per model (the most recent ones).
+LATENCY_WINDOW = 500
+
+# Calls needed before the percentile is trusted; until then nothing is hedged.
+MIN_SAMPLES = 20
+
+# Largest share of a model's calls that may be hedged.
+MAX_HEDGE_RATE = 0.1
+
+# Threads that run the calls of a policy while the caller waits for the first answer.
+HEDGE_WORKERS = 128
+
+
+class HedgeTarget:
+    """
+    An alternate destination of a hedged call.
+
+    Attributes:
+        model (str): The registry name the target's usage is priced with and whose
+            RateLimiter schedules the hedged calls.
+        model_id (str): The Bedrock model or inference profile ID.
+        region_name (str): The region of the client, or None for the primary's client.
+        max_tokens (int): The largest output token budget of the target; a larger budget of
+            the primary's request is lowered to it. None for no limit.
+    """
+
+    __slots__ = ('model', 'model_id', 'region_name', 'max_tokens')
+
+    def __init__(self, model, model_id, region_name=None, max_tokens=None):
+        self.model = model
+        self.model_id = model_id
+        self.region_name = region_name
+        self.max_tokens = max_tokens
+
+    def __repr__(self):
+        return f"HedgeTarget({self.model!r}, {self.model_id!r}, region_name={self.region_name!r})"
+
+
+class HedgePolicy:
+    """
+    Sends a second copy of a slow call to an alternate target; the first answer wins.
+
+    A call that has not answered after the HEDGE_PERCENTILE of the model's earlier
+    latencies is sent again to the next target, as long as no more than max_rate of the
+    calls have been hedged. The caller gets whichever response arrives first. The other
+    call is cancelled if it is a stream (its stream is closed at the next chunk) and
+    otherwise left to finish in the background; its tokens are counted as the extra cost
+    of hedging. Safe to share between threads.
+
+    Args:
+        model (str): The registry name of the primary model.
+        targets (list): The HedgeTarget of every alternate, tried in turn.
+        hedge_percentile (float): Latency percentile after which a call is hedged.
+        max_rate (float): Largest share of the calls that is hedged.
+        min_samples (int): Finished calls needed before any call is hedged.
+        min_delay (float): Seconds a call always gets before it is hedged.
+    """
+
+    def __init__(self, model, targets, hedge_percentile=HEDGE_PERCENTILE, max_rate=MAX_HEDGE_RATE,
+                 min_samples=MIN_SAMPLES, min_delay=0.0):
+        self.model = model
+        self.targets = list(targets)
+        self.hedge_percentile = hedge_percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.extra_tokens = {}
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._next_target = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix=f"hedge-{model}")
+
+    def delay(self):
+        """
+        Returns the seconds after which a call is hedged, or None before min_samples calls.
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return max(percentile(latencies, self.hedge_percentile), self.min_delay)
+
+    def _take_target(self):
+        # Returns the next target, or None if hedging another call would exceed max_rate
+        with self._lock:
+            if not self.targets or self.hedged + 1 > self.max_rate * self.calls:
+                return None
+            self.hedged += 1
+            target = self.targets[self._next_target % len(self.targets)]
+            self._next_target += 1
+            return target
+
+    def _observe(self, started):
+        def done(future):
+            if future.exception() is None:
+                with self._lock:
+                    self._latencies.append(time.perf_counter() - started)
+        return done
+
+    def _count_loser(self, model, usage):
+        def done(future):
+            if future.exception() is not None:
+                return
+            tokens = usage(future.result()) or {}
+            with self._lock:
+                counts = self.extra_tokens.setdefault(model, {price: 0 for price in USAGE_KEYS})
+                for price, key in USAGE_KEYS.items():
+                    counts[price] += tokens.get(key) or 0
+        return done
+
+    def call(self, primary, hedge, usage):
+        """
+        Runs primary and, if it is slow, hedge; returns the first response.
+
+        Args:
+            primary (callable): Sends the call to the primary model, called as
+                primary(cancelled) where cancelled is a threading.Event set once the
+                hedge has won.
+            hedge (callable): Sends the same call to a target, called as hedge(target, cancelled).
+            usage (callable): Returns the token counts of a response (see ModelAdapter.usage()).
+
+        Returns:
+            tuple: (response, the HedgeTarget that answered or None for the primary,
+                    whether the call was hedged).
+        """
+        with self._lock:
+            self.calls += 1
+        started = time.perf_counter()
+        primary_cancelled = threading.Event()
+        primary_future = self._executor.submit(primary, primary_cancelled)
+        primary_future.add_done_callback(self._observe(started))
+
+        delay = self.delay()
+        if delay is None or wait([primary_future], timeout=delay).done:
+            return primary_future.result(), None, False
+
+        target = self._take_target()
+        if target is None:
+            return primary_future.result(), None, False
+
+        hedge_cancelled = threading.Event()
+        hedge_future = self._executor.submit(hedge, target, hedge_cancelled)
+        pending = {primary_future, hedge_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                if future is primary_future:
+                    hedge_cancelled.set()
+                    hedge_future.add_done_callback(self._count_loser(target.model, usage))
+                    return future.result(), None, True
+                with self._lock:
+                    self.hedge_wins += 1
+                primary_cancelled.set()
+                primary_future.add_done_callback(self._count_loser(self.model, usage))
+                return future.result(), target, True
+
+        # Both failed: the primary's error is the one the caller handles (e.g. retries)
+        return primary_future.result(), None, True
+
+    def extra_cost(self):
+        """
+        Returns the estimated cost in USD of the calls that lost, or None if a model of
+        them has no entry in MODEL_PRICES.
+        """
+        with self._lock:
+            extra_tokens = {model: dict(tokens) for model, tokens in self.extra_tokens.items()}
+        cost = 0.0
+        for model, tokens in extra_tokens.items():
+            prices = MODEL_PRICES.get(model)
+            if prices is None:
+                return None
+            cost += sum(tokens[price] * prices.get(price, 0) for price in tokens) / 1000000
+        return cost
+
+    def summary(self):
+        """
+        Returns the report entry of the policy as a dict.
+        """
+        delay = self.delay()
+        cost = self.extra_cost()
+        with self._lock:
+            return {
+                "targets": [target.model_id for target in self.targets],
+                "calls": self.calls,
+                "hedged_calls": self.hedged,
+                "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else None,
+                "hedge_wins": self.hedge_wins,
+                "hedge_delay": round(delay, 3) if delay is not None else None,
+                "extra_tokens": {model: dict(tokens) for model, tokens in self.extra_tokens.items()},
+                "extra_cost_usd": round(cost, 6) if cost is not None else None
+            }
+
+
+def hedge_targets(model):
+    """
+    Returns the HedgeTarget of every HEDGE_TARGETS entry of a model.
+    """
+    from llms.registry import get_adapter_class
+
+    targets = []
+    for entry in HEDGE_TARGETS.get(model, []):
+        name = entry.get('model', model)
+        adapter_class = get_adapter_class(name)
+        targets.append(HedgeTarget(name, entry.get('model_id') or adapter_class.model_id, entry.get('region_name'),
+                                   adapter_class.max_tokens))
+    return targets
+
+
+_policies = {}
+_policies_lock = threading.Lock()
+
+
+def get_hedge_policy(name):
+    """
+    Returns the HedgePolicy shared by every run of a model in this process, or None if
+    the model has no HEDGE_TARGETS.
+    """
+    with _policies_lock:
+        if name not in _policies:
+            targets = hedge_targets(name)
+            _policies[name] = HedgePolicy(name, targets) if targets else None
+        return _policies[name]
+
+
+def set_hedge_policy(name, policy):
+    """
+    Replaces the HedgePolicy of a model, e.g. with other targets or a lower max_rate.
+    """
+    with _policies_lock:
+        _policies[name] = policy
+
+
+def hedging_report(models):
+    """
+    Returns the summary of every model's policy that has hedged at least one call.
+    """
+    with _policies_lock:
+        policies = {name: _policies.get(name) for name in models}
+    return {name: policy.summary() for name, policy in policies.items() if policy is not None and policy.hedged}
@@ -0,0 +1,82 @@
+import json
+
+from llms.response_cache import CACHE_MODES, get_response_cache, make_cache_key
+
+# Key under which Bedrock reports token counts and latency. Streamed responses carry it
+# in their last chunk; for invoke_model it is rebuilt from the response headers.
+INVOCATION_METRICS = "amazon-bedrock-invocationMetrics"
+
+_METRIC_HEADERS = {
+    "inputTokenCount": "x-amzn-bedrock-input-token-count",
+    "outputTokenCount": "x-amzn-bedrock-output-token-count",
+    "invocationLatency": "x-amzn-bedrock-invocation-latency"
+}
+
+
+def check_cache_mode(cache_mode):
+    if cache_mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode '{cache_mode}', expected one of {CACHE_MODES}")
+
+
+def get_cached_response(model_id, body):
+    """
+    Returns the decoded cached response for this request, or None if it is not cached.
+    """
+    cached_body = get_response_cache().get(make_cache_key(model_id, body))
+    if cached_body is None:
+        return None
+    return json.loads(cached_body)
+
+
+def store_response(model_id, body, model_response):
+    """
+    Stores a decoded model response for this request in the response cache.
+    """
+    response_body = json.dumps(model_response, ensure_ascii=False).encode("utf-8")
+    get_response_cache().put(make_cache_key(model_id, body), model_id, response_body)
+
+
+def call_model(client, model_id, body):
+    """
+    Calls invoke_model without the response cache and returns the decoded response.
+
+    The token counts and latency Bedrock reports in the response headers are added
+    under INVOCATION_METRICS, so every model's response carries them.
+    """
+    response = client.invoke_model(modelId=model_id, body=body)
+    model_response = json.loads(response["body"].read())
+
+    headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    metrics = {name: int(headers[header]) for name, header in _METRIC_HEADERS.items() if header in headers}
+    if metrics and INVOCATION_METRICS not in model_response:
+        model_response[INVOCATION_METRICS] = metrics
+
+    return model_response
+
+
+def invoke_model_stream(client, model_id, body):
+    """
+    Invokes a Bedrock model with a response stream and yields the decoded chunks as they arrive.
+
+    Closing the generator closes the underlying stream, so a caller can stop reading early.
+
+    Args:
+        client: The bedrock-runtime client.
+        model_id (str): The model or inference profile ID.
+        body (str): The JSON request body.
+
+    Yields:
+        dict: The decoded chunks of the response.
+    """
+    response = client.invoke_model_with_response_stream(modelId=model_id, body=body)
+    stream = response["body"]
+
+    try:
+        for event in stream:
+            chunk = event.get("chunk")
+            if chunk:
+                yield json.loads(chunk["bytes"])
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,235 @@
+import re
+
+from llms.prompts import PROMPTS, format_fields
+
+# <Format> fields read straight from a table column, per PDF layout (the keys of
+# test_new_parser.COLUMN_HEADERS). The number of a repeated group is 1.
+COLUMN_RULES = {
+    "data/diorismos_monimwn.pdf": {
+        "Person has_last_name": "Επώνυμο",
+        "Person has_first_name": "Όνομα",
+        "Person has_father’s_name": "Πατρώνυμο",
+        "Position_Type has_branch": "Κλάδος",
+        "Management_Area has_management_area_name": "Περιφέρεια"
+    },
+    "data/proslipsi_anaplhrwtwn.pdf": {
+        "Person has_last_name": "Επώνυμο",
+        "Person has_first_name": "Όνομα",
+        "Person has_father’s_name": "Πατρώνυμο",
+        "Position_Type has_branch": "Κλάδος",
+        "Position_Type has_specialization": "Ειδικότητα",
+        "Management_Area has_management_area_name": "Περιοχή Τοποθέτησης"
+    },
+    "data/anaplhrwtes_eep_ebp.pdf": {
+        "Person has_last_name": "Επώνυμο",
+        "Person has_first_name": "Όνομα",
+        "Person has_father’s_name": "Πατρώνυμο",
+        "Position_Type has_branch": "Κλάδος",
+        "Management_Area has_management_area_name": "Περιοχή Πρόσληψης",
+        "Regional_government_agency has_regional_agency_name": "Διευθυνση Εκπαίδευσης"
+    },
+    "data/monimos_eep_ebp.pdf": {
+        "Person has_last_name": "Επώνυμο",
+        "Person has_first_name": "Όνομα",
+        "Person has_father’s_name": "Πατρώνυυμο",
+        "Position_Type has_branch": "Κλάδος Διορισμού",
+        "Management_Area has_management_area_name": "Περιοχή/ΣΔΕΥ Διορισμού",
+        "Regional_government_agency has_regional_agency_name": "ΔΠΕ/ΔΔΕ/ΠΔΕ"
+    },
+    "data/topothethisi_monimou.pdf": {
+        "Person has_last_name": "Επώνυμο",
+        "Person has_first_name": "Όνομα",
+        "Person has_father’s_name": "Όνομα Πατρός",
+        "Employment has_ \"ID\"_employee_number": "Αριθμός Μητρώου",
+        "Government_agency_<Z> has_name": "Σχολείο Οριστικής Τοποθέτησης"
+    },
+    "data/tpothetisi_anaplhrwtwn.pdf": {
+        "Person has_last_name": "Επώνυμο",
+        "Person has_first_name": "Όνομα",
+        "Position_Type has_branch": "Κλάδος",
+        "Government_agency_<Z> has_name": "ΣΧΟΛΕΙΟ Τοποθέτησης"
+    },
+    "data/topothetisi_monimou_ksanthis.pdf": {
+        "Person has_last_name": "ΕΠΩΝΥΜΟ",
+        "Person has_first_name": "ΟΝΟΜΑ",
+        "Person has_father’s_name": "ΠΑΤΡΩΝΥΜΟ",
+        "Position_Type has_branch": "ΚΛΑΔΟΥ",
+        "Government_agency_<Z> has_name": "ΣΧΟΛΕΙΟ ΝΕΑΣ ΟΡΓΑΝΙΚΗΣ"
+    },
+    "data/diathesi.pdf": {
+        "Person has_last_name": "ΕΠΩΝΥΜΟ",
+        "Person has_first_name": "ΟΝΟΜΑ",
+        "Position_Type has_branch": "ΚΛΑΔΟΣ",
+        "Government_agency_<Z> has_name": "ΣΧΟΛΕΙΟ ΔΙΑΘΕΣΗΣ ΓΙΑ ΣΥΜΠΛΗΡΩΣΗ ΩΡΑΡΙΟΥ",
+        "Position_<M> has_working_hours_per_week": "ΩΡΕΣ ΣΥΜΠΛΗΡΩΣΗΣ"
+    }
+}
+
+# Fields with the same value for every row of a layout.
+LAYOUT_RULES = {
+    "data/diorismos_monimwn.pdf": {"Employment has_employment_type": "Διορισμός"},
+    "data/monimos_eep_ebp.pdf": {"Employment has_employment_type": "Διορισμός"},
+    "data/proslipsi_anaplhrwtwn.pdf": {"Employment has_employment_type": "Πρόσληψη"},
+    "data/anaplhrwtes_eep_ebp.pdf": {"Employment has_employment_type": "Πρόσληψη"}
+}
+
+# Fields whose column is of no use for the other fields; once the field is prefilled,
+# its column is not sent to the model.
+PREFILL_ONLY_FIELDS = ("Person has_last_name", "Person has_first_name", "Person has_father’s_name",
+                       "Employment has_ \"ID\"_employee_number")
+
+GREEK_MONTHS = {
+    "ιανουαριου": 1, "φεβρουαριου": 2, "μαρτιου": 3, "απριλιου": 4, "μαιου": 5, "ιουνιου": 6,
+    "ιουλιου": 7, "αυγουστου": 8, "σεπτεμβριου": 9, "οκτωβριου": 10, "νοεμβριου": 11, "δεκεμβριου": 12
+}
+
+# The date of the gazette issue in its header, e.g. '12 Σεπτεμβρίου 2024'.
+_GAZETTE_DATE = re.compile(r'\b(\d{1,2})\s+([Α-Ωα-ωΆ-ώΪΫϊϋΐΰ]+)\s+(\d{4})\b')
+
+# The issuing authority in the heading of the decision, e.g. 'ΥΠΟΥΡΓΕΙΟ ΠΑΙΔΕΙΑΣ, ΘΡΗΣΚΕΥΜΑΤΩΝ ΚΑΙ ΑΘΛΗΤΙΣΜΟΥ'.
+_AGENCY = re.compile(r'(?:ΥΠΟΥΡΓΕΙΟ|ΠΕΡΙΦΕΡΕΙΑΚΗ ΔΙΕΥΘΥΝΣΗ|ΔΙΕΥΘΥΝΣΗ) [Α-ΩΆ-ΏΪΫ΄\'/.,\- ]+')
+
+
+def _compact(text):
+    return ''.join(text.split())
+
+
+def _clean(value):
+    return ' '.join(str(value).replace('<br>', ' ').split())
+
+
+def _format_lines(values):
+    return [f"{field.replace('<N>', '1').replace('<M>', '1').replace('<Z>', '1')} {value}"
+            for field, value in values.items()]
+
+
+def gazette_date(first_paragraph):
+    """
+    Returns the first date written out with a Greek month name in the intro text as
+    'DD/MM/YYYY', or None.
+    """
+    for day, month, year in _GAZETTE_DATE.findall(first_paragraph):
+        number = GREEK_MONTHS.get(month.lower().translate(str.maketrans('άέήίόύώϊΐ', 'αεηιουωιι')))
+        if number:
+            return f"{int(day):02d}/{number:02d}/{year}"
+    return None
+
+
+def issuing_agency(first_paragraph):
+    """
+    Returns the first ministry or directorate named in capitals in the intro text, or None.
+    """
+    match = _AGENCY.search(first_paragraph)
+    return match.group().strip(" ,.-") if match else None
+
+
+# Fields read once per document from the intro text.
+DOCUMENT_RULES = {
+    "Government_agency has_name": issuing_agency,
+    "Employment has_ from_date": gazette_date
+}
+
+
+class Prefill:
+    """
+    The <Format> fields of one document that are filled by rules instead of the model.
+
+    Column rules read a row's cell, document rules read the intro text once and layout
+    rules are constants. Only fields of the adapter's template are used, and only
+    document fields that were found in the intro.
+
+    A row that a column rule has no value for (e.g. an empty cell) is not prefilled from
+    the columns: it is sent with the column fields left in the prompt (see complete()).
+
+    Attributes:
+        fields (list): The prefilled '<Subject> <predicate>' keys as they appear in the template.
+        constants (dict): The fields with the same value for every row, and their values.
+    """
+
+    def __init__(self, pdf_path, template, first_paragraph):
+        template_fields = {_compact(field): field for field in format_fields(PROMPTS[template])}
+
+        def template_field(key):
+            return template_fields.get(_compact(key))
+
+        self.constants = {}
+        for key, rule in DOCUMENT_RULES.items():
+            value = rule(first_paragraph) if template_field(key) else None
+            if value:
+                self.constants[template_field(key)] = value
+        for key, value in LAYOUT_RULES.get(pdf_path, {}).items():
+            if template_field(key):
+                self.constants[template_field(key)] = value
+
+        self.columns = {template_field(key): column for key, column in COLUMN_RULES.get(pdf_path, {}).items()
+                        if template_field(key)}
+        self.fields = list(self.constants) + list(self.columns)
+        prefill_only = {_compact(key) for key in PREFILL_ONLY_FIELDS}
+        self.dropped_columns = {column for field, column in self.columns.items() if _compact(field) in prefill_only}
+
+    def lines(self, row):
+        """
+        Returns the prefilled output lines of a row, in the format of the model's answer.
+        """
+        return _format_lines(dict(self.constants, **self.column_values(row)))
+
+    def constant_lines(self):
+        """
+        Returns the output lines of only the fields with the same value for every row.
+        """
+        return _format_lines(self.constants)
+
+    def column_lines(self, row):
+        """
+        Returns the output lines of only the fields read from the row's table columns.
+        """
+        return _format_lines(self.column_values(row))
+
+    def column_values(self, row):
+        """
+        Returns the non-empty values of the column rules for a row, keyed by field.
+        """
+        values = {}
+        if isinstance(row, dict):
+            for field, column in self.columns.items():
+                value = _clean(row.get(column, ''))
+                if value:
+                    values[field] = value
+        return values
+
+    def complete(self, row):
+        """
+        Returns True if every column rule has a value for the row. The other rows are sent
+        with the column fields left in the prompt, so the model answers them.
+        """
+        return len(self.column_values(row)) == len(self.columns)
+
+    def model_row(self, row):
+        """
+        Returns the row without the columns that only serve prefilled fields.
+        """
+        if not isinstance(row, dict) or not self.dropped_columns:
+            return row
+        return {column: value for column, value in row.items() if column not in self.dropped_columns}
+
+
+def merge_response(lines, text):
+    """
+    Returns the model's response preceded by the prefilled lines.
+    """
+    if not lines:
+        return text
+    return '\n'.join(lines) + '\n' + text.lstrip('\n')
+
+
+def get_prefill(pdf_path, template, first_paragraph):
+    """
+    Returns the Prefill of a document, or None if no rule applies to it.
+
+    Args:
+        pdf_path (str): The PDF, which selects the layout as in test_new_parser.py.
+        template (str): The adapter's prompt template, e.g. 'hiring'.
+        first_paragraph (str): The intro text of the document.
+    """
+    prefill = Prefill(pdf_path, template, first_paragraph)
+    return prefill if prefill.fields else None
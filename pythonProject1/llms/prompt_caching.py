@@ -0,0 +1,78 @@
+import threading
+
+# Marks the end of the prompt prefix that Bedrock may cache for Anthropic models.
+CACHE_POINT = {"type": "ephemeral"}
+
+
+def prompt_content(prefix, text, prompt_caching=True):
+    """
+    Builds the content blocks of a Claude user message.
+
+    The prefix (intro text plus the <Format>/<Descriptions> block) is identical
+    for every row, so it is sent as its own block marked for prompt caching and
+    only the per-row text follows it.
+
+    Args:
+        prefix (str): The part of the prompt shared by every request of a run.
+        text (str): The per-row part of the prompt.
+        prompt_caching (bool): Whether to mark the prefix for prompt caching.
+
+    Returns:
+        list: The message content blocks.
+    """
+    prefix_block = {
+        "type": "text",
+        "text": prefix
+    }
+    if prompt_caching:
+        prefix_block["cache_control"] = CACHE_POINT
+
+    return [
+        prefix_block,
+        {
+            "type": "text",
+            "text": text
+        }
+    ]
+
+
+class PromptCacheStats:
+    """
+    Collects the prompt cache usage reported in Claude responses.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.hits = 0
+        self.writes = 0
+        self.input_tokens = 0
+        self.cache_read_input_tokens = 0
+        self.cache_creation_input_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, usage):
+        """
+        Adds the 'usage' section of one Claude response.
+        """
+        usage = usage or {}
+        cache_read = usage.get("cache_read_input_tokens") or 0
+        cache_creation = usage.get("cache_creation_input_tokens") or 0
+
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += usage.get("input_tokens") or 0
+            self.cache_read_input_tokens += cache_read
+            self.cache_creation_input_tokens += cache_creation
+            if cache_read:
+                self.hits += 1
+            elif cache_creation:
+                self.writes += 1
+
+    def summary(self):
+        """
+        Returns a one-line description of the cache usage.
+        """
+        return (f"{self.hits}/{self.requests} requests read the cached prefix, {self.writes} wrote it "
+                f"(cache read tokens: {self.cache_read_input_tokens}, "
+                f"cache write tokens: {self.cache_creation_input_tokens}, "
+                f"uncached input tokens: {self.input_tokens})")
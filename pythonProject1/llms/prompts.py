@@ -0,0 +1,283 @@
+# Prompt templates shared by the model adapters in llms/.
+#
+# Every template is the part of the prompt that is the same for every row of a
+# document: the extraction instructions with the <Format> and <Descriptions> of the
+# fields. It is compiled once per run together with the document's intro text, and
+# only the row slot is filled in per request.
+import re
+
+HIRING_PROMPT = """Please analyze the following PDF document content and provide a summary of its key points:
+
+< Separate the piece of <Greek Text> extracted from a hiring decision exclusively into fields with the following <Format>, taking into account the <Descriptions> of the fields. Return the result exclusively using the provided <Format> for …….>
+<Format>:
+Person has_last_name <Last_Name>
+Person has_first_name <First_Name>
+Person has_father’s_name <Father’s_Name>
+Government_agency has_name <Name>
+Employment has_ from_date <From_Date>
+Employment has_ thru_date < Thru_Date>
+Employment has_"ID"_employee_number <"ID"_Employee_Number>
+Employment has_employment_type <Employment_Type>
+Position_Type has_title <Title>
+Position_Type has_branch <Branch>
+Position_Type has_specialization <Specialization>
+Position_Type is_designated_for_education_type <Education_Type>
+Position_Type has_grade <Grade>
+Position_Type has_pay_grade <Pay_Grade>
+Position_Type has_salary_step <Salary_Step>
+Position_Type has_standard_hours_per_week <Standard_Hours_Per_Week>
+Position_Type entails_employment_relationship <Employment_Relationship>
+Management_Area has_management_area_name <Management_Area_Name>
+Management_Area is_an_example_of_management_area_type <Management_Area_type>
+Regional_government_agency has_regional_agency_name <Regional_Agency_Name>
+
+<Descriptions>:
+Last name: <The one and only one last name of a person>
+First name: <The one and only one first name of a person>
+Father’s name: <The one and only one father’s name of a person>
+Name: < The one and only one name of the government agency that issues the hiring decision>
+From date: <The one and only one date of publication of the hiring decision in the Government Gazette (ΦΕΚ)>
+Thru date: <The one and only one date that the employment ends. Take into account that the end of academic year (“διδακτικό έτος”) is “30/06/….”, where “….” represents the year, while the end of the school year (“σχολικό έτος”) is “31/08/….”. In the case of a two-year probationary appointment, this does not mean that his or her employment ends after two years>
+"ID" employee number: <The one and only one six-digit “ID” number of an employee. This number may not appear in some decisions.>
+Employment type: <The one and only one type of employment. Allowed values: “Διορισμός”, “Πρόσληψη”>
+Title: <The one and only one title of a position type. Allowed values: Εκπαιδευτικός πρωτοβάθμιας εκπαίδευσης, Εκπαιδευτικός δευτεροβάθμιας εκπαίδευσης, Εκπαιδευτικός πρωτοβάθμιας και δευτεροβάθμιας εκπαίδευσης, Ειδικό Εκπαιδευτικό Προσωπικό (ΕΕΠ), Ειδικό Βοηθητικό Προσωπικό (ΕΒΠ)>
+Branch: <The one and only one branch in which a position is classified>
+Specialization: < The one and only one specialization in which a position is classified>
+Education Type: <The one and only one education type for which a position is designated. Allowed values: Γενική Εκπαίδευση, Ειδική Αγωγή και Εκπαίδευση>
+Grade: <The one and only one grade in which a position is classified. The grades of teachers are “Γ”, “B”, “A”. “Γ” is the introductory grade. Allowed values: “Εισαγωγικός”, “Γ”, “B”, “A”>
+Pay Grade: < The one and only one education category in which a position is classified. Allowed values: “Πανεπιστημιακής Εκπαίδευσης (ΠΕ)”, “Τεχνολογικής Εκπαίδευσης (ΤΕ)”, “Δευτεροβάθμιας Εκπαίδευσης (ΔΕ)”>
+Salary step: <The one and only one salary step in which a position is classified. The salary steps of teachers are “ΜΚ1”, “ΜΚ2”, …, “ΜΚ19”. “ΜΚ1” is the introductory salary step. Allowed values: “Εισαγωγικό”, “ΜΚ1”, “ΜΚ2”, …, “ΜΚ19”>
+Standard hours per week: <The number of hours an employee is typically scheduled to work in a week, as defined by their employment agreement or job classification. Allowed values: “Πλήρους ωραρίου”, “Μειωμένου ωραρίου”. In some hiring decisions this information may not appear>
+Employment Relationship: <The one and only one employment relationship entailed by the position. Allowed values: Μόνιμος, Μόνιμος με διετή δοκιμαστική θητεία, Προσωρινός αναπληρωτής με σχέση εργασίας Ιδιωτικού Δικαίου Ορισμένου Χρόνου, Ωρομίσθιος>
+Management area name: <The one and only one name of a specific management area (e.g. “Α΄ ΑΝΑΤ. ΑΤΤΙΚΗΣ (Δ.Ε.)”)>
+Management area type: <The one and only one type of management area. Allowed values: Περιοχή Διορισμού, Περιοχή Τοποθέτησης, Περιοχή Πρόσληψης, Περιοχή Μετάταξης>
+Regional_Agency_Name: <The one and only one name of the regional agency of the Ministry of Education (e.g., Δ.Ε. Α΄ ΑΘΗΝΑΣ), which has jusridiction over a geographic area>
+<Greek text>:
+…"""
+
+POSITION_ASSIGNMENT_PROMPT = """Please analyze the following PDF document content and provide a summary of its key points:
+
+< Separate the piece of <Greek Text> extracted from a position assignment decision exclusively into fields with the following <Format>, taking into account the <Descriptions> of the fields. Return the result exclusively using the provided <Format> for ….>
+<Format>:
+Person has_last_name <Last_Name>
+Person has_first_name <First_Name>
+Person has_father’s_name <Father’s_Name>
+Employment has_ "ID"_employee_number <"ID"_Employee_Number>
+Position_assignment_<N> has_from_date <From_Date>
+Position_assignment_<N> has_thru_date <Thru_Date>
+Position_assignment_<N> has_position_assignment_type <Position_Assignment_Type>
+Position_<M> has_kind_of_position <Kind_Of_Position>
+Position_<M> has_status <Status>
+Position_<M> has_working_hours_per_week <Working_Hours_Per_Week>
+Position_Type has_title <Title>
+Position_Type has_branch <Branch>
+Position_Type has_specialization <Specialization>
+Position_Type is_designated_for_education_type <Education_Type>
+Position_Type has_standard_hours_per_week <Standard_Hours_Per_Week>
+Position_Type entails_employment_relationship <Employment_Relationship>
+Government_agency_<Z> has_name <Name>
+
+Where <N> the number of Position Assignment.
+Where <M> the number of Position.
+Where <Z> the number of Government Agency.
+
+<Descriptions>:
+Last name: <The one and only one last name of a person>
+First name: <The one and only one first name of a person>
+Father’s name: <The one and only one father’s name of a person>
+"ID" employee number: <The one and only one six-digit “ID” number of an employee. This number may not appear in some decisions.>
+From date: <The one and only one date that the position assignment starts.>
+Thru date: < The one and only one date that the position assignment ends. Take into account that the end of academic year (“διδακτικό έτος”) is “30/06/….”, where “….” represents the year, while the end of the school year (“σχολικό έτος”) is “31/08/….”.>
+Position assignment type: <The one and only one type of position assignment. Allowed values: «Τοποθέτηση», “Μετάθεση εντός ΠΥΣΔΕ”, “Οριστική Τοποθέτηση, “Διάθεση”, “Μετάταξη”>
+Kind of position: < The one and only one kind of position, depending on whether it is permanent or temporary. Allowed values: Οργανική, Λειτουργική ανάγκη, Διδακτική ανάγκη>
+Status: <The one and only one status of a position depending on whether it is vacant or filled. Allowed values: Κενή, Καλυμμένη>
+Working hours per week: <The number of hours a teacher works per week>
+Title: <The one and only one title of a position type. Allowed values: Εκπαιδευτικός πρωτοβάθμιας εκπαίδευσης, Εκπαιδευτικός δευτεροβάθμιας εκπαίδευσης, Εκπαιδευτικός πρωτοβάθμιας και δευτεροβάθμιας εκπαίδευσης, Ειδικό Εκπαιδευτικό Προσωπικό (ΕΕΠ), Ειδικό Βοηθητικό Προσωπικό (ΕΒΠ)>
+Branch: <The one and only one branch in which a position is classified>
+Specialization: < The one and only one specialization in which a position is classified>
+Education Type: <The one and only one education type for which a position is designated. Allowed values: Γενική Εκπαίδευση, Ειδική Αγωγή και Εκπαίδευση>
+Standard hours per week: <The number of hours an employee is typically scheduled to work in a week, as defined by their employment agreement or job classification. Allowed values: “Πλήρους ωραρίου”, “Μειωμένου ωραρίου”>
+Employment Relationship: <The one and only one employment relationship entailed by the position. Allowed values: Μόνιμος, Μόνιμος με διετή δοκιμαστική θητεία, Προσωρινός αναπληρωτής με σχέση εργασίας Ιδιωτικού Δικαίου Ορισμένου Χρόνου, Ωρομίσθιος>
+Name: < The one and only one name of the government agency, that defines the position (e.g., “ΕΠΑΛ ΝΙΚΗΤΗΣ”)>
+<Greek text>:
+…"""
+
+PROMPTS = {
+    'hiring': HIRING_PROMPT,
+    'position_assignment': POSITION_ASSIGNMENT_PROMPT
+}
+
+
+def format_fields(template):
+    """
+    Returns the '<Subject> <predicate>' keys listed in the <Format> block of a template.
+
+    Args:
+        template (str): The prompt template text.
+
+    Returns:
+        list: The keys in order, e.g. 'Person has_last_name'.
+    """
+    fields = []
+    in_format = False
+    for line in template.splitlines():
+        line = line.strip()
+        if line == '<Format>:':
+            in_format = True
+        elif in_format:
+            if not line:
+                break
+            fields.append(line.split(' <', 1)[0].strip())
+    return fields
+
+
+def field_label_key(text):
+    """
+    Returns the key that matches a <Format> placeholder with its <Descriptions> label,
+    e.g. 'Father’s_Name' and 'Father’s name' both give 'fathersname'.
+    """
+    return re.sub(r'[^a-z]', '', text.lower())
+
+
+def exclude_fields(template, fields):
+    """
+    Returns the template without the <Format> lines of the given fields, and without
+    the <Descriptions> lines that no remaining field refers to.
+
+    Args:
+        template (str): The prompt template text.
+        fields (iterable): '<Subject> <predicate>' keys as returned by format_fields().
+
+    Returns:
+        str: The shorter template.
+    """
+    excluded = {_compact(field) for field in fields}
+    if not excluded:
+        return template
+
+    kept_lines = []
+    kept_labels = set()
+    dropped_labels = set()
+    section = None
+    for line in template.split('\n'):
+        stripped = line.strip()
+        if stripped in ('<Format>:', '<Descriptions>:'):
+            section = stripped
+        elif section == '<Format>:' and ' <' in stripped:
+            key, placeholder = stripped.split(' <', 1)
+            labels = kept_labels
+            if _compact(key) in excluded:
+                labels = dropped_labels
+                line = None
+            labels.add(field_label_key(placeholder))
+        elif section == '<Format>:' and stripped:
+            section = None
+        elif section == '<Descriptions>:' and ':' in stripped:
+            label = field_label_key(stripped.split(':', 1)[0])
+            if label in dropped_labels and label not in kept_labels:
+                line = None
+        if line is not None:
+            kept_lines.append(line)
+    return '\n'.join(kept_lines)
+
+
+# Separates the column names and the values in the compact row format.
+VALUE_SEPARATOR = " | "
+
+
+def _cell(value):
+    # Line breaks inside a table cell come out of the Markdown as '<br>'
+    return ' '.join(str(value).replace('<br>', ' ').split())
+
+
+def format_header(row):
+    """
+    Returns the column names of a row dict as one delimited line.
+    """
+    return VALUE_SEPARATOR.join(_cell(column) for column in row)
+
+
+def format_values(row):
+    """
+    Returns the values of a row dict as one delimited line, in the order of
+    format_header(). Anything else is returned as str(row).
+    """
+    if not isinstance(row, dict):
+        return str(row)
+    return VALUE_SEPARATOR.join(_cell(value) for value in row.values())
+
+
+def format_row(content):
+    """
+    Returns the compact form of one row: the header line followed by the values line.
+
+    Unlike the dict repr, empty columns and quoting cost almost nothing, and a batch
+    of rows can share a single header line (see batching.format_batch()).
+    """
+    if not isinstance(content, dict):
+        return str(content)
+    return format_header(content) + "\n" + format_values(content)
+
+
+def _compact(text):
+    return ''.join(text.split())
+
+
+class CompiledPrompt:
+    """
+    A prompt template bound to the intro text of one document.
+
+    The prefix is built once; render_row() only fills in the row slot.
+    """
+
+    def __init__(self, prefix, fields=None):
+        self.prefix = prefix
+        self.fields = fields or []
+        # Repeated groups (e.g. Position_assignment_<N>) have no fixed number of lines
+        self._required = [_compact(field) for field in self.fields]
+        self._can_be_complete = bool(self.fields) and not any('<' in field for field in self.fields)
+
+    def render_row(self, content, instructions=""):
+        """
+        Returns the per-row part of the prompt for content.
+        """
+        return "\n<document_content>\n" + format_row(content) + "\n</document_content>" + instructions
+
+    def render(self, content, instructions=""):
+        """
+        Returns the whole prompt (prefix and row) as a single string.
+        """
+        return self.prefix + "\n" + self.render_row(content, instructions)
+
+    def fields_filled(self, text):
+        """
+        Returns True once every <Format> field has a complete output line in text.
+
+        Used to stop reading a streamed single-row response early. Always False for
+        templates with repeated groups, whose length is not known in advance.
+        """
+        if not self._can_be_complete:
+            return False
+
+        complete_lines = _compact(text.rsplit('\n', 1)[0]) if '\n' in text else ''
+        return all(field in complete_lines for field in self._required)
+
+
+def compile_prompt(name, first_paragraph, exclude=()):
+    """
+    Compiles the named template for one document.
+
+    Args:
+        name (str): Key of the template in PROMPTS.
+        first_paragraph (str): The introductory text of the document.
+        exclude (iterable): <Format> fields left out of the prompt because they are
+            filled without the model (see llms/prefill.py).
+
+    Returns:
+        CompiledPrompt: The compiled prompt.
+    """
+    if name not in PROMPTS:
+        raise ValueError(f"Unknown prompt template '{name}', expected one of {list(PROMPTS)}")
+
+    template = exclude_fields(PROMPTS[name], exclude)
+    return CompiledPrompt(first_paragraph + " " + template, format_fields(template))
@@ -0,0 +1,225 @@
+import random
+import threading
+import time
+
+# Per-model request and token quotas, keyed by the model names of llms/registry.py.
+# Set them close to the account's Bedrock quotas; missing values fall back to DEFAULT_RATE_LIMIT.
+DEFAULT_RATE_LIMIT = {
+    'requests_per_minute': 100,
+    'tokens_per_minute': 200000,
+    'initial_concurrency': 8,
+    'max_concurrency': 32
+}
+
+RATE_LIMITS = {
+    'claude3.7': {'requests_per_minute': 50, 'tokens_per_minute': 100000},
+    'claude3.5': {'requests_per_minute': 50, 'tokens_per_minute': 100000},
+    'claude4': {'requests_per_minute': 50, 'tokens_per_minute': 100000},
+    'llama': {'requests_per_minute': 400, 'tokens_per_minute': 300000},
+    'deepseek': {'requests_per_minute': 100, 'tokens_per_minute': 200000}
+}
+
+# Error codes that mean the request was rejected because of a quota or a temporary overload.
+THROTTLING_ERROR_CODES = (
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException'
+)
+
+# Retry policy for throttled requests (exponential back-off with full jitter).
+MAX_RETRIES = 8
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+
+def is_throttling_error(error):
+    """
+    Returns True if error is a throttling or temporary-overload error from Bedrock.
+    """
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in THROTTLING_ERROR_CODES or type(error).__name__ in THROTTLING_ERROR_CODES
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most capacity tokens.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1):
+        """
+        Blocks until amount tokens are available and takes them.
+
+        Requests larger than the capacity are capped at the capacity, so they can
+        still run once the bucket is full.
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            self._sleep(wait)
+
+    def adjust(self, amount):
+        """
+        Gives back (amount > 0) or takes (amount < 0) tokens, e.g. once the real
+        token count of a request is known. The balance may go negative.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AimdConcurrency:
+    """
+    Concurrency limit with additive increase and multiplicative decrease.
+
+    Every `limit` successful requests raise the limit by one; every throttled
+    request halves it. acquire()/release() work like a semaphore of that size.
+    """
+
+    def __init__(self, initial, minimum=1, maximum=64, decrease=0.5):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit:
+                self._successes = 0
+                self.limit = min(self.maximum, self.limit + 1)
+                self._condition.notify_all()
+
+    def on_throttle(self):
+        with self._condition:
+            self._successes = 0
+            self.limit = max(self.minimum, int(self.limit * self.decrease))
+
+
+class RateLimiter:
+    """
+    Schedules the Bedrock calls of one model within its request and token quotas.
+
+    Each call waits for a request token, for its estimated tokens and for a free
+    slot of the AIMD concurrency limit. Throttled calls shrink the concurrency
+    limit and are retried after a jittered exponential back-off.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, initial_concurrency=8,
+                 max_concurrency=32, max_retries=MAX_RETRIES, base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.requests = TokenBucket(requests_per_minute, clock=clock, sleep=sleep) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock, sleep=sleep) if tokens_per_minute else None
+        self.concurrency = AimdConcurrency(initial_concurrency, maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttled = 0
+        self._sleep = sleep
+
+    def backoff(self, attempt):
+        """
+        Returns the delay before retry number attempt (full jitter).
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, send, estimated_tokens=0, count_tokens=None):
+        """
+        Runs send() within the quotas, retrying it when it is throttled.
+
+        Args:
+            send (callable): Makes the request and returns its result.
+            estimated_tokens (int): Tokens taken from the token bucket before the request.
+            count_tokens (callable): Optional function returning the real token count of a
+                result; the difference to the estimate is settled with the token bucket.
+
+        Returns:
+            The result of send().
+        """
+        attempt = 0
+        while True:
+            if self.requests is not None:
+                self.requests.acquire(1)
+            if self.tokens is not None:
+                self.tokens.acquire(estimated_tokens)
+
+            self.concurrency.acquire()
+            try:
+                result = send()
+            except Exception as e:
+                if not is_throttling_error(e) or attempt >= self.max_retries:
+                    raise
+                self.concurrency.on_throttle()
+                self.throttled += 1
+            else:
+                self.concurrency.on_success()
+                if self.tokens is not None and count_tokens is not None:
+                    actual_tokens = count_tokens(result)
+                    if actual_tokens is not None:
+                        self.tokens.adjust(estimated_tokens - actual_tokens)
+                return result
+            finally:
+                self.concurrency.release()
+
+            self._sleep(self.backoff(attempt))
+            attempt += 1
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name):
+    """
+    Returns the process-wide RateLimiter of the named model, configured from RATE_LIMITS.
+
+    Sharing one limiter per model keeps concurrent runs of the same model within
+    the same quota.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = RateLimiter(**dict(DEFAULT_RATE_LIMIT, **RATE_LIMITS.get(name, {})))
+            _limiters[name] = limiter
+        return limiter
+
+
+def set_rate_limiter(name, limiter):
+    """
+    Replaces the shared RateLimiter of the named model, e.g. with other quotas for a benchmark.
+    """
+    with _limiters_lock:
+        _limiters[name] = limiter
@@ -0,0 +1,44 @@
+import importlib
+
+# Maps the model names accepted by main.py to the module and class of their adapter.
+# Modules are only imported when their model is selected.
+MODEL_ADAPTERS = {
+    'claude3.7': ('llms.claude3_7', 'Claude37Adapter'),
+    'claude3.5': ('llms.claude3_5', 'Claude35Adapter'),
+    'claude4': ('llms.claude4_sonnet', 'Claude4SonnetAdapter'),
+    'llama': ('llms.llama', 'LlamaAdapter'),
+    'deepseek': ('llms.deepseek', 'DeepSeekAdapter')
+}
+
+
+def available_models():
+    """
+    Returns the names of all registered models.
+    """
+    return list(MODEL_ADAPTERS)
+
+
+def get_adapter_class(name):
+    """
+    Imports and returns the adapter class registered under name.
+    """
+    if name not in MODEL_ADAPTERS:
+        raise ValueError(f"Unknown model '{name}', expected one of {available_models()}")
+
+    module_name, class_name = MODEL_ADAPTERS[name]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+def get_adapter(name, **kwargs):
+    """
+    Returns a new adapter instance for the model registered under name.
+
+    Args:
+        name (str): The model name, e.g. 'claude3.7' or 'llama'.
+        **kwargs: Passed to the adapter constructor.
+
+    Returns:
+        ModelAdapter: The adapter.
+    """
+    return get_adapter_class(name)(**kwargs)
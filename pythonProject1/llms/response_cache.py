@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Default location of the cache, relative to the working directory like data/ and outputs/.
+CACHE_PATH = "cache/responses.sqlite"
+
+# Entries not used for this many seconds are evicted.
+MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+
+# Once the stored response bodies exceed this size, the least recently used ones are evicted.
+MAX_SIZE_BYTES = 500 * 1024 * 1024
+
+# Number of writes between two eviction passes.
+EVICT_EVERY = 200
+
+# Request keys of the output token budget. They are left out of the cache key, so a
+# learned budget (see llms/generation_profiles.py) does not invalidate cached responses.
+BUDGET_KEYS = ('max_tokens', 'max_gen_len')
+
+# 'use' reads and writes the cache, 'refresh' skips reading but stores the new
+# response, 'bypass' does not touch the cache at all.
+CACHE_MODES = ('use', 'refresh', 'bypass')
+
+
+def make_cache_key(model_id, body):
+    """
+    Returns the content hash identifying a model invocation.
+
+    The request body holds both the generation parameters and the final prompt,
+    so it is hashed in canonical form (sorted keys) together with the model ID.
+    The output token budget (BUDGET_KEYS) is not part of the key.
+
+    Args:
+        model_id (str): The Bedrock model or inference profile ID.
+        body (str): The JSON request body sent to invoke_model.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    request = {key: value for key, value in json.loads(body).items() if key not in BUDGET_KEYS}
+    canonical_body = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256()
+    digest.update(model_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(canonical_body.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent SQLite store of raw model response bodies keyed by make_cache_key().
+
+    A single connection is shared by all threads and guarded by a lock, so the
+    cache can be used from the concurrent row engine.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_age_seconds=MAX_AGE_SECONDS, max_size_bytes=MAX_SIZE_BYTES):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " model_id TEXT NOT NULL,"
+                " body BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.evict()
+
+    def get(self, key):
+        """
+        Returns the cached response body for key, or None if it is not cached.
+        """
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return bytes(row[0])
+
+    def put(self, key, model_id, body):
+        """
+        Stores the raw response body for key.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model_id, body, size, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_id, sqlite3.Binary(body), len(body), now, now)
+            )
+            self._writes += 1
+            evict_now = self._writes % EVICT_EVERY == 0
+        if evict_now:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes entries older than max_age_seconds, then the least recently used
+        entries until the total size is below max_size_bytes.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM responses WHERE last_used < ?", (time.time() - self.max_age_seconds,)
+            )
+            total_size = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total_size <= self.max_size_bytes:
+                return
+
+            rows = self._connection.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+            stale_keys = []
+            for key, size in rows:
+                if total_size <= self.max_size_bytes:
+                    break
+                stale_keys.append((key,))
+                total_size -= size
+            self._connection.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+
+    def clear(self):
+        """
+        Removes every cached response.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Returns the process-wide ResponseCache stored at CACHE_PATH.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+
+# Number of records kept in memory before they are written to the file.
+BUFFER_SIZE = 20
+
+# Maximum number of seconds a record waits in the buffer.
+FLUSH_INTERVAL = 2.0
+
+
+class JsonlResultSink:
+    """
+    Appends one JSON record per row to a JSONL file as the rows complete.
+
+    Records are buffered in memory up to BUFFER_SIZE records or FLUSH_INTERVAL
+    seconds, so at most a small, bounded part of a run is not yet on disk. Use
+    write() as the on_row callback of ModelAdapter.run().
+
+    Each record has the fields row_index, model, model_id, text, usage, latency,
+    retries, cached, batch_rows and completed_at.
+    """
+
+    def __init__(self, path, model, row_offset=0, append=False, buffer_size=BUFFER_SIZE,
+                 flush_interval=FLUSH_INTERVAL, model_id=None):
+        """
+        Args:
+            path (str): The JSONL file to write.
+            model (str): The model name stored in every record.
+            row_offset (int): Added to the row index, e.g. when only a slice of the rows is run.
+            append (bool): Append to an existing file instead of starting a new one.
+            buffer_size (int): Maximum number of buffered records.
+            flush_interval (float): Maximum number of seconds between two writes.
+            model_id (str): The model ID stored in records whose result does not carry one.
+        """
+        self.path = path
+        self.model = model
+        self.model_id = model_id
+        self.row_offset = row_offset
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, row_index, result, extra=None):
+        """
+        Adds the record of one row.
+
+        Args:
+            row_index (int): Index of the row in the data passed to the model.
+            result (CallResult): The result of the row.
+            extra (dict): Optional fields added to (or replacing those of) the record.
+        """
+        record = {
+            "row_index": row_index + self.row_offset,
+            "model": self.model,
+            "model_id": result.model_id or self.model_id,
+            "text": result.text,
+            "usage": result.usage,
+            "latency": result.latency,
+            "retries": result.retries,
+            "cached": result.cached,
+            "batch_rows": result.batch_rows,
+            "completed_at": time.time()
+        }
+        if extra:
+            record.update(extra)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            self.written += 1
+            self._buffer.append(line)
+            if (len(self._buffer) >= self.buffer_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def flush(self):
+        """
+        Writes all buffered records to disk.
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer = []
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """
+        Flushes the buffered records and closes the file.
+        """
+        with self._lock:
+            self._flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_records(path):
+    """
+    Yields the records of a JSONL result file one at a time.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_text_output(jsonl_path, text_path):
+    """
+    Derives the plain-text output (responses in row order, separated by blank lines)
+    from a JSONL result file. If a row has several records, the last one wins.
+
+    Args:
+        jsonl_path (str): The JSONL result file.
+        text_path (str): The .txt file to write.
+    """
+    texts = {}
+    for record in read_records(jsonl_path):
+        texts[record["row_index"]] = record["text"]
+
+    with open(text_path, "w", encoding="utf-8") as f:
+        for row_index in sorted(texts):
+            f.write(texts[row_index] + "\n\n\n")
@@ -0,0 +1,177 @@
+import json
+import os
+import sqlite3
+import threading
+
+from llms.result_sink import read_records
+from llms.triples import INTEGER_COLUMNS, get_schema, parse_response
+
+# File name of the store inside the output directory.
+RESULTS_FILE = "results.sqlite"
+
+# Columns of every table that identify the row.
+KEY_COLUMNS = ("document", "model", "row_index")
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_type(column):
+    return "INTEGER" if column in INTEGER_COLUMNS else "TEXT"
+
+
+class ResultStore:
+    """
+    SQLite store of the typed row records of every model, one table per prompt template.
+
+    <template>_rows has one row per (document, model, row_index) with a column per
+    <Format> field, plus invalid_fields (JSON list), invalid_count and unparsed_lines.
+    Repeated groups such as Position_assignment_<N> go to <template>_<group> with a
+    group_index column. Comparing the models over thousands of rows is then a single
+    query, e.g.
+
+        SELECT a.row_index, a.grade, b.grade FROM hiring_rows a JOIN hiring_rows b
+        USING (document, row_index) WHERE a.model = 'claude4' AND b.model = 'llama'
+        AND a.grade IS NOT b.grade
+
+    A single connection is shared by all threads and guarded by a lock, like the
+    response cache.
+    """
+
+    def __init__(self, path=RESULTS_FILE):
+        self.path = path
+        self._tables = set()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+
+    def _ensure_table(self, table, columns, extra_key=()):
+        """
+        Creates table, or adds the columns a changed template has introduced.
+        """
+        if table in self._tables:
+            return
+
+        key = KEY_COLUMNS + tuple(extra_key)
+        definitions = [f"{_quote(name)} {'INTEGER' if name in ('row_index', 'group_index') else 'TEXT'} NOT NULL"
+                       for name in key]
+        definitions += [f"{_quote(name)} {column_type}" for name, column_type in columns]
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({', '.join(definitions)}, "
+            f"PRIMARY KEY ({', '.join(_quote(name) for name in key)}))"
+        )
+        existing = {info[1] for info in self._connection.execute(f"PRAGMA table_info({_quote(table)})")}
+        for name, column_type in columns:
+            if name not in existing:
+                self._connection.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(name)} {column_type}")
+        self._tables.add(table)
+
+    def write(self, document, model, template, rows, model_id=None):
+        """
+        Stores the records of one model's rows, replacing earlier records of the same rows.
+
+        Args:
+            document (str): The PDF the rows come from.
+            model (str): The model name.
+            template (str): The prompt template the rows were run with, e.g. 'hiring'.
+            rows (iterable): (row_index, RowRecord) pairs.
+            model_id (str): The Bedrock model ID, stored with every row.
+
+        Returns:
+            int: The number of stored rows.
+        """
+        schema = get_schema(template)
+        row_table = f"{template}_rows"
+        row_columns = [(column, _column_type(column)) for column in schema.columns]
+        row_columns += [("model_id", "TEXT"), ("invalid_fields", "TEXT"), ("invalid_count", "INTEGER"),
+                        ("unparsed_lines", "INTEGER")]
+        row_names = list(KEY_COLUMNS) + [name for name, _ in row_columns]
+        insert_row = (f"INSERT OR REPLACE INTO {_quote(row_table)} ({', '.join(map(_quote, row_names))}) "
+                      f"VALUES ({', '.join('?' * len(row_names))})")
+
+        group_inserts = {}
+        for group, columns in schema.groups.items():
+            names = list(KEY_COLUMNS) + ["group_index"] + columns
+            group_inserts[group] = (f"INSERT INTO {_quote(f'{template}_{group}')} ({', '.join(map(_quote, names))}) "
+                                    f"VALUES ({', '.join('?' * len(names))})")
+
+        row_values = []
+        group_values = {group: [] for group in schema.groups}
+        for row_index, record in rows:
+            key = (document, model, row_index)
+            row_values.append(key + tuple(record.values.get(column) for column in schema.columns)
+                              + (model_id, json.dumps(record.invalid, ensure_ascii=False), len(record.invalid),
+                                 record.unparsed))
+            for group, items in record.groups.items():
+                for group_index, values in items.items():
+                    group_values[group].append(key + (group_index,) + tuple(values.get(column)
+                                                                             for column in schema.groups[group]))
+
+        with self._lock, self._connection:
+            self._ensure_table(row_table, row_columns)
+            for group, columns in schema.groups.items():
+                group_table = f"{template}_{group}"
+                self._ensure_table(group_table, [(column, _column_type(column)) for column in columns],
+                                   extra_key=("group_index",))
+                # The groups of a re-run row replace the old ones, even if there are fewer now
+                self._connection.executemany(
+                    f"DELETE FROM {_quote(group_table)} WHERE document = ? AND model = ? AND row_index = ?",
+                    [values[:3] for values in row_values]
+                )
+                self._connection.executemany(group_inserts[group], group_values[group])
+            self._connection.executemany(insert_row, row_values)
+        return len(row_values)
+
+    def ingest(self, results_path, document, model, template, model_id=None):
+        """
+        Parses the responses of a JSONL result file (see result_sink.py) and stores them.
+        If a row has several records, the last one wins.
+
+        Returns:
+            tuple: (stored rows, rows with at least one invalid field).
+        """
+        schema = get_schema(template)
+        records = {}
+        for result in read_records(results_path):
+            records[result["row_index"]] = parse_response(result["text"], schema)
+            model_id = model_id or result.get("model_id")
+
+        stored = self.write(document, model, template, sorted(records.items()), model_id=model_id)
+        return stored, sum(1 for record in records.values() if record.invalid)
+
+    def agreement(self, template, reference, document=None):
+        """
+        Returns, per model, the share of the rows shared with the reference model on
+        which every <Format> column has the same value.
+
+        Args:
+            template (str): The prompt template, e.g. 'hiring'.
+            reference (str): The model the others are compared with.
+            document (str): Compare only the rows of this PDF.
+
+        Returns:
+            dict: {model: {'rows': shared rows, column: share of equal values, ...}}.
+        """
+        columns = get_schema(template).columns
+        table = _quote(f"{template}_rows")
+        equal = ", ".join(f"AVG(a.{_quote(column)} IS b.{_quote(column)})" for column in columns)
+        query = (f"SELECT b.model, COUNT(*), {equal} FROM {table} a JOIN {table} b USING (document, row_index) "
+                 f"WHERE a.model = ? AND b.model != ?" + (" AND a.document = ?" if document else "") +
+                 " GROUP BY b.model ORDER BY b.model")
+        params = [reference, reference] + ([document] if document else [])
+
+        with self._lock:
+            result = self._connection.execute(query, params).fetchall()
+        return {row[0]: dict({"rows": row[1]}, **{column: round(share, 4) for column, share in zip(columns, row[2:])})
+                for row in result}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
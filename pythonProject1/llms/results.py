@@ -0,0 +1,45 @@
+class CallResult:
+    """
+    The text returned for a row (or a batch of rows) with the usage and timing of the call.
+
+    Attributes:
+        text (str): The response text.
+        usage (dict): Token counts of the call ('input_tokens', 'output_tokens', ...), or None.
+        latency (float): Seconds from sending the request to having the text.
+        cached (bool): Whether the response came from the response cache.
+        batch_rows (int): Number of rows that shared the call.
+        model_id (str): The Bedrock model or inference profile ID that was called.
+        retries (int): Number of times the request was retried after being throttled.
+        hedged (bool): Whether a copy of the request was also sent to an alternate target
+            (see llms/hedging.py).
+        hedge_won (bool): Whether the alternate target answered first.
+        hedge_model (str): The registry name of the target that answered first, whose prices
+            the usage is billed at, or None.
+    """
+
+    __slots__ = ('text', 'usage', 'latency', 'cached', 'batch_rows', 'model_id', 'retries', 'hedged', 'hedge_won',
+                 'hedge_model')
+
+    def __init__(self, text, usage=None, latency=None, cached=False, batch_rows=1, model_id=None, retries=0,
+                 hedged=False, hedge_won=False, hedge_model=None):
+        self.text = text
+        self.usage = usage
+        self.latency = latency
+        self.cached = cached
+        self.batch_rows = batch_rows
+        self.model_id = model_id
+        self.retries = retries
+        self.hedged = hedged
+        self.hedge_won = hedge_won
+        self.hedge_model = hedge_model
+
+    def for_row(self, text, batch_rows):
+        """
+        Returns the result of one row of a batched call.
+        """
+        return CallResult(text, self.usage, self.latency, self.cached, batch_rows, self.model_id, self.retries,
+                          self.hedged, self.hedge_won, self.hedge_model)
+
+    def __repr__(self):
+        return (f"CallResult({self.text!r}, usage={self.usage!r}, latency={self.latency!r}, cached={self.cached!r}, "
+                f"retries={self.retries!r})")
@@ -0,0 +1,84 @@
+THINK_END_TAG = '</think>'
+
+# Key set in a streamed response that was closed before its last chunks, so its token
+# counts (message_delta, invocation metrics) were never received.
+STOPPED_EARLY = 'stopped_early'
+
+
+class ThinkFilter:
+    """
+    Drops the DeepSeek-R1 reasoning section from streamed text as it arrives.
+
+    Matches DeepSeekAdapter.parse_response(): everything up to the first </think>
+    is dropped and the rest is stripped. If the response has no </think> at all,
+    the whole text is kept.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._think_done = False
+        self._started = False
+
+    def feed(self, text):
+        """
+        Returns the part of text that is visible output.
+        """
+        if not self._think_done:
+            self._buffer += text
+            if THINK_END_TAG not in self._buffer:
+                return ''
+            text = self._buffer.split(THINK_END_TAG, 1)[1]
+            self._buffer = ''
+            self._think_done = True
+
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+    def finish(self, text):
+        """
+        Returns the final visible text once the stream has ended.
+        """
+        if not self._think_done:
+            return text + self._buffer
+        return text.rstrip()
+
+
+def read_stream(chunks, stream_text, text_filter=None, watch=None):
+    """
+    Reads a streamed model response chunk by chunk.
+
+    Args:
+        chunks (iterator): The decoded chunks (see invocation.invoke_model_stream).
+        stream_text (callable): Returns the text delta carried by one chunk.
+        text_filter (ThinkFilter): Optional filter applied to every delta.
+        watch (callable): Optional function called with the visible text received so
+            far whenever it grows; returning True stops reading the stream.
+
+    Returns:
+        tuple: (text, chunks, stopped_early) with the visible text, the list of
+               chunks read and whether the stream was closed by watch.
+    """
+    text = ''
+    seen_chunks = []
+
+    try:
+        for chunk in chunks:
+            seen_chunks.append(chunk)
+            delta = stream_text(chunk)
+            if text_filter is not None:
+                delta = text_filter.feed(delta)
+            if delta:
+                text += delta
+                if watch is not None and watch(text):
+                    return text, seen_chunks, True
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+    if text_filter is not None:
+        text = text_filter.finish(text)
+
+    return text, seen_chunks, False
@@ -0,0 +1,282 @@
+import functools
+import re
+import unicodedata
+
+from llms.prompts import PROMPTS, field_label_key
+
+# Answers that mean the field is not in the row.
+EMPTY_VALUES = {'', '-', '–', '—', '…', '...', 'n/a', 'na', 'none', 'null', 'unknown', 'not available',
+                'not specified', 'not mentioned', 'δεν αναφέρεται'}
+
+# Columns stored as integers instead of text.
+INTEGER_COLUMNS = {'working_hours_per_week'}
+
+# Columns whose value must match a pattern (after removing spaces).
+COLUMN_PATTERNS = {'id_employee_number': re.compile(r'\d{6}')}
+
+# Latin letters the models use in place of the Greek ones that look the same (e.g. "ΜΚ1" as "MK1").
+_HOMOGLYPHS = str.maketrans('abehikmnoptxyz', 'αβεηικμνοπτχυζ')
+
+_QUOTES = '“”«»"\'‘’„`'
+
+# 'Subject[_N] predicate value', e.g. 'Position_assignment_2 has_from_date 01/09/2024'
+_TRIPLE = re.compile(r'^[\s\-*•]*\**\s*([A-Za-z][A-Za-z_]*?)(?:_(\d+))?\s+((?:has|is|entails)_\s*[^\s:*]+)\**\s*:?\s*(.*?)\s*$')
+_DATE = re.compile(r'(\d{1,2})\s*[/.\-]\s*(\d{1,2})\s*[/.\-]\s*(\d{4}|\d{2})')
+_ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+_NUMBER = re.compile(r'\d+')
+_NUMBERED_VALUE = re.compile(r'(\D*)(\d+)')
+
+
+def _column_name(placeholder):
+    return re.sub(r'[^a-z]+', '_', placeholder.lower().replace('’', '')).strip('_')
+
+
+def normalize_value(value):
+    """
+    Returns the form of a value used to compare it with the allowed values: quotes,
+    accents and case are ignored, and Latin look-alikes count as Greek letters.
+    """
+    value = unicodedata.normalize('NFD', value.strip(_QUOTES + ' .'))
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.casefold().translate(_HOMOGLYPHS).split())
+
+
+def parse_allowed_values(description):
+    """
+    Returns the allowed values listed in a <Descriptions> text, or an empty list.
+
+    A '…' between two numbered values stands for the values in between, as in
+    '“ΜΚ1”, “ΜΚ2”, …, “ΜΚ19”'.
+    """
+    if 'Allowed values:' not in description:
+        return []
+
+    text = description.split('Allowed values:', 1)[1].strip().rstrip('>')
+    # The list ends with the sentence, e.g. '“Μειωμένου ωραρίου”. In some hiring decisions ...'
+    text = re.split(r'[.”"]\s+(?=[A-Z])', text, 1)[0]
+    items = [item.strip(_QUOTES + ' .') for item in text.split(',')]
+    items = [item for item in items if item]
+
+    values = []
+    for index, item in enumerate(items):
+        if item not in ('…', '...'):
+            values.append(item)
+            continue
+        before = _NUMBERED_VALUE.fullmatch(items[index - 1]) if index > 0 else None
+        after = _NUMBERED_VALUE.fullmatch(items[index + 1]) if index + 1 < len(items) else None
+        if before and after and before.group(1) == after.group(1):
+            values.extend(f"{before.group(1)}{number}"
+                          for number in range(int(before.group(2)) + 1, int(after.group(2))))
+    return values
+
+
+class FieldSpec:
+    """
+    One <Format> line of a template.
+
+    Attributes:
+        subject (str): The subject without the group number, e.g. 'Position_assignment'.
+        predicate (str): The predicate, e.g. 'has_from_date'.
+        group (str): Name of the repeated group (e.g. 'position_assignment'), or None.
+        column (str): Column name of the value, e.g. 'from_date'.
+        allowed (dict): normalize_value() of every allowed value mapped to the value, or empty.
+    """
+
+    __slots__ = ('subject', 'predicate', 'group', 'column', 'allowed')
+
+    def __init__(self, subject, predicate, group, column, allowed):
+        self.subject = subject
+        self.predicate = predicate
+        self.group = group
+        self.column = column
+        self.allowed = allowed
+
+    def convert(self, value):
+        """
+        Returns the typed value and whether it is valid.
+
+        Dates become 'YYYY-MM-DD', INTEGER_COLUMNS become int, values with allowed
+        values take the spelling of the allowed value. Invalid values are returned as given.
+        """
+        if self.allowed:
+            canonical = self.allowed.get(normalize_value(value))
+            return (value, False) if canonical is None else (canonical, True)
+
+        if self.column.endswith('_date'):
+            match = _ISO_DATE.search(value)
+            if match:
+                year, month, day = match.groups()
+            else:
+                match = _DATE.search(value)
+                if not match:
+                    return value, False
+                day, month, year = match.groups()
+                year = f"20{year}" if len(year) == 2 else year
+            if not (1 <= int(month) <= 12 and 1 <= int(day) <= 31):
+                return value, False
+            return f"{year}-{int(month):02d}-{int(day):02d}", True
+
+        if self.column in INTEGER_COLUMNS:
+            match = _NUMBER.search(value)
+            return (int(match.group()), True) if match else (value, False)
+
+        pattern = COLUMN_PATTERNS.get(self.column)
+        if pattern is not None:
+            compact = ''.join(value.split())
+            return (compact, True) if pattern.fullmatch(compact) else (value, False)
+
+        return value, True
+
+
+class TemplateSchema:
+    """
+    The typed record layout of a prompt template, read from its <Format> and <Descriptions>.
+
+    Attributes:
+        name (str): Key of the template in PROMPTS.
+        fields (list): The FieldSpec of every <Format> line, in order.
+        columns (list): Columns of the fields that occur once per row.
+        groups (dict): Columns of each repeated group (e.g. Position_assignment_<N>).
+    """
+
+    def __init__(self, name, template):
+        self.name = name
+        self.fields = []
+        self.columns = []
+        self.groups = {}
+        self._by_key = {}
+
+        format_lines = []
+        allowed_values = {}
+        section = None
+        for line in template.splitlines():
+            line = line.strip()
+            if line in ('<Format>:', '<Descriptions>:'):
+                section = line
+            elif section == '<Format>:' and line:
+                key, _, placeholder = line.partition(' <')
+                if not placeholder:
+                    section = None
+                    continue
+                subject, predicate = key.split(None, 1)
+                group = None
+                if re.search(r'_<[A-Z]>$', subject):
+                    subject = subject.rsplit('_', 1)[0]
+                    group = subject.lower()
+                format_lines.append((subject, ''.join(predicate.split()), group, placeholder.strip(' >')))
+            elif section == '<Format>:':
+                section = None
+            elif section == '<Descriptions>:' and ':' in line:
+                label, description = line.split(':', 1)
+                allowed_values[field_label_key(label)] = parse_allowed_values(description)
+
+        for subject, predicate, group, placeholder in format_lines:
+            allowed = {}
+            for value in allowed_values.get(field_label_key(placeholder), []):
+                allowed[normalize_value(value)] = value
+                # 'Πανεπιστημιακής Εκπαίδευσης (ΠΕ)' is also accepted as 'ΠΕ'
+                abbreviation = re.search(r'\(([^)]+)\)$', value)
+                if abbreviation:
+                    allowed.setdefault(normalize_value(abbreviation.group(1)), value)
+            spec = FieldSpec(subject, predicate, group, _column_name(placeholder), allowed)
+            self.fields.append(spec)
+            self._by_key[(subject.lower(), predicate.lower())] = spec
+            if group is None:
+                self.columns.append(spec.column)
+            else:
+                self.groups.setdefault(group, []).append(spec.column)
+
+    def lookup(self, subject, number, predicate):
+        """
+        Returns the FieldSpec of a response line and its group number, or (None, None).
+        """
+        predicate = ''.join(predicate.split()).lower()
+        if number is not None:
+            spec = self._by_key.get((subject.lower(), predicate))
+            if spec is not None:
+                return spec, int(number) if spec.group else None
+            subject = f"{subject}_{number}"
+        spec = self._by_key.get((subject.lower(), predicate))
+        # A repeated group answered without a number is its first item
+        return spec, (1 if spec is not None and spec.group else None)
+
+
+class RowRecord:
+    """
+    The typed fields of one response.
+
+    Attributes:
+        values (dict): Value of every answered column that occurs once per row.
+        groups (dict): Per repeated group, the values of each group number, e.g.
+            {'position_assignment': {1: {'from_date': '2024-09-01', ...}}}.
+        invalid (list): The fields whose value failed the check, e.g. 'grade' or 'position_1.status'.
+        unparsed (int): Non-empty lines that are not a field of the template.
+    """
+
+    __slots__ = ('values', 'groups', 'invalid', 'unparsed')
+
+    def __init__(self):
+        self.values = {}
+        self.groups = {}
+        self.invalid = []
+        self.unparsed = 0
+
+    def __repr__(self):
+        return (f"RowRecord({self.values!r}, groups={self.groups!r}, invalid={self.invalid!r}, "
+                f"unparsed={self.unparsed!r})")
+
+
+@functools.lru_cache(maxsize=None)
+def get_schema(name):
+    """
+    Returns the TemplateSchema of the named template in PROMPTS.
+    """
+    if name not in PROMPTS:
+        raise ValueError(f"Unknown prompt template '{name}', expected one of {list(PROMPTS)}")
+    return TemplateSchema(name, PROMPTS[name])
+
+
+def parse_response(text, schema):
+    """
+    Parses the 'Subject predicate value' lines of a response into a RowRecord.
+
+    The first answer of a field wins. Empty answers (see EMPTY_VALUES) leave the field
+    out, and values that fail the check of their field are kept as given and listed
+    in RowRecord.invalid.
+
+    Args:
+        text (str): The response text of one row.
+        schema (TemplateSchema): The schema of the prompt template the row was run with.
+
+    Returns:
+        RowRecord: The typed fields of the row.
+    """
+    record = RowRecord()
+    for line in (text or '').splitlines():
+        if not line.strip():
+            continue
+        match = _TRIPLE.match(line)
+        spec = number = None
+        if match:
+            subject, number_text, predicate, value = match.groups()
+            spec, number = schema.lookup(subject, number_text, predicate)
+        if spec is None:
+            record.unparsed += 1
+            continue
+
+        value = value.strip('<> ' + _QUOTES)
+        if value.casefold() in EMPTY_VALUES:
+            continue
+
+        if spec.group is None:
+            target, name = record.values, spec.column
+        else:
+            target = record.groups.setdefault(spec.group, {}).setdefault(number, {})
+            name = f"{spec.group}_{number}.{spec.column}"
+        if spec.column in target:
+            continue
+
+        target[spec.column], valid = spec.convert(value)
+        if not valid:
+            record.invalid.append(name)
+    return record
@@ -1,66 +1,720 @@
-from test_new_parser import extract_data_from_pdf
-from llms.claude3_7 import claude3_7
-from llms.claude3_5 import claude3_5
-from llms.claude4_sonnet import claude4_sonnet
-from llms.llama import llama
-from llms.deepseek import deepseek
+import argparse
+import glob
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from test_new_parser import extract_data_from_pdf, project_rows, stream_data_from_pdf
+from llms.accounting import PERCENTILES, UsageLedger, percentile, write_cost_report
+from llms.batch_inference import ingest_batch_output, write_batch_input
+from llms.cascade import RowValidator
+from llms.engine import MAX_CONCURRENCY
+from llms.hedging import hedging_report
+from llms.prefill import get_prefill
+from llms.registry import available_models, get_adapter, get_adapter_class
+from llms.result_store import RESULTS_FILE, ResultStore
+from llms.result_sink import JsonlResultSink, write_text_output
 
 pdf_path = "data/perilipsi_anaplirwth_meiwmenou.pdf"
 
-try:
-    first_paragraph, data = extract_data_from_pdf(pdf_path)
+# 'use' answers unchanged rows from the response cache, 'refresh' re-runs every row
+# and updates the cache, 'bypass' ignores the cache completely.
+cache_mode = 'use'
+
+# Read the responses as a stream and stop as soon as every field has been returned.
+stream = False
+
+# Send only the columns of PROMPT_COLUMNS (see test_new_parser.py) to the models.
+project_columns = True
+
+# Fill the fields that llms/prefill.py reads from the table and the intro text without
+# the models, and leave them out of the prompt.
+prefill_fields = True
+
+# Size max_tokens from the output lengths seen in earlier runs (see llms/generation_profiles.py)
+# instead of requesting each model's maximum.
+learn_budgets = True
+
+# Send calls that are slower than usual also to a sibling model or region and use the
+# first answer (see llms/hedging.py). Costs the tokens of the calls that lose.
+hedge_requests = False
+
+# Models of --cascade without a list, cheapest first: a row only goes to the next model
+# if the response of the previous one fails the checks of llms/cascade.py.
+cascade_models = ['llama', 'claude4']
 
-    if not first_paragraph.strip():
-        print("Warning: No text extracted from PDF. It might be image-based.")
+
+def extract(pdf_path, lazy=False):
+    """
+    Extracts the intro text and the table rows of a PDF, or exits if that fails.
+
+    With lazy=True the rows are a generator that converts and parses the PDF as
+    they are read (see test_new_parser.stream_data_from_pdf()).
+    """
+    try:
+        if lazy:
+            first_paragraph, data = stream_data_from_pdf(pdf_path)
+        else:
+            first_paragraph, data = extract_data_from_pdf(pdf_path)
+
+        if not first_paragraph.strip():
+            print("Warning: No text extracted from PDF. It might be image-based.")
+            exit(1)
+
+    except Exception as e:
+        print(f"Error extracting text from PDF: {e}")
         exit(1)
 
-except Exception as e:
-    print(f"Error extracting text from PDF: {e}")
-    exit(1)
-
-print("15 Data", data)
-
-print("Select the model you want by typing: 'claude3.7', 'claude3.5', 'claude4', 'llama', or 'deepseek'.")
-valid_models = ['claude3.7', 'claude3.5', 'claude4', 'llama', 'deepseek']
-model = input()
-
-while True:
-
-    while model not in valid_models:
-        print("Invalid model. Please type again: 'claude3.7', 'claude3.5', 'claude4', 'llama', or 'deepseek'.")
-        model = input()
-
-    if model == 'claude3.7':
-        claude3_7_response = claude3_7(first_paragraph, data[2:16])
-        with open("outputs/claude3_7.txt", "w", encoding="utf-8") as f:
-            f.write(claude3_7_response)
-        print("Claude 3.7 Done")
-    elif model == 'claude3.5':
-        claude3_5_response = claude3_5(first_paragraph, data[2:16])
-        with open("outputs/claude3_5.txt", "w", encoding="utf-8") as f:
-            f.write(claude3_5_response)
-        print("Claude 3.5 Done")
-    elif model == 'claude4':
-        claude_4_response = claude4_sonnet(first_paragraph, data[2:16])
-        with open("outputs/claude4_sonnet.txt", "w", encoding="utf-8") as f:
-            f.write(claude_4_response)
-        print("Claude 4 Done")
-    elif model == 'deepseek':
-        deepseek_response = deepseek(first_paragraph, data[2:16])
-        with open("outputs/deepseek.txt", "w", encoding="utf-8") as f:
-            f.write(deepseek_response)
-        print("Deepseek Done")
-    elif model == 'llama':
-        llama_response = llama(first_paragraph, data[2:16])
-        with open("outputs/llama.txt", "w", encoding="utf-8") as f:
-            f.write(llama_response)
-        print("Llama Done")
-
-    print("Would you like to continue with another model? yes/no")
-    answer = input().strip().lower()
-    if answer == 'yes':
-        print("Select the model you want by typing: 'claude3.7', 'claude3.5', 'claude4', 'llama', or 'deepseek'.")
-        model = input()
+    return first_paragraph, data
+
+
+def run_model(model, first_paragraph, data, output_dir="outputs", row_offset=0, progress_label=None, ledger=None,
+              store=None, document=None, prefill=prefill_fields, **options):
+    """
+    Runs one model over the rows and writes outputs/<model>.jsonl and outputs/<model>.txt.
+
+    Args:
+        model (str): The model name, e.g. 'claude3.7'.
+        first_paragraph (str): The intro text of the document.
+        data (iterable): The table rows to run (a list or a row iterator).
+        output_dir (str): Directory of the output files.
+        row_offset (int): Index of data[0] in the full table, stored in the JSONL records.
+        progress_label (str): Optional prefix of the progress lines.
+        ledger (UsageLedger): Collects the tokens, latency and retries of the calls for the cost report.
+        store (ResultStore): Receives the typed records parsed from the responses.
+        document (str): The PDF of the rows, the document key of the records in store.
+        prefill (bool): Fill the fields covered by the rules of llms/prefill.py for the PDF's
+            layout without the model.
+        **options: Passed to ModelAdapter.run() (max_workers, batch_size, cache_mode, stream, ...).
+
+    Returns:
+        dict: The model's entry of the run report.
+    """
+    adapter = get_adapter(model)
+    if prefill and document:
+        options["prefill"] = get_prefill(document, adapter.prompt_name, first_paragraph)
+    if ledger is None:
+        ledger = UsageLedger(model, adapter.model_id)
+
+    # Every row is appended to the JSONL file as it completes; the .txt output is derived from it
+    results_path = os.path.join(output_dir, f"{adapter.output_name}.jsonl")
+    text_path = os.path.join(output_dir, f"{adapter.output_name}.txt")
+
+    started = time.perf_counter()
+    with JsonlResultSink(results_path, adapter.name, row_offset=row_offset, model_id=adapter.model_id) as sink:
+        def on_row(index, result):
+            sink.write(index, result)
+            ledger.record_row(index, result)
+
+        # The results are only kept in the sink, so a row iterator is never held in memory as a whole
+        adapter.run(first_paragraph, data, on_row=on_row, on_call=ledger.record, progress_label=progress_label,
+                    keep_results=False, **options)
+    write_text_output(results_path, text_path)
+    wall_time = time.perf_counter() - started
+    rows = sink.written
+
+    entry = {
+        "rows": rows,
+        "wall_time": round(wall_time, 3),
+        "rows_per_second": round(rows / wall_time, 3) if wall_time > 0 else None,
+        "output": text_path
+    }
+    if store is not None:
+        _, entry["invalid_rows"] = store.ingest(results_path, document or results_path, adapter.name,
+                                                adapter.prompt_name, adapter.model_id)
+
+    print(f"{adapter.display_name} Done")
+
+    return entry
+
+
+def run_cascade(models, first_paragraph, data, output_dir="outputs", row_offset=0, progress_label=None,
+                ledgers=None, store=None, document=None, prefill=prefill_fields, **options):
+    """
+    Runs the rows through the models in order, cheapest first, and writes
+    outputs/cascade.jsonl and outputs/cascade.txt.
+
+    Every row goes to the first model. A response that fails the RowValidator checks
+    (see llms/cascade.py) sends the row on to the next model, and the last model's
+    response is kept either way. The record of each row has the model and tier that
+    answered it, the problems of its response, the problems that escalated it and the
+    sum of the call latencies of all tiers.
+
+    Args:
+        models (list): The model names, e.g. ['llama', 'claude4']. They must share a prompt template.
+        first_paragraph (str): The intro text of the document.
+        data (iterable): The table rows to run.
+        output_dir (str): Directory of the output files.
+        row_offset (int): Index of data[0] in the full table, stored in the JSONL records.
+        progress_label (str): Optional prefix of the progress lines.
+        ledgers (dict): {model: UsageLedger} receiving the calls of each tier for the cost report.
+        store (ResultStore): Receives the typed records, under the model name 'cascade'.
+        document (str): The PDF of the rows; selects the table columns the responses are checked against.
+        prefill (bool): Fill the fields covered by the rules of llms/prefill.py without the models.
+        **options: Passed to ModelAdapter.run() of every tier.
+
+    Returns:
+        dict: The cascade's entry of the run report, with the rows, latency and cost of every tier.
+    """
+    adapters = [get_adapter(model) for model in models]
+    template = adapters[0].prompt_name
+    data = list(data)
+    validator = RowValidator(template, document, first_paragraph)
+    if prefill and document:
+        options["prefill"] = get_prefill(document, template, first_paragraph)
+    if ledgers is None:
+        ledgers = {}
+
+    results_path = os.path.join(output_dir, "cascade.jsonl")
+    text_path = os.path.join(output_dir, "cascade.txt")
+
+    escalations = {index: [] for index in range(len(data))}
+    latencies = [0.0] * len(data)
+    pending = list(range(len(data)))
+    tiers = {}
+
+    started = time.perf_counter()
+    with JsonlResultSink(results_path, "cascade", row_offset=row_offset) as sink:
+        for tier, adapter in enumerate(adapters, 1):
+            ledger = ledgers.setdefault(adapter.name, UsageLedger(adapter.name, adapter.model_id))
+            last_tier = tier == len(adapters)
+            indices, pending = pending, []
+            unresolved = 0
+
+            def on_row(position, result):
+                nonlocal unresolved
+                index = indices[position]
+                ledger.record_row(index, result)
+                latencies[index] += result.latency or 0
+                problems = validator.problems(result.text, data[index])
+                if problems and not last_tier:
+                    escalations[index].append({"model": adapter.name, "problems": problems})
+                    pending.append(index)
+                    return
+                unresolved += bool(problems)
+                sink.write(index, result, extra={
+                    "model": adapter.name,
+                    "tier": tier,
+                    "problems": problems,
+                    "escalations": escalations.pop(index),
+                    "cascade_latency": round(latencies[index], 3)
+                })
+
+            tier_started = time.perf_counter()
+            if indices:
+                label = f"{progress_label} {adapter.name}" if progress_label else adapter.name
+                adapter.run(first_paragraph, [data[index] for index in indices], on_row=on_row,
+                            on_call=ledger.record, progress_label=label, keep_results=False, **options)
+            pending.sort()
+
+            usage = ledger.summary()
+            tiers[adapter.name] = {
+                "tier": tier,
+                "rows": len(indices),
+                "accepted": len(indices) - len(pending) - unresolved,
+                "escalated": len(pending),
+                "unresolved": unresolved,
+                "wall_time": round(time.perf_counter() - tier_started, 3),
+                "latency": usage["latency"],
+                "estimated_cost_usd": usage["estimated_cost_usd"]
+            }
+    write_text_output(results_path, text_path)
+    wall_time = time.perf_counter() - started
+    rows = sink.written
+
+    costs = [entry["estimated_cost_usd"] for entry in tiers.values() if entry["estimated_cost_usd"] is not None]
+    row_latencies = sorted(latencies)
+    entry = {
+        "models": models,
+        "rows": rows,
+        "wall_time": round(wall_time, 3),
+        "rows_per_second": round(rows / wall_time, 3) if wall_time > 0 else None,
+        "row_latency": {f"p{percent}": round(percentile(row_latencies, percent), 3) if row_latencies else None
+                        for percent in PERCENTILES},
+        "estimated_cost_usd": round(sum(costs), 6),
+        "estimated_cost_per_row_usd": round(sum(costs) / rows, 8) if rows else None,
+        "tiers": tiers,
+        "output": text_path
+    }
+    if store is not None:
+        _, entry["invalid_rows"] = store.ingest(results_path, document or results_path, "cascade", template)
+
+    print(f"\n{'Tier':<6}{'Model':<12}{'Rows':>7}{'Accepted':>10}{'Escalated':>11}{'Unresolved':>12}"
+          f"{'p50 (s)':>9}{'p95 (s)':>9}{'Cost ($)':>11}")
+    for model, tier_entry in tiers.items():
+        latency = tier_entry["latency"]
+        print(f"{tier_entry['tier']:<6}{model:<12}{tier_entry['rows']:>7}{tier_entry['accepted']:>10}"
+              f"{tier_entry['escalated']:>11}{tier_entry['unresolved']:>12}{latency['p50'] or 0:>9.2f}"
+              f"{latency['p95'] or 0:>9.2f}{tier_entry['estimated_cost_usd'] or 0:>11.4f}")
+    print(f"Cascade Done: {rows} rows, ${entry['estimated_cost_usd']:.4f}")
+
+    return entry
+
+
+def parse_rows(rows):
+    """
+    Parses a row range such as '2:16', ':100' or '5:' into a slice.
+    """
+    if not rows:
+        return slice(None)
+
+    start, _, stop = rows.partition(':')
+    return slice(int(start) if start else None, int(stop) if stop else None)
+
+
+def parse_model_concurrency(values):
+    """
+    Parses 'model=N' arguments into a dict of per-model concurrency limits.
+    """
+    limits = {}
+    for value in values or []:
+        model, _, limit = value.partition('=')
+        if model not in available_models() or not limit.isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid --model-concurrency '{value}', expected e.g. 'llama=16'")
+        limits[model] = int(limit)
+    return limits
+
+
+def extract_documents(args):
+    """
+    Extracts every PDF of args.pdf once.
+
+    Returns:
+        list: (path, first_paragraph, rows, row_offset) per PDF, with the rows limited to args.rows.
+    """
+    rows = parse_rows(args.rows)
+
+    documents = []
+    for path in args.pdf:
+        if args.lazy_rows:
+            first_paragraph, data = extract(path, lazy=True)
+            data, row_offset = itertools.islice(data, rows.start, rows.stop), rows.start or 0
+        else:
+            first_paragraph, data = extract(path)
+            data, row_offset = data[rows], rows.indices(len(data))[0]
+        if not args.all_columns:
+            data = project_rows(data, path)
+        documents.append((path, first_paragraph, data, row_offset))
+    return documents
+
+
+def document_output_dir(output_dir, path, document_count):
+    """
+    Returns the output directory of a PDF: output_dir itself, or a subdirectory per PDF
+    when several PDFs are processed.
+    """
+    if document_count == 1:
+        return output_dir
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0])
+
+
+def run_fan_out(args):
+    """
+    Extracts every PDF once and runs all selected models concurrently on the shared rows.
+
+    Each model processes the PDFs one after the other with its own concurrency limit,
+    so the whole run takes about as long as the slowest model.
+    """
+    model_concurrency = parse_model_concurrency(args.model_concurrency)
+    documents = extract_documents(args)
+    ledgers = {model: {path: UsageLedger(model, get_adapter(model).model_id) for path, _, _, _ in documents}
+               for model in args.models}
+    store = ResultStore(os.path.join(args.output_dir, RESULTS_FILE))
+
+    def run_all_documents(model):
+        started = time.perf_counter()
+        entries = {}
+        for path, first_paragraph, data, row_offset in documents:
+            output_dir = document_output_dir(args.output_dir, path, len(documents))
+            entries[path] = run_model(
+                model, first_paragraph, data, output_dir=output_dir, row_offset=row_offset, progress_label=model,
+                ledger=ledgers[model][path], store=store, document=path, prefill=not args.no_prefill,
+                learn_budgets=not args.fixed_max_tokens, hedge=args.hedge,
+                max_workers=model_concurrency.get(model, args.concurrency), batch_size=args.batch_size,
+                cache_mode=args.cache_mode, stream=args.stream
+            )
+        wall_time = time.perf_counter() - started
+        total_rows = sum(entry["rows"] for entry in entries.values())
+        return {
+            "rows": total_rows,
+            "wall_time": round(wall_time, 3),
+            "rows_per_second": round(total_rows / wall_time, 3) if wall_time > 0 else None,
+            "documents": entries
+        }
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(args.models)) as executor:
+        futures = {model: executor.submit(run_all_documents, model) for model in args.models}
+        models = {model: future.result() for model, future in futures.items()}
+    total_wall_time = time.perf_counter() - started
+    store.close()
+
+    report = {
+        "pdfs": args.pdf,
+        "rows": args.rows or ":",
+        "total_wall_time": round(total_wall_time, 3),
+        "models": models
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    report_path = os.path.join(args.output_dir, "run_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'Model':<12}{'Rows':>8}{'Wall time (s)':>16}{'Rows/s':>10}")
+    for model, entry in models.items():
+        print(f"{model:<12}{entry['rows']:>8}{entry['wall_time']:>16.2f}{entry['rows_per_second'] or 0:>10.2f}")
+    print(f"Total wall time: {total_wall_time:.2f} s, report written to {report_path}")
+    print(f"Typed records written to {store.path}")
+
+    write_cost_report(os.path.join(args.output_dir, "cost_report.json"), ledgers, hedging_report(args.models))
+
+    return report
+
+
+def run_cascade_documents(args):
+    """
+    Extracts every PDF and runs it through the model cascade of args.cascade, one PDF
+    after the other.
+    """
+    documents = extract_documents(args)
+    ledgers = {model: {} for model in args.cascade}
+    store = ResultStore(os.path.join(args.output_dir, RESULTS_FILE))
+
+    started = time.perf_counter()
+    entries = {}
+    for path, first_paragraph, data, row_offset in documents:
+        document_ledgers = {model: UsageLedger(model, get_adapter(model).model_id) for model in args.cascade}
+        for model, ledger in document_ledgers.items():
+            ledgers[model][path] = ledger
+        entries[path] = run_cascade(
+            args.cascade, first_paragraph, data, output_dir=document_output_dir(args.output_dir, path, len(documents)),
+            row_offset=row_offset, progress_label="cascade", ledgers=document_ledgers, store=store, document=path,
+            prefill=not args.no_prefill, learn_budgets=not args.fixed_max_tokens, hedge=args.hedge,
+            max_workers=args.concurrency, batch_size=args.batch_size, cache_mode=args.cache_mode, stream=args.stream
+        )
+    total_wall_time = time.perf_counter() - started
+    store.close()
+
+    report = {
+        "pdfs": args.pdf,
+        "rows": args.rows or ":",
+        "cascade": args.cascade,
+        "total_wall_time": round(total_wall_time, 3),
+        "documents": entries
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    report_path = os.path.join(args.output_dir, "run_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Total wall time: {total_wall_time:.2f} s, report written to {report_path}")
+
+    write_cost_report(os.path.join(args.output_dir, "cost_report.json"), ledgers, hedging_report(args.cascade))
+
+    return report
+
+
+def write_batch_inputs(args):
+    """
+    Writes a Bedrock batch inference input file per model and PDF instead of invoking the models.
+    """
+    documents = extract_documents(args)
+
+    for model in args.models:
+        adapter = get_adapter(model)
+        for path, first_paragraph, data, row_offset in documents:
+            input_dir = document_output_dir(args.batch_input_dir, path, len(documents))
+            input_path = os.path.join(input_dir, f"{adapter.output_name}.jsonl")
+            prefill = None if args.no_prefill else get_prefill(path, adapter.prompt_name, first_paragraph)
+            records = write_batch_input(adapter, first_paragraph, data, input_path, row_offset=row_offset,
+                                        prefill=prefill)
+            print(f"{adapter.display_name}: {records} records written to {input_path}")
+
+
+def ingest_batch_outputs(args):
+    """
+    Reads a Bedrock batch inference output file into the output files of a regular run.
+    """
+    adapter = get_adapter(args.models[0])
+    rows = ingest_batch_output(adapter, args.ingest_batch_output, args.output_dir, cache_mode=args.cache_mode)
+    print(f"{adapter.display_name}: {rows} rows ingested into {args.output_dir}")
+
+    store = ResultStore(os.path.join(args.output_dir, RESULTS_FILE))
+    store.ingest(os.path.join(args.output_dir, f"{adapter.output_name}.jsonl"), args.ingest_batch_output,
+                 adapter.name, adapter.prompt_name, adapter.model_id)
+    store.close()
+
+
+def collect_pdfs(pdf_dir=None, manifest=None):
+    """
+    Returns the PDF paths of a directory (sorted by name) and/or a manifest file
+    with one path per line ('#' starts a comment).
+    """
+    paths = []
+    if pdf_dir:
+        paths.extend(sorted(glob.glob(os.path.join(pdf_dir, "*.pdf"))))
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    paths.append(line)
+    return paths
+
+
+def extract_timed(path):
+    """
+    Extracts one PDF in a worker process and returns (intro_text, rows, seconds).
+    """
+    started = time.perf_counter()
+    # The documents are already spread over the processes, so each one is converted serially
+    first_paragraph, data = extract_data_from_pdf(path, max_workers=1)
+    return first_paragraph, data, time.perf_counter() - started
+
+
+def run_pipeline(args, paths):
+    """
+    Runs all selected models over many PDFs, overlapping extraction and inference.
+
+    The PDFs are extracted on a process pool. As soon as a document is extracted,
+    its rows are handed to the models while the remaining documents are still
+    being extracted. Each document gets its own output directory, and a summary
+    with throughput figures is written to <output_dir>/run_summary.json.
+
+    Args:
+        args: The parsed command line arguments.
+        paths (list): The PDF files.
+
+    Returns:
+        dict: The run summary.
+    """
+    if not paths:
+        print("No PDFs found")
+        exit(1)
+
+    rows = parse_rows(args.rows)
+    model_concurrency = parse_model_concurrency(args.model_concurrency)
+    documents = {path: {"status": "pending"} for path in paths}
+    ledgers = {model: {} for model in args.models}
+    store = ResultStore(os.path.join(args.output_dir, RESULTS_FILE))
+    lock = threading.Lock()
+
+    def run_document_model(path, model, first_paragraph, data, row_offset):
+        ledger = UsageLedger(model, get_adapter(model).model_id)
+        with lock:
+            ledgers[model][path] = ledger
+        entry = run_model(
+            model, first_paragraph, data, output_dir=document_output_dir(args.output_dir, path, len(paths)),
+            row_offset=row_offset, progress_label=f"{os.path.basename(path)} {model}", ledger=ledger,
+            store=store, document=path, prefill=not args.no_prefill, learn_budgets=not args.fixed_max_tokens,
+            hedge=args.hedge, max_workers=model_concurrency.get(model, args.concurrency),
+            batch_size=args.batch_size, cache_mode=args.cache_mode, stream=args.stream
+        )
+        with lock:
+            documents[path]["models"][model] = entry
+
+    started = time.perf_counter()
+    extracted_rows = 0
+    model_futures = []
+    with ProcessPoolExecutor(max_workers=args.extract_workers) as extractors, \
+            ThreadPoolExecutor(max_workers=args.documents_in_flight * len(args.models)) as runners:
+        extract_futures = {extractors.submit(extract_timed, path): path for path in paths}
+
+        for future in as_completed(extract_futures):
+            path = extract_futures[future]
+            try:
+                first_paragraph, data, extract_time = future.result()
+            except Exception as e:
+                print(f"Error extracting text from PDF {path}: {e}")
+                documents[path] = {"status": "failed", "error": str(e)}
+                continue
+
+            if not first_paragraph.strip():
+                print(f"Warning: No text extracted from {path}. It might be image-based.")
+                documents[path] = {"status": "failed", "error": "no text extracted"}
+                continue
+
+            row_offset = rows.indices(len(data))[0]
+            data = data[rows]
+            if not args.all_columns:
+                data = project_rows(data, path)
+            extracted_rows += len(data)
+            documents[path] = {
+                "status": "done",
+                "rows": len(data),
+                "extract_time": round(extract_time, 3),
+                "extracted_after": round(time.perf_counter() - started, 3),
+                "models": {}
+            }
+            print(f"Extracted {path}: {len(data)} rows in {extract_time:.2f} s")
+
+            for model in args.models:
+                model_futures.append(runners.submit(
+                    run_document_model, path, model, first_paragraph, data, row_offset
+                ))
+
+        extraction_time = time.perf_counter() - started
+        for future in model_futures:
+            future.result()
+
+    wall_time = time.perf_counter() - started
+    store.close()
+    done = [entry for entry in documents.values() if entry["status"] == "done"]
+    summary = {
+        "models": args.models,
+        "rows": args.rows or ":",
+        "documents": documents,
+        "documents_done": len(done),
+        "documents_failed": len(documents) - len(done),
+        "total_rows": extracted_rows,
+        "extraction_wall_time": round(extraction_time, 3),
+        "total_wall_time": round(wall_time, 3),
+        "documents_per_minute": round(len(done) * 60 / wall_time, 3) if wall_time > 0 else None,
+        "rows_per_second": round(extracted_rows * len(args.models) / wall_time, 3) if wall_time > 0 else None
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = os.path.join(args.output_dir, "run_summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{len(done)}/{len(documents)} documents, {extracted_rows} rows x {len(args.models)} models "
+          f"in {wall_time:.2f} s (extraction {extraction_time:.2f} s), "
+          f"{summary['rows_per_second'] or 0:.2f} rows/s, summary written to {summary_path}")
+
+    write_cost_report(os.path.join(args.output_dir, "cost_report.json"), ledgers, hedging_report(args.models))
+
+    return summary
+
+
+def run_interactive():
+    """
+    Asks for one model at a time and runs it on the hard-coded pdf_path.
+    """
+    first_paragraph, data = extract(pdf_path)
+    if project_columns:
+        data = project_rows(data, pdf_path)
+
+    print("15 Data", data)
+
+    print("Select the model you want by typing: 'claude3.7', 'claude3.5', 'claude4', 'llama', or 'deepseek'.")
+    valid_models = available_models()
+    model = input()
+    ledgers = {}
+    store = ResultStore(os.path.join("outputs", RESULTS_FILE))
+
+    while True:
+
+        while model not in valid_models:
+            print("Invalid model. Please type again: 'claude3.7', 'claude3.5', 'claude4', 'llama', or 'deepseek'.")
+            model = input()
+
+        ledger = UsageLedger(model, get_adapter(model).model_id)
+        run_model(model, first_paragraph, data[:14], cache_mode=cache_mode, stream=stream,
+                  ledger=ledger, store=store, document=pdf_path, learn_budgets=learn_budgets, hedge=hedge_requests)
+        ledgers.setdefault(model, {})[pdf_path] = ledger
+        write_cost_report(os.path.join("outputs", "cost_report.json"), ledgers, hedging_report(ledgers))
+
+        print("Would you like to continue with another model? yes/no")
+        answer = input().strip().lower()
+        if answer == 'yes':
+            print("Select the model you want by typing: 'claude3.7', 'claude3.5', 'claude4', 'llama', or 'deepseek'.")
+            model = input()
+        else:
+            print("Bye")
+            store.close()
+            break
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extract the tables of gazette PDFs and run LLMs over the rows. "
+                    "Without --pdf and --models the interactive mode is started."
+    )
+    parser.add_argument("--pdf", nargs="+", help="PDF file(s) to process")
+    parser.add_argument("--models", nargs="+", choices=available_models(), help="Models to run concurrently")
+    parser.add_argument("--cascade", nargs="*", metavar="MODEL",
+                        help="Run the models in order, cheapest first, and send a row on to the next model only "
+                             f"if its response fails the checks of llms/cascade.py (default: {' '.join(cascade_models)})")
+    parser.add_argument("--rows", help="Row range as start:stop, e.g. ':14' (default: all rows)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                        help="Concurrent requests per model (default: %(default)s)")
+    parser.add_argument("--model-concurrency", nargs="+", metavar="MODEL=N",
+                        help="Per-model concurrency overrides, e.g. llama=16 claude4=4")
+    parser.add_argument("--batch-size", type=int, default=1, help="Rows per request (default: %(default)s)")
+    parser.add_argument("--cache-mode", choices=['use', 'refresh', 'bypass'], default=cache_mode,
+                        help="Response cache mode (default: %(default)s)")
+    parser.add_argument("--stream", action="store_true", help="Use the response-stream API")
+    parser.add_argument("--output-dir", default="outputs", help="Output directory (default: %(default)s)")
+    parser.add_argument("--all-columns", action="store_true", default=not project_columns,
+                        help="Send every table column to the models instead of only the PROMPT_COLUMNS of the layout")
+    parser.add_argument("--no-prefill", action="store_true", default=not prefill_fields,
+                        help="Let the models answer every field, also those llms/prefill.py reads from the table")
+    parser.add_argument("--fixed-max-tokens", action="store_true", default=not learn_budgets,
+                        help="Request each model's maximum output tokens instead of the learned budget")
+    parser.add_argument("--hedge", action="store_true", default=hedge_requests,
+                        help="Send calls slower than the model's p95 also to the alternate targets of "
+                             "llms/hedging.py and use the first answer")
+    parser.add_argument("--lazy-rows", action="store_true",
+                        help="Parse the rows of --pdf while the model runs instead of extracting them first "
+                             "(bounded memory for very large PDFs; one model only, no parsed-PDF cache)")
+    parser.add_argument("--pdf-dir", help="Process every PDF of this directory as one pipelined batch")
+    parser.add_argument("--manifest", help="Process the PDFs listed in this file (one path per line)")
+    parser.add_argument("--extract-workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes extracting PDFs in --pdf-dir/--manifest runs (default: %(default)s)")
+    parser.add_argument("--documents-in-flight", type=int, default=2,
+                        help="Documents each model works on at the same time in --pdf-dir/--manifest runs "
+                             "(default: %(default)s)")
+    parser.add_argument("--batch-input-dir",
+                        help="Write Bedrock batch inference input files to this directory instead of invoking the models")
+    parser.add_argument("--ingest-batch-output", metavar="FILE",
+                        help="Read a Bedrock batch inference output file of the single model given by --models")
+
+    args = parser.parse_args(argv)
+    if args.cascade is not None:
+        args.cascade = args.cascade or cascade_models
+        unknown = [model for model in args.cascade if model not in available_models()]
+        if unknown:
+            parser.error(f"Unknown --cascade model(s) {unknown}, expected some of {available_models()}")
+        if len({get_adapter_class(model).prompt_name for model in args.cascade}) > 1:
+            parser.error("The --cascade models must use the same prompt template")
+        if (not args.pdf or args.models or args.lazy_rows or args.batch_input_dir or args.pdf_dir or args.manifest
+                or args.ingest_batch_output):
+            parser.error("--cascade needs --pdf and cannot be combined with --models, --lazy-rows, "
+                         "--batch-input-dir, --pdf-dir, --manifest or --ingest-batch-output")
+        return args
+    if args.lazy_rows:
+        rows = parse_rows(args.rows)
+        if not args.pdf or not args.models or len(args.models) != 1:
+            parser.error("--lazy-rows needs --pdf and exactly one model in --models")
+        if (rows.start or 0) < 0 or (rows.stop or 0) < 0:
+            parser.error("--lazy-rows does not support negative --rows")
+    if args.ingest_batch_output:
+        if not args.models or len(args.models) != 1 or args.pdf:
+            parser.error("--ingest-batch-output needs exactly one model in --models and no --pdf")
+    elif args.pdf_dir or args.manifest:
+        if not args.models or args.pdf or args.batch_input_dir:
+            parser.error("--pdf-dir/--manifest need --models and cannot be combined with --pdf or --batch-input-dir")
+    elif bool(args.pdf) != bool(args.models):
+        parser.error("--pdf and --models must be given together")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.ingest_batch_output:
+        ingest_batch_outputs(args)
+    elif args.pdf_dir or args.manifest:
+        run_pipeline(args, collect_pdfs(args.pdf_dir, args.manifest))
+    elif args.cascade:
+        run_cascade_documents(args)
+    elif args.pdf and args.batch_input_dir:
+        write_batch_inputs(args)
+    elif args.pdf:
+        run_fan_out(args)
     else:
-        print("Bye")
-        break
\ No newline at end of file
+        run_interactive()
@@ -0,0 +1,69 @@
+import gzip
+import hashlib
+import json
+import os
+
+# Default location of the parsed PDFs, next to the response cache.
+PDF_CACHE_DIR = "cache/pdfs"
+
+# Bytes read at a time while hashing a PDF.
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def pdf_cache_key(pdf_path, parser_version):
+    """
+    Returns the key of a parsed PDF.
+
+    The key covers the file content, the path (the table layout is chosen by file
+    name) and the parser version, so changing the PDF or the parser/cleaner gives
+    a new key.
+
+    Args:
+        pdf_path (str): The path to the PDF file.
+        parser_version (str): Version of the conversion, cleaning and parsing code.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(parser_version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(pdf_path.encode("utf-8"))
+    digest.update(b"\0")
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_file(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.json.gz")
+
+
+def load_parsed_pdf(key, cache_dir=PDF_CACHE_DIR):
+    """
+    Returns the cached result of a PDF (a dict with 'intro_text' and 'rows'), or
+    None if it is not cached or the file cannot be read.
+    """
+    try:
+        with gzip.open(_cache_file(key, cache_dir), "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, EOFError, ValueError):
+        return None
+
+
+def store_parsed_pdf(key, intro_text, rows, cache_dir=PDF_CACHE_DIR):
+    """
+    Stores the intro text and rows of a PDF as gzip-compressed JSON.
+
+    The file is written under a temporary name and renamed, so concurrent runs
+    never read a partly written entry.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_file(key, cache_dir)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    record = {"intro_text": intro_text, "rows": rows}
+    with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(record, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp_path, path)
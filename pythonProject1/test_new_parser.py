@@ -1,50 +1,206 @@
+import itertools
+import os
+import pymupdf
 import pymupdf4llm
 import re
 import pprint  # For pretty printing the output
+from concurrent.futures import ProcessPoolExecutor
+
+from pdf_cache import load_parsed_pdf, pdf_cache_key, store_parsed_pdf
+
+# Bump when _clean_greek_text(), the intro split or the table parsing changes, so cached
+# results are not reused. 2: the intro is split off line by line by _split_intro().
+# 3: table header and separator lines are no longer returned as rows.
+# 4: only lines matching the column headers are skipped as header lines.
+PARSER_VERSION = "4"
+
+# Documents with fewer pages are converted in a single pymupdf4llm call.
+PARALLEL_MIN_PAGES = 16
+
+# Number of page ranges per worker process, so a slow range does not leave the other workers idle.
+RANGES_PER_WORKER = 2
+
+
+# Direct character replacements for common mapping errors, applied in this order
+# (e.g. 'ΣΣ' -> 'ΣΤ' runs before 'ΣΤ' -> 'ΣΥ'). Add more mappings here if you discover other errors.
+CORRECTION_MAP = {
+    'ΣΣ': 'ΣΤ',
+    'Σσ': 'Τσ',
+    '΢': 'Σ',
+    'ΟΤ': 'ΟΥ',
+    'ΕΤ': 'ΕΥ',
+    'ΣΤ': 'ΣΥ',
+    'ΝΤ':'ΝΥ',
+    'ϊ':'ω',
+    'μζ':'με',
+    'ζγγ':'εγγ',
+    'ζξ':'εξ',
+    'αριιμ':'αριθμ',
+    'ΛΤΓ':'ΛΥΓ',
+    'ΕΥΗ':'ΕΤΗ',
+    'ΓΤ':'ΓΥ',
+    'ΣΠΤΡ':'ΣΠΥΡ',
+    'ΘΤΜ':'ΘΥΜ',
+    'ιήι':'ιθι',
+    'Τπ':'Υπ',
+    'άιμ':'άθμ',
+    'χφε':'χυε'
+}
+
+# Pages converted per pymupdf4llm call when a PDF is streamed (see stream_data_from_pdf()).
+STREAM_PAGE_CHUNK = 8
+
+# Column headers of the tables, chosen by the PDF's file name.
+COLUMN_HEADERS = {
+    "data/diorismos_monimwn.pdf": [
+        "Α/Α", "Επώνυμο", "Όνομα", "Πατρώνυμο", "Κλάδος",
+        "Μόρια", "Σειρά", "Περιφέρεια", "Δ.Υ.Π.Ε.",
+        "Αριθμός Βεβαίωσης ΔΙΠΑΑΔ", "Αριθμός Βεβαίωσης"
+    ],
+    "data/proslipsi_anaplhrwtwn.pdf": [
+        "A/A", "A/A ΡΟΗΣ", "Επώνυμο", "Όνομα", "Πατρώνυμο",
+        "Ειδικότητα", "Κλάδος", "Τριτεκνος", "Πίνακας",
+        "Σείρα Πίνακα", "Μορια Πίνακα", "Περιοχή Τοποθέτησης"
+    ],
+    "data/anaplhrwtes_eep_ebp.pdf": [
+        "A/A", "A/A ΡΟΗΣ", "Τύπος", "Επώνυμο", "Όνομα", "Πατρώνυμο",
+        "Κλάδος", "Σείρα Πίνακα", "Περιοχή Πρόσληψης", "Διευθυνση Εκπαίδευσης"
+    ],
+    "data/monimos_eep_ebp.pdf": [
+        "A/A", "Σειρά Διορισμού", "Επώνυμο", "Όνομα",
+        "Πατρώνυυμο", "Κλάδος Διορισμού", "Σειρά Πίνακα",
+        "Περιοχή/ΣΔΕΥ Διορισμού", "ΔΠΕ/ΔΔΕ/ΠΔΕ", "Τυπος Κενου",
+        "Αρ. Βεβ. Εγγραφής στο Μητρώο Ανθρώπινου Δυναμικού Ελληνικού Δημοσίου",
+        "Αρ. βεβ. ΔΙΠΑΑΔ/Υπουργείου Εσωτερικών"
+    ],
+    "data/topothethisi_monimou.pdf": [
+        "A/A", "Αριθμός Μητρώου", "Επώνυμο", "Όνομα", "Όνομα Πατρός",
+        "Οργανικι θέση", "Σύνολο Μορίων", "Δήμος ή Κοινότητα εντοπιότητας", "Μόρια Εντοπ",
+        "Δήμος ή Κοινώτητα Εργασίας Συζύγου", "Μόρια Συνθπ", "Ειδική Κατηγορία",
+        "Σχολείο Οριστικής Τοποθέτησης"
+    ],
+    "data/tpothetisi_anaplhrwtwn.pdf": [
+        "Επώνυμο", "Όνομα", "Κλάδος", "Μόρια Πίνακα", 'ΣΧΟΛΕΙΟ Τοποθέτησης',
+        "ΣΧΟΛΕΙΟ 1ης Διαθεσης", "ΣΧΟΛΕΙΟ 2ης Διαθεσης"
+    ],
+    "data/topothetisi_monimou_ksanthis.pdf": [
+        "A/A", "ΕΠΩΝΥΜΟ","ΟΝΟΜΑ" , "ΠΑΤΡΩΝΥΜΟ", "ΚΛΑΔΟΥ", "ΣΧΟΛΕΙΟ ΝΕΑΣ ΟΡΓΑΝΙΚΗΣ"
+    ],
+    "data/diathesi.pdf": [
+        "A/A", "ΕΠΩΝΥΜΟ","ΟΝΟΜΑ", "ΚΛΑΔΟΣ", "ΣΧΟΛΕΙΟ ΟΡΓΑΝΙΚΗΣ/ΠΡΟΣΩΡΙΝΗΣ ΤΟΠΟΘΕΤΗΣΗΣ", "ΣΧΟΛΕΙΟ ΔΙΑΘΕΣΗΣ ΓΙΑ ΣΥΜΠΛΗΡΩΣΗ ΩΡΑΡΙΟΥ",
+        "ΩΡΕΣ ΣΥΜΠΛΗΡΩΣΗΣ"
+    ]
+}
+
+# Columns sent to the models, chosen by the PDF's file name. Ranking columns (Α/Α, Μόρια,
+# Σειρά) and certificate numbers are not used by any <Format> field and are left out.
+PROMPT_COLUMNS = {
+    "data/diorismos_monimwn.pdf": [
+        "Επώνυμο", "Όνομα", "Πατρώνυμο", "Κλάδος", "Περιφέρεια", "Δ.Υ.Π.Ε."
+    ],
+    "data/proslipsi_anaplhrwtwn.pdf": [
+        "Επώνυμο", "Όνομα", "Πατρώνυμο", "Ειδικότητα", "Κλάδος", "Περιοχή Τοποθέτησης"
+    ],
+    "data/anaplhrwtes_eep_ebp.pdf": [
+        "Τύπος", "Επώνυμο", "Όνομα", "Πατρώνυμο", "Κλάδος", "Περιοχή Πρόσληψης", "Διευθυνση Εκπαίδευσης"
+    ],
+    "data/monimos_eep_ebp.pdf": [
+        "Επώνυμο", "Όνομα", "Πατρώνυυμο", "Κλάδος Διορισμού", "Περιοχή/ΣΔΕΥ Διορισμού", "ΔΠΕ/ΔΔΕ/ΠΔΕ",
+        "Τυπος Κενου"
+    ],
+    "data/topothethisi_monimou.pdf": [
+        "Αριθμός Μητρώου", "Επώνυμο", "Όνομα", "Όνομα Πατρός", "Οργανικι θέση", "Σχολείο Οριστικής Τοποθέτησης"
+    ],
+    "data/tpothetisi_anaplhrwtwn.pdf": [
+        "Επώνυμο", "Όνομα", "Κλάδος", 'ΣΧΟΛΕΙΟ Τοποθέτησης', "ΣΧΟΛΕΙΟ 1ης Διαθεσης", "ΣΧΟΛΕΙΟ 2ης Διαθεσης"
+    ],
+    "data/topothetisi_monimou_ksanthis.pdf": [
+        "ΕΠΩΝΥΜΟ", "ΟΝΟΜΑ", "ΠΑΤΡΩΝΥΜΟ", "ΚΛΑΔΟΥ", "ΣΧΟΛΕΙΟ ΝΕΑΣ ΟΡΓΑΝΙΚΗΣ"
+    ],
+    "data/diathesi.pdf": [
+        "ΕΠΩΝΥΜΟ", "ΟΝΟΜΑ", "ΚΛΑΔΟΣ", "ΣΧΟΛΕΙΟ ΟΡΓΑΝΙΚΗΣ/ΠΡΟΣΩΡΙΝΗΣ ΤΟΠΟΘΕΤΗΣΗΣ",
+        "ΣΧΟΛΕΙΟ ΔΙΑΘΕΣΗΣ ΓΙΑ ΣΥΜΠΛΗΡΩΣΗ ΩΡΑΡΙΟΥ", "ΩΡΕΣ ΣΥΜΠΛΗΡΩΣΗΣ"
+    ]
+}
+
+# The line under a table's header row, e.g. '|---|---|'.
+_TABLE_SEPARATOR_LINE = re.compile(r"\|-+[| -]")
+
+# Final-sigma normalization: 'ς' followed by a letter becomes 'σ', 'σ' at the end of a word becomes 'ς'.
+_SIGMA_INSIDE_WORD = re.compile(r'ς(?!\b)')
+_SIGMA_AT_WORD_END = re.compile(r'σ\b')
 
 
 def _clean_greek_text(text: str) -> str:
     """
     Corrects common character mapping errors in Greek text extracted from PDFs.
+
+    The corrections are applied one str.replace() pass per entry, in order. Each pass
+    is a C loop that returns the text unchanged when the pattern is absent, which
+    benchmarks/greek_cleaner.py measured to be faster than single-pass alternatives.
     """
-    # This dictionary handles direct, one-to-one character replacements.
-    # Add more mappings here if you discover other errors.
-    correction_map = {
-        'ΣΣ': 'ΣΤ',
-        'Σσ': 'Τσ',
-        '΢': 'Σ',
-        'ΟΤ': 'ΟΥ',
-        'ΕΤ': 'ΕΥ',
-        'ΣΤ': 'ΣΥ',
-        'ΝΤ':'ΝΥ',
-        'ϊ':'ω',
-        'μζ':'με',
-        'ζγγ':'εγγ',
-        'ζξ':'εξ',
-        'αριιμ':'αριθμ',
-        'ΛΤΓ':'ΛΥΓ',
-        'ΕΥΗ':'ΕΤΗ',
-        'ΓΤ':'ΓΥ',
-        'ΣΠΤΡ':'ΣΠΥΡ',
-        'ΘΤΜ':'ΘΥΜ',
-        'ιήι':'ιθι',
-        'Τπ':'Υπ',
-        'άιμ':'άθμ',
-        'χφε':'χυε'
-    }
-
-    for wrong, right in correction_map.items():
+    for wrong, right in CORRECTION_MAP.items():
         text = text.replace(wrong, right)
 
-    text = re.sub(r'ς(?!\b)', 'σ', text)
+    text = _SIGMA_INSIDE_WORD.sub('σ', text)
 
-    text = re.sub(r'σ\b', 'ς', text)
+    text = _SIGMA_AT_WORD_END.sub('ς', text)
 
     return text
 
 
+def page_ranges(page_count: int, range_count: int):
+    """
+    Splits the pages 0..page_count-1 into at most range_count contiguous, ordered ranges.
+    """
+    range_count = max(1, min(range_count, page_count))
+    size, extra = divmod(page_count, range_count)
+
+    ranges = []
+    start = 0
+    for i in range(range_count):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def _convert_page_range(pdf_path: str, pages: list) -> str:
+    return pymupdf4llm.to_markdown(pdf_path, pages=pages)
+
+
+def convert_pdf_to_markdown(pdf_path: str, max_workers: int = None) -> str:
+    """
+    Converts a PDF to Markdown, splitting large documents into page ranges that are
+    converted on a process pool.
+
+    pymupdf4llm converts every page on its own and concatenates the results, so
+    joining the ranges in page order gives exactly the Markdown of a single call.
+    Tables that span a page boundary are therefore parsed as before, since cleaning
+    and parsing run on the joined text.
+
+    Args:
+        pdf_path (str): The path to the PDF file.
+        max_workers (int): Number of worker processes (default: the CPU count).
+            1 converts the whole document in this process.
+
+    Returns:
+        str: The Markdown of the whole document.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    with pymupdf.open(pdf_path) as doc:
+        page_count = doc.page_count
+
+    if max_workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+        return pymupdf4llm.to_markdown(pdf_path)
+
+    ranges = page_ranges(page_count, max_workers * RANGES_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(ranges))) as executor:
+        parts = executor.map(_convert_page_range, [pdf_path] * len(ranges), ranges)
+        return ''.join(parts)
 
-def extract_data_from_pdf(pdf_path: str):
+
+def extract_data_from_pdf(pdf_path: str, use_cache: bool = True, max_workers: int = None):
     """
     Extracts introductory text and all tables from a PDF file, handling multi-line rows.
 
@@ -53,8 +209,13 @@ def extract_data_from_pdf(pdf_path: str):
     first table. It then dynamically parses all tables, reading headers
     and merging multi-line rows into single data records.
 
+    The intro text and rows are cached in cache/pdfs/ keyed by
+    the PDF content and PARSER_VERSION, so repeated runs skip the conversion.
+
     Args:
         pdf_path (str): The path to the PDF file.
+        use_cache (bool): Read and write the parsed-PDF cache.
+        max_workers (int): Worker processes for the conversion (see convert_pdf_to_markdown()).
 
     Returns:
         tuple: A tuple containing:
@@ -63,112 +224,229 @@ def extract_data_from_pdf(pdf_path: str):
                                       dictionary represents a row from a table.
                                       All tables are merged into this single list.
     """
+    cache_key = None
+    if use_cache:
+        cache_key = pdf_cache_key(pdf_path, f"{PARSER_VERSION}/pymupdf4llm-{pymupdf4llm.__version__}")
+        cached = load_parsed_pdf(cache_key)
+        if cached is not None:
+            return cached["intro_text"], cached["rows"]
+
     try:
         # Convert the entire PDF to a single Markdown string
         print(pdf_path)
-        md_text = pymupdf4llm.to_markdown(pdf_path)
+        md_text = convert_pdf_to_markdown(pdf_path, max_workers)
         md_text = _clean_greek_text(md_text)
-        print(md_text)
     except Exception as e:
         print(f"Error processing {pdf_path} with pymupdf4llm: {e}")
         return "", []
 
+    intro_text, data = parse_markdown(md_text, pdf_path)
+
+    if cache_key is not None:
+        store_parsed_pdf(cache_key, intro_text, data)
+
+    return intro_text, data
+
+
+def parse_markdown(md_text: str, pdf_path: str):
+    """
+    Parses the intro text and the table rows from the cleaned Markdown of a PDF.
+
+    Args:
+        md_text (str): The cleaned Markdown of the whole PDF.
+        pdf_path (str): The path to the PDF file, which selects the column headers.
+
+    Returns:
+        tuple: (intro_text, all_tables_data) as returned by extract_data_from_pdf().
+    """
     # --- Extract Introductory Text ---
-    # The introductory text is everything before the first table's header separator.
-    table_header_separator_match = re.search(r"\n\|-+[| -]+", md_text)
-
-    if table_header_separator_match:
-        # Find the start of the table header line (the line just before the separator)
-        table_start_pos = md_text.rfind('\n', 0, table_header_separator_match.start())
-        intro_text = md_text[:table_start_pos].strip()
-    else:
+    intro_text, lines = _split_intro(_iter_lines([md_text]))
+    if lines is None:
         # If no tables are found, the whole text is introductory
-        intro_text = md_text.strip()
         return intro_text, []
 
     # --- Extract and Parse Tables ---
-    # Extract tables
-    tables = re.findall(r"(?:\|.*\n)+", md_text)
-
-    # print("paragraph_match:\n", paragraph_match)
+    tables = list(_iter_table_blocks(lines))
     print("\nNumber of tables found:", len(tables))
 
-    if (pdf_path == "data/diorismos_monimwn.pdf"):
-        column_headers = [
-            "Α/Α", "Επώνυμο", "Όνομα", "Πατρώνυμο", "Κλάδος",
-            "Μόρια", "Σειρά", "Περιφέρεια", "Δ.Υ.Π.Ε.",
-            "Αριθμός Βεβαίωσης ΔΙΠΑΑΔ", "Αριθμός Βεβαίωσης"
-        ]
-    elif (pdf_path == "data/proslipsi_anaplhrwtwn.pdf"):
-        column_headers = [
-            "A/A", "A/A ΡΟΗΣ", "Επώνυμο", "Όνομα", "Πατρώνυμο",
-            "Ειδικότητα", "Κλάδος", "Τριτεκνος", "Πίνακας",
-            "Σείρα Πίνακα", "Μορια Πίνακα", "Περιοχή Τοποθέτησης"
-        ]
-    elif (pdf_path == "data/anaplhrwtes_eep_ebp.pdf"):
-        column_headers = [
-            "A/A", "A/A ΡΟΗΣ", "Τύπος", "Επώνυμο", "Όνομα", "Πατρώνυμο",
-            "Κλάδος", "Σείρα Πίνακα", "Περιοχή Πρόσληψης", "Διευθυνση Εκπαίδευσης"
-        ]
-    elif (pdf_path == "data/monimos_eep_ebp.pdf"):
-        column_headers = [
-            "A/A", "Σειρά Διορισμού", "Επώνυμο", "Όνομα",
-            "Πατρώνυυμο", "Κλάδος Διορισμού", "Σειρά Πίνακα",
-            "Περιοχή/ΣΔΕΥ Διορισμού", "ΔΠΕ/ΔΔΕ/ΠΔΕ", "Τυπος Κενου",
-            "Αρ. Βεβ. Εγγραφής στο Μητρώο Ανθρώπινου Δυναμικού Ελληνικού Δημοσίου",
-            "Αρ. βεβ. ΔΙΠΑΑΔ/Υπουργείου Εσωτερικών"
-        ]
-    elif (pdf_path == "data/topothethisi_monimou.pdf"):
-        column_headers = [
-            "A/A", "Αριθμός Μητρώου", "Επώνυμο", "Όνομα", "Όνομα Πατρός",
-            "Οργανικι θέση", "Σύνολο Μορίων", "Δήμος ή Κοινότητα εντοπιότητας", "Μόρια Εντοπ",
-            "Δήμος ή Κοινώτητα Εργασίας Συζύγου", "Μόρια Συνθπ", "Ειδική Κατηγορία",
-            "Σχολείο Οριστικής Τοποθέτησης"
-        ]
-    elif (pdf_path == "data/tpothetisi_anaplhrwtwn.pdf"):
-        column_headers = [
-            "Επώνυμο", "Όνομα", "Κλάδος", "Μόρια Πίνακα", 'ΣΧΟΛΕΙΟ Τοποθέτησης',
-            "ΣΧΟΛΕΙΟ 1ης Διαθεσης", "ΣΧΟΛΕΙΟ 2ης Διαθεσης"
-        ]
-    elif (pdf_path == "data/topothetisi_monimou_ksanthis.pdf"):
-        column_headers = [
-            "A/A", "ΕΠΩΝΥΜΟ","ΟΝΟΜΑ" , "ΠΑΤΡΩΝΥΜΟ", "ΚΛΑΔΟΥ", "ΣΧΟΛΕΙΟ ΝΕΑΣ ΟΡΓΑΝΙΚΗΣ"
-        ]
-    elif (pdf_path == "data/diathesi.pdf"):
-        column_headers = [
-            "A/A", "ΕΠΩΝΥΜΟ","ΟΝΟΜΑ", "ΚΛΑΔΟΣ", "ΣΧΟΛΕΙΟ ΟΡΓΑΝΙΚΗΣ/ΠΡΟΣΩΡΙΝΗΣ ΤΟΠΟΘΕΤΗΣΗΣ", "ΣΧΟΛΕΙΟ ΔΙΑΘΕΣΗΣ ΓΙΑ ΣΥΜΠΛΗΡΩΣΗ ΩΡΑΡΙΟΥ",
-            "ΩΡΕΣ ΣΥΜΠΛΗΡΩΣΗΣ"
-        ]
-
-
-
-    data = []
-    for i, table in enumerate(tables, 1):
-        cleaned_content = re.sub(
-            r"\|Α/Α\|.*?\|Αριθμός<br>Βεβαίωσης<br>ΔΙΠΑΑΔ\|\n\|---\|.*?\|---\|\n",
-            "",
-            table,
-            flags=re.DOTALL
-        )
-        # print(cleaned_content)
-
-        # Split the content into lines and process each line
-        lines = cleaned_content.strip().split('\n')
+    column_headers = _column_headers(pdf_path)
+    header_lines = set()
+    data = [row for table in tables for row in _iter_table_rows(table, column_headers, header_lines)]
+
+    return intro_text, data
+
+
+def stream_data_from_pdf(pdf_path: str):
+    """
+    Streaming variant of extract_data_from_pdf() for very large documents.
+
+    The PDF is converted STREAM_PAGE_CHUNK pages at a time and cleaned line by line,
+    and the rows are parsed table by table as they are read, so only the intro text,
+    the current pages and the current table are held in memory. The rows are the same
+    as those of extract_data_from_pdf(); the parsed-PDF cache is not used.
+
+    Args:
+        pdf_path (str): The path to the PDF file.
+
+    Returns:
+        tuple: A tuple containing:
+            - intro_text (str): The introductory text before any tables.
+            - rows (iterator): Yields the row dictionaries of all tables in order.
+    """
+    lines = (_clean_greek_text(line) for line in _iter_lines(_iter_markdown_chunks(pdf_path)))
+
+    intro_text, lines = _split_intro(lines)
+    if lines is None:
+        return intro_text, iter(())
+
+    column_headers = _column_headers(pdf_path)
+    header_lines = set()
+    rows = (row for table in _iter_table_blocks(lines)
+            for row in _iter_table_rows(table, column_headers, header_lines))
+    return intro_text, rows
+
+
+def _iter_markdown_chunks(pdf_path: str):
+    """
+    Yields the Markdown of a PDF STREAM_PAGE_CHUNK pages at a time.
+    """
+    with pymupdf.open(pdf_path) as doc:
+        page_count = doc.page_count
+
+    for start in range(0, page_count, STREAM_PAGE_CHUNK):
+        yield pymupdf4llm.to_markdown(pdf_path, pages=list(range(start, min(start + STREAM_PAGE_CHUNK, page_count))))
 
+
+def _iter_lines(chunks):
+    """
+    Splits a sequence of text chunks into lines, keeping the trailing '\n' of each line.
+    """
+    partial = ''
+    for chunk in chunks:
+        lines = (partial + chunk).split('\n')
+        partial = lines.pop()
         for line in lines:
-            if line.strip() and line.startswith('|') and line.endswith('|'):
-                # Remove leading and trailing pipes, then split by pipe
-                columns = line[1:-1].split('|')
-
-                # Create a row dictionary
-                if len(columns) >= len(column_headers):
-                    row = {}
-                    for j, header in enumerate(column_headers):
-                        if j < len(columns):
-                            row[header] = columns[j].strip()
-                    data.append(row)
-                else:
-                    print(f"Warning: Line has {len(columns)} columns, expected at least {len(column_headers)}")
-                    print(f"Line: {line}")
-
-    return md_text
\ No newline at end of file
+            yield line + '\n'
+    if partial:
+        yield partial
+
+
+def _split_intro(lines):
+    """
+    Reads lines up to the separator line of the first table.
+
+    The introductory text is everything before the header line of the first table.
+
+    Returns:
+        tuple: (intro_text, lines), where lines iterates over all lines again from the
+        start, or (intro_text, None) if the text has no table.
+    """
+    head = []
+    for line in lines:
+        head.append(line)
+        if len(head) > 1 and _TABLE_SEPARATOR_LINE.match(line):
+            return ''.join(head[:-2]).strip(), itertools.chain(head, lines)
+    return ''.join(head).strip(), None
+
+
+def _iter_table_blocks(lines):
+    """
+    Yields the tables of the Markdown, i.e. each run of consecutive lines that starts at
+    a '|' and continues with lines starting with '|'.
+    """
+    block = []
+    for line in lines:
+        if block and line.startswith('|') and line.endswith('\n'):
+            block.append(line)
+            continue
+        if block:
+            yield ''.join(block)
+            block = []
+        if '|' in line and line.endswith('\n'):
+            block = [line[line.index('|'):]]
+    if block:
+        yield ''.join(block)
+
+
+def _column_headers(pdf_path: str):
+    if pdf_path not in COLUMN_HEADERS:
+        raise ValueError(f"No column layout for {pdf_path}, expected one of {list(COLUMN_HEADERS)}")
+    return COLUMN_HEADERS[pdf_path]
+
+
+def _compact_cells(line: str):
+    # The text of a table line without pipes, line breaks and spaces, so that a header line
+    # matches however its cells were wrapped or joined
+    return ''.join(line.replace('<br>', ' ').replace('|', ' ').split())
+
+
+def _iter_table_rows(table: str, column_headers: list, header_lines: set = None):
+    """
+    Yields a row dictionary for every table line with at least as many columns as headers.
+
+    The '|---|' lines are skipped, and so is the line above one if it is a header line: its
+    text matches the column headers, or it equals the first header line of the document.
+    header_lines collects those lines across the tables of one document. A data row that
+    pymupdf4llm renders as the header of a table continued on a page without a repeated
+    header is kept.
+    """
+    if header_lines is None:
+        header_lines = set()
+    compact_headers = _compact_cells('|'.join(column_headers))
+
+    cleaned_content = re.sub(
+        r"\|Α/Α\|.*?\|Αριθμός<br>Βεβαίωσης<br>ΔΙΠΑΑΔ\|\n\|---\|.*?\|---\|\n",
+        "",
+        table,
+        flags=re.DOTALL
+    )
+    # print(cleaned_content)
+
+    # Split the content into lines and process each line
+    lines = cleaned_content.strip().split('\n')
+
+    for index, line in enumerate(lines):
+        if _TABLE_SEPARATOR_LINE.match(line):
+            continue
+        # The header line of the table (repeated on every page) is not a row; the first line
+        # with a separator under it in the document is always one
+        if index + 1 < len(lines) and _TABLE_SEPARATOR_LINE.match(lines[index + 1]):
+            compact_line = _compact_cells(line)
+            if not header_lines or compact_line == compact_headers or compact_line in header_lines:
+                header_lines.add(compact_line)
+                continue
+        if line.strip() and line.startswith('|') and line.endswith('|'):
+            # Remove leading and trailing pipes, then split by pipe
+            columns = line[1:-1].split('|')
+
+            # Create a row dictionary
+            if len(columns) >= len(column_headers):
+                row = {}
+                for j, header in enumerate(column_headers):
+                    if j < len(columns):
+                        row[header] = columns[j].strip()
+                yield row
+            else:
+                print(f"Warning: Line has {len(columns)} columns, expected at least {len(column_headers)}")
+                print(f"Line: {line}")
+
+
+def project_rows(data, pdf_path: str):
+    """
+    Keeps only the PROMPT_COLUMNS of the PDF's layout in every row.
+
+    Rows of a PDF without an entry in PROMPT_COLUMNS are returned unchanged.
+
+    Args:
+        data (iterable): The rows, as a list or a row iterator.
+        pdf_path (str): The PDF the rows come from.
+
+    Returns:
+        The projected rows, as a list if data is a list and as a generator otherwise.
+    """
+    columns = PROMPT_COLUMNS.get(pdf_path)
+    if columns is None:
+        return data
+
+    projected = ({column: row[column] for column in columns if column in row} for row in data)
+    return list(projected) if isinstance(data, list) else projected